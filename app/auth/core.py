@@ -1,6 +1,9 @@
+import asyncio
 import os
+import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
-from typing import List, Optional
+from typing import List, Optional, Tuple
 
 import jwt
 from dotenv import load_dotenv
@@ -8,12 +11,19 @@ from fastapi import Depends, HTTPException, Request, Response, status
 from fastapi.security import OAuth2PasswordBearer
 from passlib.context import CryptContext
 from pydantic import EmailStr
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
-from app.config.database import get_db
-from app.crud.user import get_user_by_company_name
-from app.models import User
-from app.schemas.user import TokenData
+from app.auth.user_cache import user_cache
+from app.config.database import get_async_db, get_db
+from app.crud.user import get_user_by_company_name, get_user_by_email
+from app.middleware.prometheus_middleware import (
+    PASSWORD_HASH_DURATION,
+    PASSWORD_HASH_PENDING,
+    PASSWORD_HASH_REJECTED,
+    PASSWORD_HASH_WAIT,
+)
+from app.schemas.user import TokenData, UserSnapshot
 
 load_dotenv()
 
@@ -22,9 +32,25 @@ ALGORITHM = os.getenv("ALGORITHM", "HS256")
 ACCESS_TOKEN_EXPIRE_DAYS = int(os.getenv("ACCESS_TOKEN_EXPIRE_DAYS", 1))
 COOKIE_NAME = os.getenv("COOKIE_NAME", "auth_token")
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# bcrypt cost factor. Hashes made with another cost are rehashed on the
+# next successful login.
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", 12))
+# bcrypt runs in its own threads (it releases the GIL) so it never blocks
+# the event loop. Operations beyond PASSWORD_HASH_MAX_PENDING (running plus
+# waiting) are rejected with 503 instead of queueing up.
+PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", 2))
+PASSWORD_HASH_MAX_PENDING = int(os.getenv("PASSWORD_HASH_MAX_PENDING", 32))
+
+pwd_context = CryptContext(
+    schemes=["bcrypt"], deprecated="auto", bcrypt__rounds=BCRYPT_ROUNDS
+)
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="login")
 
+password_hash_executor = ThreadPoolExecutor(
+    max_workers=PASSWORD_HASH_WORKERS, thread_name_prefix="password-hash"
+)
+_pending_password_hashes = 0
+
 
 def verify_password(plain_password, hashed_password) -> bool:
     return pwd_context.verify(plain_password, hashed_password)
@@ -34,12 +60,65 @@ def get_password_hash(password):
     return pwd_context.hash(password)
 
 
-def authenticate_user(db: Session, email: EmailStr, password: str):
-    user = db.query(User).filter(User.email == email).first()
+async def _run_password_hash(operation: str, func, *args):
+    global _pending_password_hashes
+
+    if _pending_password_hashes >= PASSWORD_HASH_MAX_PENDING:
+        PASSWORD_HASH_REJECTED.labels(operation=operation).inc()
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Too many password operations, please retry",
+            headers={"Retry-After": "1"},
+        )
+
+    submitted = time.perf_counter()
+
+    def timed():
+        started = time.perf_counter()
+        PASSWORD_HASH_WAIT.labels(operation=operation).observe(started - submitted)
+        try:
+            return func(*args)
+        finally:
+            PASSWORD_HASH_DURATION.labels(operation=operation).observe(
+                time.perf_counter() - started
+            )
+
+    _pending_password_hashes += 1
+    PASSWORD_HASH_PENDING.inc()
+    try:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(password_hash_executor, timed)
+    finally:
+        _pending_password_hashes -= 1
+        PASSWORD_HASH_PENDING.dec()
+
+
+async def get_password_hash_async(password: str) -> str:
+    return await _run_password_hash("hash", pwd_context.hash, password)
+
+
+async def verify_password_async(
+    plain_password: str, hashed_password: str
+) -> Tuple[bool, Optional[str]]:
+    """(valid, new_hash); new_hash is set when the stored hash should be
+    replaced, e.g. because BCRYPT_ROUNDS changed"""
+    return await _run_password_hash(
+        "verify", pwd_context.verify_and_update, plain_password, hashed_password
+    )
+
+
+async def authenticate_user(db: AsyncSession, email: EmailStr, password: str):
+    user = await db.run_sync(get_user_by_email, email, load_roles=True)
     if not user:
         return False
-    if not verify_password(password, user.hashed_password):
+
+    valid, new_hash = await verify_password_async(password, user.hashed_password)
+    if not valid:
         return False
+
+    if new_hash:
+        user.hashed_password = new_hash
+        await db.commit()
     return user
 
 
@@ -63,28 +142,42 @@ def decode_access_token(token: str):
         return None
 
 
-async def get_current_user(request: Request, db: Session = Depends(get_db)):
+def get_token_payload(request: Request) -> Optional[dict]:
+    """Claims of the auth cookie, or None if it is missing or invalid.
+
+    Decoded once per request; get_current_user and RoleChecker share it.
+    """
+    if not hasattr(request.state, "token_payload"):
+        token = request.cookies.get(COOKIE_NAME)
+        request.state.token_payload = decode_access_token(token) if token else None
+    return request.state.token_payload
+
+
+async def get_current_user(request: Request, db: AsyncSession = Depends(get_async_db)):
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials!",
         headers={"WWW-Authenticate": "Bearer"},
     )
 
-    token = request.cookies.get(COOKIE_NAME)
-    if not token:
+    payload = get_token_payload(request)
+    if payload is None:
         raise credentials_exception
 
-    try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        company_name: str = payload.get("sub")
-        if company_name is None:
-            raise credentials_exception
-    except jwt.PyJWTError:
+    company_name: str = payload.get("sub")
+    if company_name is None:
         raise credentials_exception
 
-    user = get_user_by_company_name(db, company_name)
-    if user is None:
+    user = await user_cache.get(company_name)
+    if user is not None:
+        return user
+
+    db_user = await db.run_sync(get_user_by_company_name, company_name, load_roles=True)
+    if db_user is None:
         raise credentials_exception
+
+    user = UserSnapshot.model_validate(db_user)
+    await user_cache.set(company_name, user)
     return user
 
 
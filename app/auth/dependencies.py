@@ -1,10 +1,9 @@
 from typing import List
 
-import jwt
 from fastapi import Depends, HTTPException, Request, status
 from sqlalchemy.orm import Session
 
-from app.auth.core import ALGORITHM, COOKIE_NAME, SECRET_KEY
+from app.auth.core import get_token_payload
 from app.config.database import get_db
 from app.models.user import UserRoleEnum
 
@@ -24,19 +23,14 @@ class RoleChecker:
             status_code=status.HTTP_403_FORBIDDEN, detail="Insufficient permissions"
         )
 
-        token = request.cookies.get(COOKIE_NAME)
-        if not token:
+        payload = get_token_payload(request)
+        if payload is None:
             raise credentials_exception
 
-        try:
-            payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-            company_name: str = payload.get("sub")
-            user_roles: List[str] = payload.get("roles", [])
+        company_name: str = payload.get("sub")
+        user_roles: List[str] = payload.get("roles", [])
 
-            if company_name is None:
-                raise credentials_exception
-
-        except jwt.PyJWTError:
+        if company_name is None:
             raise credentials_exception
 
         if not any(role in user_roles for role in self.allowed_roles):
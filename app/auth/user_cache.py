@@ -0,0 +1,146 @@
+import asyncio
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional, Tuple
+
+from app.config.redis_config import get_async_redis_connection, get_redis_connection
+from app.schemas.user import UserSnapshot
+
+# Seconds a worker keeps a user in memory. An invalidation only reaches the
+# worker that made the change (and Redis), so this is how long other
+# workers may still see old roles or an old email.
+USER_CACHE_TTL = float(os.getenv("USER_CACHE_TTL", 30))
+USER_CACHE_MAX_SIZE = int(os.getenv("USER_CACHE_MAX_SIZE", 10000))
+# Shared tier: a worker that misses in memory asks Redis before the database
+USER_CACHE_REDIS = os.getenv("USER_CACHE_REDIS", "false").lower() == "true"
+USER_CACHE_REDIS_TTL = int(os.getenv("USER_CACHE_REDIS_TTL", 300))
+USER_CACHE_REDIS_TIMEOUT = float(os.getenv("USER_CACHE_REDIS_TIMEOUT", 0.1))
+
+USER_CACHE_KEY_PREFIX = "user_snapshot:"
+
+
+class UserCache:
+    """User snapshots keyed by token subject (the company name).
+
+    Call `invalidate` after changing a user's roles, email or company name.
+    Redis errors are treated as misses; the caller falls back to the
+    database.
+    """
+
+    def __init__(
+        self,
+        ttl: float = USER_CACHE_TTL,
+        max_size: int = USER_CACHE_MAX_SIZE,
+        use_redis: bool = USER_CACHE_REDIS,
+        redis_ttl: int = USER_CACHE_REDIS_TTL,
+        timeout: float = USER_CACHE_REDIS_TIMEOUT,
+    ):
+        self.ttl = ttl
+        self.max_size = max_size
+        self.use_redis = use_redis
+        self.redis_ttl = redis_ttl
+        self.timeout = timeout
+        self._entries: "OrderedDict[str, Tuple[float, UserSnapshot]]" = OrderedDict()
+        # Sync routes invalidate from threadpool threads
+        self._lock = threading.Lock()
+
+    def _get_key(self, subject: str) -> str:
+        return f"{USER_CACHE_KEY_PREFIX}{subject}"
+
+    def _get_local(self, subject: str, now: float) -> Optional[UserSnapshot]:
+        with self._lock:
+            entry = self._entries.get(subject)
+            if entry is None:
+                return None
+            expires_at, user = entry
+            if now >= expires_at:
+                del self._entries[subject]
+                return None
+            self._entries.move_to_end(subject)
+            return user
+
+    def _set_local(self, subject: str, user: UserSnapshot, now: float):
+        with self._lock:
+            self._entries[subject] = (now + self.ttl, user)
+            self._entries.move_to_end(subject)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    async def get(self, subject: str) -> Optional[UserSnapshot]:
+        now = time.monotonic()
+        user = self._get_local(subject, now)
+        if user is not None or not self.use_redis:
+            return user
+
+        try:
+            data = await asyncio.wait_for(
+                get_async_redis_connection().get(self._get_key(subject)),
+                self.timeout,
+            )
+        except Exception as e:
+            print(f"User cache error: {e!r}")
+            return None
+        if data is None:
+            return None
+
+        user = UserSnapshot.model_validate_json(data)
+        self._set_local(subject, user, now)
+        return user
+
+    async def set(self, subject: str, user: UserSnapshot):
+        self._set_local(subject, user, time.monotonic())
+        if not self.use_redis:
+            return
+
+        try:
+            await asyncio.wait_for(
+                get_async_redis_connection().set(
+                    self._get_key(subject), user.model_dump_json(), ex=self.redis_ttl
+                ),
+                self.timeout,
+            )
+        except Exception as e:
+            print(f"User cache error: {e!r}")
+
+    def _drop_local(self, subjects) -> bool:
+        """Forget the users locally; True if Redis must be cleared as well"""
+        with self._lock:
+            for subject in subjects:
+                self._entries.pop(subject, None)
+        return self.use_redis and bool(subjects)
+
+    def invalidate(self, *subjects: str):
+        """Drop users from this worker's memory and from Redis"""
+        if not self._drop_local(subjects):
+            return
+
+        try:
+            get_redis_connection().delete(
+                *(self._get_key(subject) for subject in subjects)
+            )
+        except Exception as e:
+            print(f"User cache error: {e!r}")
+
+    async def invalidate_async(self, *subjects: str):
+        """invalidate for code running on the event loop"""
+        if not self._drop_local(subjects):
+            return
+
+        try:
+            await asyncio.wait_for(
+                get_async_redis_connection().delete(
+                    *(self._get_key(subject) for subject in subjects)
+                ),
+                self.timeout,
+            )
+        except Exception as e:
+            print(f"User cache error: {e!r}")
+
+
+user_cache = UserCache()
+
+
+def get_user_cache() -> UserCache:
+    return user_cache
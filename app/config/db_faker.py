@@ -8,7 +8,9 @@ from app.models.user import User, Role
 from app.models.order import Order, OrderItem, OrderState
 from app.models.product import Product, ProductCategory
 from app.models.base import Base
+from app.crud.analytics import rebuild_sales_rollups
 from app.crud.roles import get_role_by_name
+from app.services.analytics_cache import invalidate_dashboard
 
 
 fake = Faker()
@@ -77,6 +79,9 @@ def populate_dummy_data():
         products = fetch_existing_products(db)
         users = create_dummy_users(db)
         create_dummy_orders(db, users, products)
+        # The orders were inserted directly, not through create_order
+        rebuild_sales_rollups(db)
+        invalidate_dashboard()
     finally:
         db.close()
 
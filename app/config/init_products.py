@@ -6,6 +6,7 @@ from sqlalchemy.orm import Session
 from app.config.database import SessionLocal, engine
 from app.models.base import Base
 from app.models.product import Product, ProductCategory
+from app.services.product_cache import product_catalog_cache
 
 
 def get_category_from_folder(folder_name: str) -> ProductCategory:
@@ -74,6 +75,7 @@ def initialize_products():
 
         # Commit all changes
         db.commit()
+        product_catalog_cache.invalidate()
         print(f"🎉 Successfully initialized {products_added} products!")
 
         # Print summary by category
@@ -0,0 +1,53 @@
+"""Backfill for the analytics rollups (daily_product_sales,
+daily_customer_orders).
+
+    python -m app.config.init_sales_rollups
+
+crud.order.create_order keeps the rollups current. A rebuild is needed
+after orders were written some other way (imports, manual fixes); startup
+backfills them once when they are still empty.
+"""
+
+from app.config.database import SessionLocal
+from app.crud.analytics import rebuild_sales_rollups
+from app.models.analytics import DailyCustomerOrders, DailyProductSales
+from app.models.order import Order
+from app.services.analytics_cache import invalidate_dashboard
+
+
+def rebuild_rollups():
+    print("Rebuilding sales rollups...")
+    db = SessionLocal()
+    try:
+        rebuild_sales_rollups(db)
+        invalidate_dashboard()
+        print(
+            f"Sales rollups rebuilt: "
+            f"{db.query(DailyProductSales).count()} product rows, "
+            f"{db.query(DailyCustomerOrders).count()} customer rows"
+        )
+    except Exception as e:
+        print(f"Error rebuilding sales rollups: {e}")
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+
+def initialize_sales_rollups():
+    """Backfill when the rollup tables are new (empty) but orders exist"""
+    db = SessionLocal()
+    try:
+        needs_backfill = (
+            db.query(DailyCustomerOrders).first() is None
+            and db.query(Order).first() is not None
+        )
+    finally:
+        db.close()
+
+    if needs_backfill:
+        rebuild_rollups()
+
+
+if __name__ == "__main__":
+    rebuild_rollups()
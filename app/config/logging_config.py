@@ -1,42 +1,171 @@
-import json
+import atexit
 import logging
 import os
+import queue
 import sys
-from datetime import datetime
-from typing import Any, Dict
+import traceback
+import warnings
+from datetime import datetime, timezone
+from logging.handlers import QueueListener
+from typing import Callable, Optional
 
 import structlog
 
+_listener: Optional["_LogWriter"] = None
+_exception_formatter = logging.Formatter()
 
-class JSONFormatter(logging.Formatter):
 
-    def format(self, record: logging.LogRecord) -> str:
-        log_entry = {
-            "timestamp": datetime.utcnow().isoformat(),
-            "level": record.levelname,
-            "logger": record.name,
-            "message": record.getMessage(),
-            "module": record.module,
-            "function": record.funcName,
-            "line": record.lineno,
-        }
-
-        if hasattr(record, "user_id"):
-            log_entry["user_id"] = record.user_id
-        if hasattr(record, "request_id"):
-            log_entry["request_id"] = record.request_id
-        if hasattr(record, "duration"):
-            log_entry["duration"] = record.duration
-        if hasattr(record, "status_code"):
-            log_entry["status_code"] = record.status_code
+class _QueueLogger:
+    """structlog's logger: hands the processed event dict to the writer
+    thread instead of writing it"""
+
+    def __init__(self, log_queue: queue.SimpleQueue):
+        self._queue = log_queue
+
+    def msg(self, event_dict: dict):
+        self._queue.put(event_dict)
+
+    debug = info = warning = warn = error = critical = exception = msg
+
+
+class _QueueHandler(logging.Handler):
+    """Enqueues stdlib records as event dicts, rendered by the writer thread.
+
+    The message and traceback are formatted here, in the logging thread:
+    later the caller may have changed the record's args.
+    """
+
+    def __init__(self, log_queue: queue.SimpleQueue, include_location: bool):
+        super().__init__()
+        self._queue = log_queue
+        self.include_location = include_location
+
+    def emit(self, record: logging.LogRecord):
+        try:
+            self._queue.put(_record_to_event_dict(record, self.include_location))
+        except Exception:
+            self.handleError(record)
+
+
+class _LogWriter(QueueListener):
+    """Writer thread: renders queued events and writes them to every stream
+    with its renderer. Streams sharing a renderer get the same rendered line;
+    a None stream is whatever sys.stdout is at the time of the write.
+    """
+
+    def __init__(self, log_queue: queue.SimpleQueue, streams: list, log_file):
+        super().__init__(log_queue)
+        self.streams = streams
+        self.log_file = log_file
+
+    def handle(self, event_dict: dict):
+        try:
+            lines = {}
+            for stream, render in self.streams:
+                if render not in lines:
+                    lines[render] = render(event_dict)
+                stream = stream or sys.stdout
+                stream.write(lines[render] + "\n")
+                stream.flush()
+        except Exception:
+            # Keep the thread alive for the next events
+            traceback.print_exc(file=sys.stderr)
+
+    def stop(self):
+        super().stop()
+        self.log_file.close()
+
+
+def _stop_listener():
+    """Flush what is queued and stop the writer thread"""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
+atexit.register(_stop_listener)
+
+
+def _capture_exc_info(logger, method_name, event_dict):
+    # Resolved in the logging thread: the writer thread that renders the
+    # event has no current exception
+    if event_dict.get("exc_info") is True:
+        event_dict["exc_info"] = sys.exc_info()
+    return event_dict
+
+
+def _hand_to_logger(logger, method_name, event_dict):
+    # Passed as one argument: event keys never clash with parameter names
+    return (event_dict,), {}
+
+
+def _record_to_event_dict(
+    record: logging.LogRecord, include_location: bool = False
+) -> dict:
+    """Event dict for stdlib records (uvicorn, sqlalchemy,
+    logging.getLogger users); only plain values, no args or exc_info"""
+    timestamp = datetime.fromtimestamp(record.created, tz=timezone.utc)
+    event_dict = {
+        "event": record.getMessage(),
+        "logger": record.name,
+        "timestamp": timestamp.isoformat().replace("+00:00", "Z"),
+        "level": record.levelname.lower(),
+    }
+    if include_location:
+        event_dict["module"] = record.module
+        event_dict["function"] = record.funcName
+        event_dict["line"] = record.lineno
+    if record.exc_info:
+        event_dict["exception"] = _exception_formatter.formatException(
+            record.exc_info
+        )
+    elif record.exc_text:
+        event_dict["exception"] = record.exc_text
+    if record.stack_info:
+        event_dict["stack"] = record.stack_info
+    return event_dict
+
+
+def _build_renderer(environment: str, colors: bool) -> Callable[[dict], str]:
+    if environment == "development":
+        # stdlib records arrive with their traceback already formatted
+        warnings.filterwarnings(
+            "ignore", message="Remove `format_exc_info`", category=UserWarning
+        )
+        processors = [
+            structlog.dev.ConsoleRenderer(
+                colors=colors,
+                exception_formatter=(
+                    structlog.dev.default_exception_formatter
+                    if colors
+                    else structlog.dev.plain_traceback
+                ),
+            )
+        ]
+    else:
+        processors = [
+            structlog.processors.format_exc_info,
+            structlog.processors.JSONRenderer(),
+        ]
 
-        if record.exc_info:
-            log_entry["exception"] = self.formatException(record.exc_info)
+    def render(event_dict: dict) -> str:
+        # Processors may modify the dict; other renderers need it intact
+        rendered = event_dict.copy()
+        for processor in processors:
+            rendered = processor(None, event_dict["level"], rendered)
+        return rendered
 
-        return json.dumps(log_entry)
+    return render
 
 
 def setup_logging(environment: str = "development"):
+    """Route structlog and stdlib logging through one queue.
+
+    Callers (the event loop included) only enqueue events; a writer thread
+    renders them and writes to stdout and the log file.
+    """
+    global _listener
 
     log_level = logging.DEBUG if environment == "development" else logging.INFO
 
@@ -45,30 +174,32 @@ def setup_logging(environment: str = "development"):
 
     for handler in root_logger.handlers[:]:
         root_logger.removeHandler(handler)
-
-    console_handler = logging.StreamHandler(sys.stdout)
-    console_handler.setLevel(log_level)
+    _stop_listener()
 
     log_dir = "/app/logs" if environment == "docker" else "logs"
     if not os.path.exists(log_dir):
         os.makedirs(log_dir)
 
-    file_handler = logging.FileHandler(f"{log_dir}/app.log")
-    file_handler.setLevel(log_level)
+    log_file = open(f"{log_dir}/app.log", "a", encoding="utf-8")
 
-    if environment == "production":
-        formatter = JSONFormatter()
+    if environment == "development":
+        console_renderer = _build_renderer(environment, colors=True)
+        file_renderer = _build_renderer(environment, colors=False)
     else:
-        formatter = logging.Formatter(
-            "%(asctime)s - %(name)s - %(levelname)s - %(message)s"
-        )
-
-    console_handler.setFormatter(formatter)
-
-    file_handler.setFormatter(formatter)
+        console_renderer = file_renderer = _build_renderer(environment, colors=False)
 
-    root_logger.addHandler(console_handler)
-    root_logger.addHandler(file_handler)
+    log_queue = queue.SimpleQueue()
+    # Production lines say where a stdlib record was logged
+    root_logger.addHandler(
+        _QueueHandler(log_queue, include_location=environment != "development")
+    )
+    _listener = _LogWriter(
+        log_queue,
+        # sys.stdout can be replaced after setup (test runners capture it)
+        [(None, console_renderer), (log_file, file_renderer)],
+        log_file,
+    )
+    _listener.start()
 
     logging.getLogger("uvicorn.access").setLevel(logging.WARNING)
     logging.getLogger("sqlalchemy.engine").setLevel(logging.WARNING)
@@ -78,14 +209,11 @@ def setup_logging(environment: str = "development"):
             structlog.processors.TimeStamper(fmt="iso"),
             structlog.processors.add_log_level,
             structlog.processors.StackInfoRenderer(),
-            (
-                structlog.dev.ConsoleRenderer()
-                if environment == "development"
-                else structlog.processors.JSONRenderer()
-            ),
+            _capture_exc_info,
+            _hand_to_logger,
         ],
         wrapper_class=structlog.make_filtering_bound_logger(log_level),
-        logger_factory=structlog.WriteLoggerFactory(),
+        logger_factory=lambda *args: _QueueLogger(log_queue),
         cache_logger_on_first_use=True,
     )
 
@@ -0,0 +1,56 @@
+import os
+import socket
+
+from prometheus_client import (
+    REGISTRY,
+    CollectorRegistry,
+    generate_latest,
+    multiprocess,
+    values,
+)
+from rq import SimpleWorker, Worker
+
+# Shared directory for multi-process metrics: every uvicorn worker and RQ
+# worker writes its samples there and /metrics merges them. Unset = metrics
+# stay in the process that recorded them.
+PROMETHEUS_MULTIPROC_DIR = os.getenv("PROMETHEUS_MULTIPROC_DIR")
+
+
+def get_process_identifier() -> str:
+    # Containers sharing the directory all have low pids (often 1), so the
+    # hostname (container id) keeps their files apart. No "_": it separates
+    # the parts of the file names.
+    hostname = socket.gethostname().replace("_", "-")
+    return f"{hostname}-{os.getpid()}"
+
+
+if PROMETHEUS_MULTIPROC_DIR:
+    # Has to run before any metric is created
+    os.makedirs(PROMETHEUS_MULTIPROC_DIR, exist_ok=True)
+    values.ValueClass = values.MultiProcessValue(
+        process_identifier=get_process_identifier
+    )
+
+
+def generate_metrics() -> bytes:
+    """Exposition of all processes' metrics (or just this one's)"""
+    if not PROMETHEUS_MULTIPROC_DIR:
+        return generate_latest(REGISTRY)
+
+    registry = CollectorRegistry()
+    multiprocess.MultiProcessCollector(registry, path=PROMETHEUS_MULTIPROC_DIR)
+    return generate_latest(registry)
+
+
+def mark_process_dead():
+    """Drop this process' live gauge values (e.g. active requests)"""
+    if PROMETHEUS_MULTIPROC_DIR:
+        multiprocess.mark_process_dead(
+            get_process_identifier(), path=PROMETHEUS_MULTIPROC_DIR
+        )
+
+
+def get_worker_class():
+    # A forking Worker runs every job in a new process, each leaving its own
+    # metric files behind; SimpleWorker runs them in the worker process
+    return SimpleWorker if PROMETHEUS_MULTIPROC_DIR else Worker
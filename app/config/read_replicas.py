@@ -0,0 +1,236 @@
+"""Read-only sessions on Postgres streaming replicas.
+
+DATABASE_REPLICA_URLS is a comma separated list of replica URLs; empty (the
+default) means every read session is an ordinary primary session. Replicas
+are used round-robin. Each one is health checked at most every
+REPLICA_HEALTH_CHECK_INTERVAL seconds and skipped while it is unreachable or
+more than REPLICA_MAX_LAG_SECONDS behind; with no usable replica, reads fall
+back to the primary.
+
+Replica data can be a few seconds old, so only reads that tolerate that use
+these sessions (analytics, ML training input, admin listings). A customer
+reading back the order they just placed stays on the primary.
+"""
+
+import asyncio
+import itertools
+import os
+import threading
+import time
+from typing import List, Optional
+
+from sqlalchemy import create_engine, text
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.config.database import AsyncSessionLocal, SessionLocal, get_async_url
+from app.middleware.prometheus_middleware import (
+    DATABASE_READ_SESSIONS,
+    DATABASE_REPLICA_LAG,
+)
+
+DATABASE_REPLICA_URLS = [
+    url.strip()
+    for url in os.getenv("DATABASE_REPLICA_URLS", "").split(",")
+    if url.strip()
+]
+REPLICA_MAX_LAG_SECONDS = float(os.getenv("REPLICA_MAX_LAG_SECONDS", 5))
+REPLICA_HEALTH_CHECK_INTERVAL = float(os.getenv("REPLICA_HEALTH_CHECK_INTERVAL", 5))
+REPLICA_POOL_SIZE = int(os.getenv("REPLICA_POOL_SIZE", 10))
+REPLICA_CONNECT_TIMEOUT = int(os.getenv("REPLICA_CONNECT_TIMEOUT", 2))
+
+PRIMARY = "primary"
+
+# Seconds behind the primary. A replica that has replayed everything it
+# received is current even if its last replayed transaction is old (an idle
+# primary sends none), so that case counts as 0.
+POSTGRES_LAG_QUERY = text(
+    """
+    SELECT CASE
+        WHEN NOT pg_is_in_recovery() THEN 0
+        WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+        ELSE EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp())
+    END
+    """
+)
+
+
+def _engine_options(url: str, is_async: bool) -> dict:
+    if not url.startswith("postgresql"):
+        return {}
+    if is_async:
+        connect_args = {
+            "server_settings": {"timezone": "utc"},
+            "timeout": REPLICA_CONNECT_TIMEOUT,
+        }
+    else:
+        connect_args = {
+            "options": "-c timezone=utc",
+            "connect_timeout": REPLICA_CONNECT_TIMEOUT,
+        }
+    return dict(
+        pool_size=REPLICA_POOL_SIZE,
+        max_overflow=REPLICA_POOL_SIZE,
+        pool_pre_ping=True,
+        pool_recycle=3600,
+        connect_args=connect_args,
+    )
+
+
+class Replica:
+    def __init__(self, name: str, url: str):
+        self.name = name
+        self.engine = create_engine(url, **_engine_options(url, is_async=False))
+        self.async_engine = create_async_engine(
+            get_async_url(url), **_engine_options(url, is_async=True)
+        )
+        self.SessionLocal = sessionmaker(
+            autocommit=False, autoflush=False, bind=self.engine, expire_on_commit=False
+        )
+        self.AsyncSessionLocal = async_sessionmaker(
+            self.async_engine,
+            class_=AsyncSession,
+            autoflush=False,
+            expire_on_commit=False,
+        )
+        # Unusable until the first health check passes
+        self.healthy = False
+        self.checked_at = float("-inf")
+
+    def measure_lag(self) -> float:
+        with self.engine.connect() as connection:
+            if connection.dialect.name == "postgresql":
+                return float(connection.execute(POSTGRES_LAG_QUERY).scalar() or 0)
+            connection.execute(text("SELECT 1"))
+            return 0.0
+
+    def check(self):
+        try:
+            lag = self.measure_lag()
+            DATABASE_REPLICA_LAG.labels(replica=self.name).set(lag)
+            healthy = lag <= REPLICA_MAX_LAG_SECONDS
+            problem = f"{lag:.1f}s behind"
+        except Exception as e:
+            healthy = False
+            problem = f"unreachable ({e})"
+
+        if healthy != self.healthy:
+            if healthy:
+                print(f"Read replica {self.name} is healthy")
+            else:
+                print(f"Read replica {self.name} is {problem}, skipping it")
+        self.healthy = healthy
+        self.checked_at = time.monotonic()
+
+    def mark_failed(self):
+        """Skip the replica until its next health check"""
+        if self.healthy:
+            print(f"Read replica {self.name} failed a query, skipping it")
+        self.healthy = False
+        self.checked_at = time.monotonic()
+
+
+class ReplicaRouter:
+    def __init__(self, urls: List[str]):
+        self.replicas = [Replica(f"replica-{i}", url) for i, url in enumerate(urls)]
+        self._next = itertools.count()
+        self._check_lock = threading.Lock()
+
+    def checks_due(self) -> bool:
+        now = time.monotonic()
+        return any(
+            now - replica.checked_at >= REPLICA_HEALTH_CHECK_INTERVAL
+            for replica in self.replicas
+        )
+
+    def run_due_checks(self):
+        # One thread checks; concurrent requests route on the previous results
+        if not self._check_lock.acquire(blocking=False):
+            return
+        try:
+            now = time.monotonic()
+            for replica in self.replicas:
+                if now - replica.checked_at >= REPLICA_HEALTH_CHECK_INTERVAL:
+                    replica.check()
+        finally:
+            self._check_lock.release()
+
+    def pick(self) -> Optional[Replica]:
+        """Next healthy replica in round-robin order, None for the primary"""
+        count = len(self.replicas)
+        if not count:
+            return None
+        start = next(self._next)
+        for offset in range(count):
+            replica = self.replicas[(start + offset) % count]
+            if replica.healthy:
+                return replica
+        return None
+
+    async def dispose(self):
+        for replica in self.replicas:
+            await replica.async_engine.dispose()
+            replica.engine.dispose()
+
+
+read_replicas = ReplicaRouter(DATABASE_REPLICA_URLS)
+
+
+def get_read_db():
+    """Like get_db, on a replica when one is usable. Read-only use only."""
+    if read_replicas.checks_due():
+        read_replicas.run_due_checks()
+    replica = read_replicas.pick()
+
+    if replica:
+        # Connect up front: if the replica is down, the primary serves this
+        # request instead of it failing
+        db = replica.SessionLocal()
+        try:
+            db.connection()
+        except OperationalError:
+            replica.mark_failed()
+            db.close()
+            replica = None
+    if replica is None:
+        db = SessionLocal()
+    DATABASE_READ_SESSIONS.labels(target=replica.name if replica else PRIMARY).inc()
+
+    try:
+        yield db
+    except OperationalError:
+        if replica:
+            replica.mark_failed()
+        raise
+    finally:
+        db.close()
+
+
+async def get_async_read_db():
+    """Like get_async_db, on a replica when one is usable. Read-only use only."""
+    if read_replicas.checks_due():
+        # The checks connect with the sync engines
+        await asyncio.to_thread(read_replicas.run_due_checks)
+    replica = read_replicas.pick()
+
+    if replica:
+        # As in get_read_db: connect first, fall back to the primary
+        db = replica.AsyncSessionLocal()
+        try:
+            await db.connection()
+        except OperationalError:
+            replica.mark_failed()
+            await db.close()
+            replica = None
+    if replica is None:
+        db = AsyncSessionLocal()
+    DATABASE_READ_SESSIONS.labels(target=replica.name if replica else PRIMARY).inc()
+
+    async with db:
+        try:
+            yield db
+        except OperationalError:
+            if replica:
+                replica.mark_failed()
+            raise
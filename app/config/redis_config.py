@@ -1,21 +1,30 @@
 import os
 
 import redis
+import redis.asyncio
 from rq import Queue, Retry, Worker
 from rq.job import Job
 
 redis_url = os.getenv("REDIS_URL", "redis://localhost:6379")
 redis_conn = redis.from_url(redis_url)
+# For code running on the event loop (rate limiting); connections are
+# created lazily on the loop that first uses them
+async_redis_conn = redis.asyncio.from_url(redis_url)
 
 pdf_queue = Queue("pdf_generation", connection=redis_conn)
 email_queue = Queue("email_sending", connection=redis_conn)
 dead_letter_queue = Queue("dead_letter", connection=redis_conn)
+ml_training_queue = Queue("ml_training", connection=redis_conn)
 
 
 def get_redis_connection():
     return redis_conn
 
 
+def get_async_redis_connection():
+    return async_redis_conn
+
+
 def get_pdf_queue():
     return pdf_queue
 
@@ -28,6 +37,10 @@ def get_dead_letter_queue():
     return dead_letter_queue
 
 
+def get_ml_training_queue():
+    return ml_training_queue
+
+
 def move_to_dead_letter_queue(job, exc_string):
     try:
         dlq = get_dead_letter_queue()
@@ -52,8 +65,10 @@ def get_queue_stats():
         "pdf_queue_length": len(pdf_queue),
         "email_queue_length": len(email_queue),
         "dead_letter_queue": len(dead_letter_queue),
+        "ml_training_queue_length": len(ml_training_queue),
         "pdf_queue_failed": pdf_queue.failed_job_registry.count,
         "email_queue_failed": email_queue.failed_job_registry.count,
+        "ml_training_queue_failed": ml_training_queue.failed_job_registry.count,
     }
 
 
@@ -0,0 +1,32 @@
+import hashlib
+from typing import Optional
+
+from fastapi import Response, status
+
+JSON_MEDIA_TYPE = "application/json"
+
+
+def strong_etag(body: bytes) -> str:
+    return f'"{hashlib.sha256(body).hexdigest()[:32]}"'
+
+
+def etag_matches(etag: str, if_none_match: Optional[str]) -> bool:
+    """If-None-Match comparison (weak, as the RFC specifies for GET: a CDN
+    that compressed the body may have sent W/"...")"""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    return any(
+        tag.strip().removeprefix("W/") == etag for tag in if_none_match.split(",")
+    )
+
+
+def conditional_json_response(
+    body: bytes, etag: str, cache_control: str, if_none_match: Optional[str]
+) -> Response:
+    """The pre-serialized body, or an empty 304 when the client has it"""
+    headers = {"ETag": etag, "Cache-Control": cache_control}
+    if etag_matches(etag, if_none_match):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    return Response(content=body, media_type=JSON_MEDIA_TYPE, headers=headers)
@@ -0,0 +1,35 @@
+import base64
+import binascii
+from datetime import datetime
+from typing import List, Optional, Tuple
+
+from fastapi import HTTPException, status
+
+from app.models.order import Order
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+def encode_order_cursor(order_date: datetime, order_id: int) -> str:
+    """Opaque keyset cursor for the (order_date, id) listing order"""
+    raw = f"{order_date.isoformat()}|{order_id}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_order_cursor(cursor: str) -> Tuple[datetime, int]:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        order_date, order_id = base64.urlsafe_b64decode(padded).decode().split("|")
+        return datetime.fromisoformat(order_date), int(order_id)
+    except (ValueError, binascii.Error, UnicodeDecodeError):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor"
+        )
+
+
+def next_order_cursor(orders: List[Order], limit: int) -> Optional[str]:
+    """Cursor pointing after the last order of a full page, None on the last page"""
+    if len(orders) < limit:
+        return None
+    last = orders[-1]
+    return encode_order_cursor(last.order_date, last.id)
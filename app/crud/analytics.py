@@ -1,33 +1,164 @@
-from datetime import date, datetime
+from datetime import date
 from typing import Any, Dict, List, Optional
 
 from fastapi import HTTPException, status
-from sqlalchemy import and_, asc, desc, func
+from sqlalchemy import (
+    Date,
+    String,
+    asc,
+    cast,
+    delete,
+    desc,
+    func,
+    insert,
+    null,
+    select,
+    union_all,
+    update,
+)
+from sqlalchemy.dialects import postgresql, sqlite
 from sqlalchemy.orm import Session, joinedload
 
+from app.models.analytics import DailyCustomerOrders, DailyProductSales
 from app.models.order import Order, OrderItem, OrderState
 from app.schemas.order import OrderCreate, OrderUpdate
 
+# ---- Rollups ----
+# The analytics queries read the daily rollups instead of aggregating all of
+# orders/order_items on every call. Both rollups are computed by the SELECTs
+# below: for one order when it is created, for everything on a rebuild.
+
+PRODUCT_SALES_COLUMNS = ["date", "product_id", "user_email", "quantity", "order_count"]
+CUSTOMER_ORDERS_COLUMNS = ["date", "user_email", "quantity", "order_count"]
+
+
+def _product_sales_rows():
+    order_day = func.date(Order.order_date)
+    return (
+        select(
+            order_day,
+            OrderItem.product_id,
+            Order.user_email,
+            func.sum(OrderItem.quantity),
+            func.count(OrderItem.id),
+        )
+        .select_from(Order)
+        .join(OrderItem, OrderItem.order_id == Order.id)
+        .group_by(order_day, OrderItem.product_id, Order.user_email)
+    )
+
+
+def _customer_order_rows():
+    order_day = func.date(Order.order_date)
+    return (
+        select(
+            order_day,
+            Order.user_email,
+            func.coalesce(func.sum(OrderItem.quantity), 0),
+            func.count(func.distinct(Order.id)),
+        )
+        .select_from(Order)
+        .outerjoin(OrderItem, OrderItem.order_id == Order.id)
+        .group_by(order_day, Order.user_email)
+    )
+
+
+def _add_to_rollup(db: Session, model, columns: List[str], rows):
+    dialect = postgresql if db.get_bind().dialect.name == "postgresql" else sqlite
+    stmt = dialect.insert(model).from_select(columns, rows)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[column.name for column in model.__table__.primary_key],
+        set_={
+            "quantity": model.quantity + stmt.excluded.quantity,
+            "order_count": model.order_count + stmt.excluded.order_count,
+        },
+    )
+    db.execute(stmt)
+
+
+def add_order_to_rollups(db: Session, order_id: int):
+    """Count a new order (already flushed, with its items) in the rollups.
+
+    Part of the caller's transaction, so the rollups commit or roll back
+    together with the order.
+    """
+    _add_to_rollup(
+        db,
+        DailyProductSales,
+        PRODUCT_SALES_COLUMNS,
+        _product_sales_rows().where(Order.id == order_id),
+    )
+    _add_to_rollup(
+        db,
+        DailyCustomerOrders,
+        CUSTOMER_ORDERS_COLUMNS,
+        _customer_order_rows().where(Order.id == order_id),
+    )
+
+
+def rebuild_sales_rollups(db: Session):
+    """Recompute both rollups from orders/order_items"""
+    db.execute(delete(DailyProductSales))
+    db.execute(delete(DailyCustomerOrders))
+    db.execute(
+        insert(DailyProductSales).from_select(
+            PRODUCT_SALES_COLUMNS, _product_sales_rows()
+        )
+    )
+    db.execute(
+        insert(DailyCustomerOrders).from_select(
+            CUSTOMER_ORDERS_COLUMNS, _customer_order_rows()
+        )
+    )
+    db.commit()
+
+
+def rename_customer_in_rollups(db: Session, old_email: str, new_email: str):
+    """Follow a user's email change; the caller commits"""
+    for model in (DailyProductSales, DailyCustomerOrders):
+        db.execute(
+            update(model)
+            .where(model.user_email == old_email)
+            .values(user_email=new_email)
+        )
+
+
+def remove_customer_from_rollups(db: Session, user_email: str):
+    """Drop a deleted user's orders from the rollups; the caller commits"""
+    for model in (DailyProductSales, DailyCustomerOrders):
+        db.execute(delete(model).where(model.user_email == user_email))
+
+
+# ---- Queries ----
+
 
 def get_total_quantity_per_product(db: Session):
     return (
-        db.query(OrderItem.product_id, func.sum(OrderItem.quantity).label("total_kg"))
-        .group_by(OrderItem.product_id)
+        db.query(
+            DailyProductSales.product_id,
+            func.sum(DailyProductSales.quantity).label("total_kg"),
+        )
+        .group_by(DailyProductSales.product_id)
         .order_by(desc("total_kg"))
         .all()
     )
 
 
 def get_average_quantity_per_order(db: Session):
-    total_quantity = db.query(func.sum(OrderItem.quantity)).scalar()
-    total_orders = db.query(func.count(Order.id)).scalar()
+    total_quantity, total_orders = db.query(
+        func.sum(DailyCustomerOrders.quantity),
+        func.sum(DailyCustomerOrders.order_count),
+    ).one()
     return total_quantity / total_orders if total_orders else 0
 
 
 def get_most_ordered_products(db: Session, limit=10):
     return (
-        db.query(OrderItem.product_id, func.sum(OrderItem.quantity).label("total_kg"))
-        .group_by(OrderItem.product_id)
+        db.query(
+            DailyProductSales.product_id,
+            func.sum(DailyProductSales.quantity).label("total_kg"),
+        )
+        .group_by(DailyProductSales.product_id)
         .order_by(desc("total_kg"))
         .limit(limit)
         .all()
@@ -36,8 +167,11 @@ def get_most_ordered_products(db: Session, limit=10):
 
 def get_least_ordered_products(db: Session, limit=10):
     return (
-        db.query(OrderItem.product_id, func.sum(OrderItem.quantity).label("total_kg"))
-        .group_by(OrderItem.product_id)
+        db.query(
+            DailyProductSales.product_id,
+            func.sum(DailyProductSales.quantity).label("total_kg"),
+        )
+        .group_by(DailyProductSales.product_id)
         .order_by(asc("total_kg"))
         .limit(limit)
         .all()
@@ -46,8 +180,11 @@ def get_least_ordered_products(db: Session, limit=10):
 
 def get_product_order_frequency(db: Session):
     return (
-        db.query(OrderItem.product_id, func.count(OrderItem.id).label("times_ordered"))
-        .group_by(OrderItem.product_id)
+        db.query(
+            DailyProductSales.product_id,
+            func.sum(DailyProductSales.order_count).label("times_ordered"),
+        )
+        .group_by(DailyProductSales.product_id)
         .order_by(desc("times_ordered"))
         .all()
     )
@@ -55,9 +192,11 @@ def get_product_order_frequency(db: Session):
 
 def get_top_customers_by_quantity(db: Session, limit=10):
     return (
-        db.query(Order.user_email, func.sum(OrderItem.quantity).label("total_kg"))
-        .join(OrderItem, Order.id == OrderItem.order_id)
-        .group_by(Order.user_email)
+        db.query(
+            DailyCustomerOrders.user_email,
+            func.sum(DailyCustomerOrders.quantity).label("total_kg"),
+        )
+        .group_by(DailyCustomerOrders.user_email)
         .order_by(desc("total_kg"))
         .limit(limit)
         .all()
@@ -66,8 +205,11 @@ def get_top_customers_by_quantity(db: Session, limit=10):
 
 def get_customer_order_frequency(db: Session):
     return (
-        db.query(Order.user_email, func.count(Order.id).label("order_count"))
-        .group_by(Order.user_email)
+        db.query(
+            DailyCustomerOrders.user_email,
+            func.sum(DailyCustomerOrders.order_count).label("order_count"),
+        )
+        .group_by(DailyCustomerOrders.user_email)
         .order_by(desc("order_count"))
         .all()
     )
@@ -76,18 +218,17 @@ def get_customer_order_frequency(db: Session):
 # time distribution per day
 def get_order_time_distribution(db: Session):
     return (
-        db.query(func.date(Order.order_date).label("date"), func.count(Order.id))
-        .group_by(func.date(Order.order_date))
-        .order_by(func.date(Order.order_date))
+        db.query(DailyCustomerOrders.date, func.sum(DailyCustomerOrders.order_count))
+        .group_by(DailyCustomerOrders.date)
+        .order_by(DailyCustomerOrders.date)
         .all()
     )
 
 
 def get_total_quantity_by_user(db: Session, user_email: str) -> int:
     total_quantity = (
-        db.query(func.sum(OrderItem.quantity))
-        .join(Order)
-        .filter(Order.user_email == user_email)
+        db.query(func.sum(DailyCustomerOrders.quantity))
+        .filter(DailyCustomerOrders.user_email == user_email)
         .scalar()
     )
     return float(total_quantity) if total_quantity is not None else 0.0
@@ -95,20 +236,98 @@ def get_total_quantity_by_user(db: Session, user_email: str) -> int:
 
 def get_total_quantity_for_product(db: Session, product_id: int) -> int:
     total_quantity = (
-        db.query(func.sum(OrderItem.quantity))
-        .filter(OrderItem.product_id == product_id)
+        db.query(func.sum(DailyProductSales.quantity))
+        .filter(DailyProductSales.product_id == product_id)
         .scalar()
     )
     return float(total_quantity) if total_quantity is not None else 0.0
 
 
 def get_total_quantity_by_date(db: Session, order_date: date) -> int:
-    start_of_day = datetime.combine(order_date, datetime.min.time())
-    end_of_day = datetime.combine(order_date, datetime.max.time())
     total_quantity = (
-        db.query(func.sum(OrderItem.quantity))
-        .join(Order)
-        .filter(and_(Order.order_date >= start_of_day, Order.order_date <= end_of_day))
+        db.query(func.sum(DailyCustomerOrders.quantity))
+        .filter(DailyCustomerOrders.date == order_date)
         .scalar()
     )
     return float(total_quantity) if total_quantity is not None else 0.0
+
+
+# ---- Dashboard ----
+
+
+def get_dashboard(db: Session, limit=10) -> Dict[str, Any]:
+    """Every dashboard metric from two grouped queries over the rollups.
+
+    Same values (and orderings) as the single-metric functions above.
+    """
+    products = (
+        db.query(
+            DailyProductSales.product_id,
+            func.sum(DailyProductSales.quantity),
+            func.sum(DailyProductSales.order_count),
+        )
+        .group_by(DailyProductSales.product_id)
+        .all()
+    )
+
+    # Per customer and per day in one round trip; the unused key is NULL
+    per_customer = select(
+        DailyCustomerOrders.user_email,
+        cast(null(), Date),
+        func.sum(DailyCustomerOrders.quantity),
+        func.sum(DailyCustomerOrders.order_count),
+    ).group_by(DailyCustomerOrders.user_email)
+    per_day = select(
+        cast(null(), String),
+        DailyCustomerOrders.date,
+        func.sum(DailyCustomerOrders.quantity),
+        func.sum(DailyCustomerOrders.order_count),
+    ).group_by(DailyCustomerOrders.date)
+    customers, days = [], []
+    for user_email, day, quantity, order_count in db.execute(
+        union_all(per_customer, per_day)
+    ):
+        if user_email is not None:
+            customers.append((user_email, quantity, order_count))
+        else:
+            days.append((day, order_count))
+
+    by_quantity = sorted(products, key=lambda row: row[1], reverse=True)
+    customers_by_quantity = sorted(customers, key=lambda row: row[1], reverse=True)
+    total_orders = sum(order_count for _, _, order_count in customers)
+    total_quantity = sum(quantity for _, quantity, _ in customers)
+
+    return {
+        "total_quantity_per_product": [
+            (product_id, quantity) for product_id, quantity, _ in by_quantity
+        ],
+        "average_quantity_per_order": (
+            total_quantity / total_orders if total_orders else 0
+        ),
+        "most_ordered_products": [
+            (product_id, quantity) for product_id, quantity, _ in by_quantity[:limit]
+        ],
+        "least_ordered_products": [
+            (product_id, quantity)
+            for product_id, quantity, _ in sorted(products, key=lambda row: row[1])[
+                :limit
+            ]
+        ],
+        "product_order_frequency": [
+            (product_id, times_ordered)
+            for product_id, _, times_ordered in sorted(
+                products, key=lambda row: row[2], reverse=True
+            )
+        ],
+        "top_customers_by_quantity": [
+            (user_email, quantity)
+            for user_email, quantity, _ in customers_by_quantity[:limit]
+        ],
+        "customer_order_frequency": [
+            (user_email, order_count)
+            for user_email, _, order_count in sorted(
+                customers, key=lambda row: row[2], reverse=True
+            )
+        ],
+        "order_time_distribution": sorted(days),
+    }
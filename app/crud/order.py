@@ -1,59 +1,146 @@
 from datetime import date, datetime
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, List, Optional, Tuple
 
 from fastapi import HTTPException, status
-from sqlalchemy import and_, func, or_
-from sqlalchemy.orm import Session, joinedload
+from sqlalchemy import Result, and_, func, select, tuple_
+from sqlalchemy.orm import Query, Session, joinedload, selectinload
 
+from app.crud.analytics import add_order_to_rollups
 from app.models.order import Order, OrderItem, OrderState
+from app.models.product import Product
+from app.models.user import User
 from app.schemas.order import (FailureOrdersRequest, FailureType, OrderCreate,
                                OrderUpdate)
 
 
-def get_all_orders(db: Session, skip: int = 0, limit: int = 50) -> List[Order]:
-    orders = db.query(Order).offset(skip).limit(limit).all()
-    return orders
+def order_listing_query(db: Session) -> Query:
+    """Base query for order listings with every relationship the
+    response touches loaded up front.
+
+    `Order.user` is many-to-one, so it is joined into the page query.
+    `Order.order_items` is a collection, so it is loaded with one extra
+    SELECT ... WHERE order_id IN (...) per page (a joined collection would
+    multiply the rows and break LIMIT), with `OrderItem.product` joined
+    into that same statement.
+    """
+    return db.query(Order).options(
+        joinedload(Order.user),
+        selectinload(Order.order_items).joinedload(OrderItem.product),
+    )
+
+
+def paginate_orders(
+    query: Query,
+    skip: int = 0,
+    limit: int = 50,
+    after: Optional[Tuple[datetime, int]] = None,
+) -> List[Order]:
+    """Newest-first page of `query`.
+
+    With `after` (an `(order_date, id)` keyset taken from the last row of the
+    previous page) the page starts right behind that row via the
+    `orders(..., order_date DESC, id DESC)` indexes and `skip` is ignored.
+    Without it the legacy offset paging is used.
+    """
+    order_date = Order.order_date
+    if query.session.get_bind().dialect.name == "sqlite":
+        # SQLite stores func.now() without fractional seconds but binds
+        # datetimes with them, so equal timestamps would not compare equal.
+        order_date = func.julianday(Order.order_date)
+        after = after and (func.julianday(after[0]), after[1])
+
+    query = query.order_by(order_date.desc(), Order.id.desc())
+    if after is not None:
+        query = query.filter(tuple_(order_date, Order.id) < tuple_(*after))
+    else:
+        query = query.offset(skip)
+    return query.limit(limit).all()
+
+
+def get_all_orders(
+    db: Session,
+    skip: int = 0,
+    limit: int = 50,
+    after: Optional[Tuple[datetime, int]] = None,
+) -> List[Order]:
+    return paginate_orders(order_listing_query(db), skip, limit, after)
 
 
 def get_orders_by_user_email(
-    db: Session, user_email: str, skip: int = 0, limit: int = 10
+    db: Session,
+    user_email: str,
+    skip: int = 0,
+    limit: int = 10,
+    after: Optional[Tuple[datetime, int]] = None,
 ) -> List[Order]:
 
-    orders = (
-        db.query(Order)
-        .options(
-            joinedload(Order.order_items).joinedload(OrderItem.product),
-            joinedload(Order.user),
-        )
-        .filter(Order.user_email == user_email)
-        .order_by(Order.order_date.desc())
-        .offset(skip)
-        .limit(limit)
-        .all()
-    )
-    return orders if orders is not None else []
+    query = order_listing_query(db).filter(Order.user_email == user_email)
+    return paginate_orders(query, skip, limit, after)
 
 
 def get_orders_by_date(
-    db: Session, order_date: date, skip: int = 0, limit: int = 10
+    db: Session,
+    order_date: date,
+    skip: int = 0,
+    limit: int = 10,
+    after: Optional[Tuple[datetime, int]] = None,
 ) -> List[Order]:
 
     start_of_day = datetime.combine(order_date, datetime.min.time())
     end_of_day = datetime.combine(order_date, datetime.max.time())
 
-    orders = (
-        db.query(Order)
-        .options(
-            joinedload(Order.order_items).joinedload(OrderItem.product),
-            joinedload(Order.user),
+    query = order_listing_query(db).filter(
+        and_(Order.order_date >= start_of_day, Order.order_date <= end_of_day)
+    )
+    return paginate_orders(query, skip, limit, after)
+
+
+def stream_order_export_rows(
+    db: Session,
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+    states: Optional[List[OrderState]] = None,
+    batch_size: int = 1000,
+) -> Result:
+    """Flat order/item/product rows for exports, oldest order first.
+
+    Rows are plain tuples (no ORM identity map) fetched `batch_size` at a
+    time; on Postgres `yield_per` also switches to a server-side cursor, so
+    memory stays flat regardless of how many orders match.
+    """
+    query = (
+        select(
+            Order.id.label("order_id"),
+            Order.user_email,
+            User.company_name,
+            Order.order_date,
+            Order.state,
+            OrderItem.id.label("item_id"),
+            OrderItem.product_id,
+            OrderItem.quantity,
+            Product.description.label("product_description"),
+            Product.category.label("product_category"),
         )
-        .filter(and_(Order.order_date >= start_of_day, Order.order_date <= end_of_day))
-        .order_by(Order.order_date.desc())
-        .offset(skip)
-        .limit(limit)
-        .all()
+        .select_from(Order)
+        .outerjoin(User, User.email == Order.user_email)
+        .outerjoin(OrderItem, OrderItem.order_id == Order.id)
+        .outerjoin(Product, Product.id == OrderItem.product_id)
+        .order_by(Order.order_date, Order.id, OrderItem.id)
+        .execution_options(yield_per=batch_size)
     )
-    return orders if orders is not None else []
+
+    if start_date:
+        query = query.filter(
+            Order.order_date >= datetime.combine(start_date, datetime.min.time())
+        )
+    if end_date:
+        query = query.filter(
+            Order.order_date <= datetime.combine(end_date, datetime.max.time())
+        )
+    if states:
+        query = query.filter(Order.state.in_(states))
+
+    return db.execute(query)
 
 
 def get_order_by_id(db: Session, order_id: int) -> Optional[Order]:
@@ -81,6 +168,8 @@ def create_order(db: Session, order: OrderCreate, user_email: str) -> Order:
         )
         db.add(db_item)
 
+    db.flush()
+    add_order_to_rollups(db, db_order.id)
     db.commit()
     db.refresh(db_order)
 
@@ -102,9 +191,13 @@ def update_order_state(
 
 
 def get_failed_orders(
-    db: Session, failure_type: str = "all", skip: int = 0, limit: int = 100
+    db: Session,
+    failure_type: str = "all",
+    skip: int = 0,
+    limit: int = 100,
+    after: Optional[Tuple[datetime, int]] = None,
 ) -> List[Order]:
-    query = db.query(Order)
+    query = order_listing_query(db)
 
     if failure_type.lower() == "pdf":
         query = query.filter(Order.state == OrderState.PDF_FAILED)
@@ -112,17 +205,12 @@ def get_failed_orders(
         query = query.filter(Order.state == OrderState.EMAIL_FAILED)
     elif failure_type.lower() == "all":
         query = query.filter(
-            or_(
-                Order.state == OrderState.PDF_FAILED,
-                Order.state == OrderState.EMAIL_FAILED,
-            )
+            Order.state.in_([OrderState.PDF_FAILED, OrderState.EMAIL_FAILED])
         )
     else:
         return []
 
-    orders = query.order_by(Order.order_date.desc()).offset(skip).limit(limit).all()
-
-    return orders if orders is not None else []
+    return paginate_orders(query, skip, limit, after)
 
 
 def get_failed_orders_count(db: Session) -> Dict[str, int]:
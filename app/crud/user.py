@@ -1,7 +1,9 @@
+from typing import Optional
 from uuid import uuid4
 
-from sqlalchemy.orm import Session
+from sqlalchemy.orm import Query, Session, selectinload
 
+from app.crud.analytics import remove_customer_from_rollups
 from app.models.user import Role, User
 from app.schemas.user import UserCreate, UserCreateWithRoles, UserUpdate
 
@@ -14,9 +16,24 @@ def get_user(db: Session, user_id: str):
     return db.query(User).filter(User.id == user_id).first()
 
 
-def get_user_by_company_name(db: Session, company_name: str):
+def user_query(db: Session, load_roles: bool = False) -> Query:
+    """`load_roles` loads `User.roles` up front, needed when the user is
+    used outside an AsyncSession.run_sync call (no lazy loads there)."""
+    query = db.query(User)
+    if load_roles:
+        query = query.options(selectinload(User.roles))
+    return query
+
+
+def get_user_by_company_name(
+    db: Session, company_name: str, load_roles: bool = False
+):
     # print(f"Searching for company_name: '{company_name}'")
-    result = db.query(User).filter(User.company_name == company_name).first()
+    result = (
+        user_query(db, load_roles)
+        .filter(User.company_name == company_name)
+        .first()
+    )
     # if result:
     # print(f"Found user: ID={result.id}, Email={result.email}, Company={result.company_name}")
     # else:
@@ -24,14 +41,18 @@ def get_user_by_company_name(db: Session, company_name: str):
     return result
 
 
-def get_user_by_email(db: Session, email: str):
-    return db.query(User).filter(User.email == email).first()
+def get_user_by_email(db: Session, email: str, load_roles: bool = False):
+    return user_query(db, load_roles).filter(User.email == email).first()
 
 
-def create_user_with_hashed_password(db: Session, user: UserCreate):
-    from app.auth import get_password_hash
+def create_user_with_hashed_password(
+    db: Session, user: UserCreate, hashed_password: Optional[str] = None
+):
+    # Async callers hash in the password pool and pass the result
+    if hashed_password is None:
+        from app.auth import get_password_hash
 
-    hashed_password = get_password_hash(user.password)
+        hashed_password = get_password_hash(user.password)
     db_user = User(
         id=str(uuid4()),
         email=user.email,
@@ -86,6 +107,8 @@ def delete_user(db: Session, user_id: str):
     if not db_user:
         return None
 
+    # Their orders go with them (cascade), so do the rollup rows
+    remove_customer_from_rollups(db, db_user.email)
     db.delete(db_user)
     db.commit()
     return {"message": "User deleted successfully", "user_id": user_id}
@@ -0,0 +1,159 @@
+"""
+Per-request cost of LoggingMiddleware: the old synchronous setup (two info
+lines rendered and written in the request path) vs the queue-backed
+pipeline from setup_logging() at a few sample rates.
+
+    python -m app.load_tests.bench_logging_overhead
+
+The middleware is called directly with ASGI messages around an app that
+answers immediately, so the numbers are the logging cost alone. Log files
+go to a temporary directory and stdout is discarded.
+"""
+
+import asyncio
+import contextlib
+import logging
+import os
+import sys
+import tempfile
+import time
+import uuid
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "../..")))
+
+import structlog
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.requests import Request
+
+from app.config import logging_config
+from app.middleware.logging_middleware import LoggingMiddleware
+
+REQUESTS = 20000
+ROUNDS = 3
+
+SCOPE = {
+    "type": "http",
+    "http_version": "1.1",
+    "method": "GET",
+    "scheme": "http",
+    "server": ("bench", 80),
+    "client": ("127.0.0.1", 50000),
+    "root_path": "",
+    "path": "/products/",
+    "raw_path": b"/products/",
+    "query_string": b"",
+    "headers": [(b"host", b"bench"), (b"user-agent", b"bench/1.0")],
+}
+
+
+class LegacyLoggingMiddleware:
+    """LoggingMiddleware before the queue and sampling"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        request_id = str(uuid.uuid4())
+        start_time = time.time()
+        client = scope.get("client")
+        method = scope["method"]
+        url = str(Request(scope).url)
+        legacy_logger.info(
+            "Request started",
+            request_id=request_id,
+            method=method,
+            url=url,
+            client_ip=client[0] if client else None,
+            user_agent=Headers(scope=scope).get("user-agent"),
+        )
+        scope.setdefault("state", {})["request_id"] = request_id
+        status_code = None
+
+        async def send_with_request_id(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                MutableHeaders(scope=message)["X-Request-ID"] = request_id
+            await send(message)
+
+        await self.app(scope, receive, send_with_request_id)
+        legacy_logger.info(
+            "Request completed",
+            request_id=request_id,
+            method=method,
+            url=url,
+            status_code=status_code,
+            duration=round(time.time() - start_time, 3),
+        )
+
+
+legacy_logger = None
+
+
+def configure_legacy(log_file):
+    """structlog rendering JSON and writing to the file in the caller"""
+    global legacy_logger
+    structlog.configure(
+        processors=[
+            structlog.processors.TimeStamper(fmt="iso"),
+            structlog.processors.add_log_level,
+            structlog.processors.JSONRenderer(),
+        ],
+        wrapper_class=structlog.make_filtering_bound_logger(logging.INFO),
+        logger_factory=structlog.WriteLoggerFactory(file=log_file),
+        cache_logger_on_first_use=False,
+    )
+    legacy_logger = structlog.get_logger("legacy")
+
+
+async def endpoint(scope, receive, send):
+    await send({"type": "http.response.start", "status": 200, "headers": []})
+    await send({"type": "http.response.body", "body": b"[]"})
+
+
+async def receive():
+    return {"type": "http.request", "body": b"", "more_body": False}
+
+
+async def send(message):
+    pass
+
+
+async def measure(middleware) -> float:
+    """Best µs per request over ROUNDS"""
+    best = float("inf")
+    for _ in range(ROUNDS):
+        start = time.perf_counter()
+        for _ in range(REQUESTS):
+            await middleware(dict(SCOPE), receive, send)
+        best = min(best, (time.perf_counter() - start) / REQUESTS * 1e6)
+    return best
+
+
+async def main():
+    baseline = await measure(endpoint)
+
+    with open("legacy.log", "w") as log_file:
+        configure_legacy(log_file)
+        legacy = await measure(LegacyLoggingMiddleware(endpoint)) - baseline
+
+    # The queue pipeline as the app runs it in production
+    logging_config.setup_logging("production")
+    results = {}
+    for sample_rate in (1.0, 0.1, 0.0):
+        middleware = LoggingMiddleware(endpoint, sample_rate=sample_rate)
+        results[sample_rate] = await measure(middleware) - baseline
+    logging_config._stop_listener()
+
+    print(f"{REQUESTS} requests, best of {ROUNDS}, overhead per request:", file=out)
+    print(f"{'legacy (sync)':>18}: {legacy:7.1f} µs", file=out)
+    for sample_rate, overhead in results.items():
+        print(f"{f'queue, sample {sample_rate}':>18}: {overhead:7.1f} µs", file=out)
+
+
+if __name__ == "__main__":
+    out = sys.stdout
+    with tempfile.TemporaryDirectory() as directory, open(os.devnull, "w") as devnull:
+        os.chdir(directory)
+        with contextlib.redirect_stdout(devnull):
+            asyncio.run(main())
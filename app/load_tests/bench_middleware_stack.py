@@ -0,0 +1,189 @@
+"""
+Throughput of /products/ through the middleware stack: BaseHTTPMiddleware
+versions vs the pure ASGI ones.
+
+    python -m app.load_tests.bench_middleware_stack
+
+Needs the Redis from REDIS_URL. Both stacks are mounted like in main.py
+(Prometheus -> Logging -> RateLimit) around the same /products/ endpoint;
+the limit is raised (GCRA, so a lease is one value) and the local tier
+leases large batches, so Redis round trips are rare and do not drown out
+the middleware cost. Requests go through httpx's ASGI transport,
+CONCURRENCY at a time.
+"""
+
+import asyncio
+import logging
+import os
+import sys
+import time
+import uuid
+from typing import Callable
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "../..")))
+
+import httpx
+import redis.asyncio
+import structlog
+from fastapi import FastAPI, Request, Response
+from starlette.middleware.base import BaseHTTPMiddleware
+
+from app.middleware import prometheus_middleware
+from app.middleware.logging_middleware import LoggingMiddleware
+from app.middleware.prometheus_middleware import (REQUEST_COUNTS,
+                                                  REQUEST_DURATION,
+                                                  PrometheusMiddleware)
+from app.middleware.rate_limit_middleware import RateLimitMiddleware
+from app.middleware.rate_limiter import GCRA, RateLimitConfig, RedisRateLimiter
+
+CONCURRENCY = 20
+REQUESTS = 5000
+ROUNDS = 3
+
+LIMITER_OPTIONS = {
+    "limits": {"default": RateLimitConfig(10**9, 60, algorithm=GCRA)},
+    "lease_size": 10**6,
+    "timeout": 10,
+}
+
+
+class LegacyLoggingMiddleware(BaseHTTPMiddleware):
+    async def dispatch(self, request: Request, call_next: Callable) -> Response:
+        request_id = str(uuid.uuid4())
+        start_time = time.time()
+        method = request.method
+        url = str(request.url)
+        headers = dict(request.headers)
+        logger.info(
+            "Request started",
+            request_id=request_id,
+            method=method,
+            url=url,
+            client_ip=request.client.host if request.client else None,
+            user_agent=headers.get("user-agent"),
+        )
+        request.state.request_id = request_id
+        response = await call_next(request)
+        logger.info(
+            "Request completed",
+            request_id=request_id,
+            method=method,
+            url=url,
+            status_code=response.status_code,
+            duration=round(time.time() - start_time, 3),
+        )
+        response.headers["X-Request-ID"] = request_id
+        return response
+
+
+class LegacyPrometheusMiddleware(BaseHTTPMiddleware):
+    async def dispatch(self, request: Request, call_next: Callable) -> Response:
+        method = request.method
+        path = request.url.path
+        prometheus_middleware.ACTIVE_REQUESTS.inc()
+        start_time = time.time()
+        request_size = int(request.headers.get("content-length", 0))
+        try:
+            response = await call_next(request)
+            duration = time.time() - start_time
+            response_size = int(response.headers.get("content-length", 0))
+            REQUEST_COUNTS.labels(
+                method=method, endpoint=path, status_code=response.status_code
+            ).inc()
+            REQUEST_DURATION.labels(method=method, endpoint=path).observe(duration)
+            prometheus_middleware.REQUEST_SIZE.labels(
+                method=method, endpoint=path
+            ).observe(request_size)
+            prometheus_middleware.RESPONSE_SIZE.labels(
+                method=method, endpoint=path
+            ).observe(response_size)
+            return response
+        finally:
+            prometheus_middleware.ACTIVE_REQUESTS.dec()
+
+
+class LegacyRateLimitMiddleware(BaseHTTPMiddleware):
+    def __init__(self, app, redis_connection, **limiter_options):
+        super().__init__(app)
+        self.rate_limiter = RedisRateLimiter(redis_connection, **limiter_options)
+
+    async def dispatch(self, request: Request, call_next):
+        rate_limit_response = await self.rate_limiter.check_rate_limit(request)
+        if rate_limit_response:
+            return rate_limit_response
+        response = await call_next(request)
+        if hasattr(request.state, "rate_limit_headers"):
+            response.headers.update(request.state.rate_limit_headers)
+        return response
+
+
+# Logging cost is the same for both stacks and not what is measured here
+structlog.configure(
+    wrapper_class=structlog.make_filtering_bound_logger(logging.WARNING)
+)
+logger = structlog.get_logger(__name__)
+
+PRODUCTS = [
+    {"id": i, "description": f"Product {i}", "category": "Rind"} for i in range(50)
+]
+
+
+def create_app(redis_connection, stack) -> FastAPI:
+    rate_limit, logging_middleware, prometheus = stack
+    app = FastAPI()
+    app.add_middleware(rate_limit, redis_connection=redis_connection, **LIMITER_OPTIONS)
+    app.add_middleware(logging_middleware)
+    app.add_middleware(prometheus)
+
+    @app.get("/products/")
+    async def products():
+        return PRODUCTS
+
+    return app
+
+
+async def run(name: str, stack) -> float:
+    redis_connection = redis.asyncio.from_url(
+        os.getenv("REDIS_URL", "redis://localhost:6379")
+    )
+    app = create_app(redis_connection, stack)
+    semaphore = asyncio.Semaphore(CONCURRENCY)
+
+    async with httpx.AsyncClient(
+        transport=httpx.ASGITransport(app=app), base_url="http://bench"
+    ) as client:
+
+        async def request():
+            async with semaphore:
+                response = await client.get("/products/")
+                assert response.status_code == 200, response.status_code
+                assert "X-Request-ID" in response.headers
+                assert "X-RateLimit-Limit" in response.headers
+
+        await request()  # warm up (connection, script load, first lease)
+        best = 0.0
+        for _ in range(ROUNDS):
+            start = time.perf_counter()
+            await asyncio.gather(*(request() for _ in range(REQUESTS)))
+            best = max(best, REQUESTS / (time.perf_counter() - start))
+
+    await redis_connection.flushdb()
+    await redis_connection.aclose()
+    print(f"{name:>8}: {best:8.1f} req/s (best of {ROUNDS})")
+    return best
+
+
+async def main():
+    print(f"{REQUESTS} requests to /products/, {CONCURRENCY} concurrent")
+    legacy = await run(
+        "legacy",
+        (LegacyRateLimitMiddleware, LegacyLoggingMiddleware, LegacyPrometheusMiddleware),
+    )
+    asgi = await run(
+        "asgi", (RateLimitMiddleware, LoggingMiddleware, PrometheusMiddleware)
+    )
+    print(f"speedup: {asgi / legacy:.2f}x")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,171 @@
+"""
+Concurrent GET /orders/my-orders: the old handler (sync Session inside the
+async route) vs the AsyncSession path.
+
+    python -m app.load_tests.bench_my_orders
+
+CONCURRENCY clients send REQUESTS requests in total through the ASGI app,
+against a throwaway SQLite file with ORDERS orders for one customer. Local
+SQLite answers in microseconds, so DB_LATENCY_MS (default 2) adds a
+round trip to every statement to stand in for a networked Postgres. The
+delay runs on whichever thread executes the statement: the event loop for
+the sync session, the driver thread for aiosqlite.
+"""
+
+import asyncio
+import os
+import sys
+import tempfile
+import time
+from types import SimpleNamespace
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "../..")))
+
+import httpx
+from fastapi import Depends, FastAPI, Query
+from sqlalchemy import create_engine, event
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.orm import Session, sessionmaker
+
+from app.auth.core import get_current_user
+from app.config.database import get_async_db
+from app.crud import order as order_crud
+from app.models.base import Base
+from app.models.order import Order, OrderItem, OrderState
+from app.models.product import Product, ProductCategory
+from app.models.user import User
+from app.routers import order as order_router
+
+CONCURRENCY = 20
+REQUESTS = 400
+ORDERS = 200
+DB_LATENCY_MS = float(os.getenv("DB_LATENCY_MS", 2))
+EMAIL = "bench@example.com"
+
+
+def add_latency(engine):
+    @event.listens_for(engine, "connect")
+    def on_connect(dbapi_connection, connection_record):
+        # aiosqlite's adapter wraps the sqlite3 connection
+        raw = getattr(dbapi_connection, "driver_connection", dbapi_connection)
+        raw = getattr(raw, "_conn", raw)
+        raw.set_trace_callback(lambda sql: time.sleep(DB_LATENCY_MS / 1000))
+
+
+def seed(session_factory):
+    db = session_factory()
+    products = [
+        Product(description=f"Produkt {i}", category=ProductCategory.BEEF)
+        for i in range(5)
+    ]
+    user = User(email=EMAIL, company_name="Bench", hashed_password="x")
+    db.add_all(products + [user])
+    db.flush()
+    for i in range(ORDERS):
+        db.add(
+            Order(
+                user_email=EMAIL,
+                state=OrderState.ORDER_PLACED,
+                order_items=[
+                    OrderItem(product_id=products[j].id, quantity=i + j + 1)
+                    for j in range(3)
+                ],
+            )
+        )
+    db.commit()
+    db.close()
+
+
+def create_app(sync_session_factory, async_session_factory):
+    app = FastAPI()
+    app.include_router(order_router.router)
+
+    async def override_get_async_db():
+        async with async_session_factory() as db:
+            yield db
+
+    def get_sync_db():
+        db = sync_session_factory()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    app.dependency_overrides[get_async_db] = override_get_async_db
+    app.dependency_overrides[get_current_user] = lambda: SimpleNamespace(email=EMAIL)
+
+    # The handler as it was before the AsyncSession port
+    @app.get("/legacy/my-orders")
+    async def legacy_my_orders(
+        limit: int = Query(10, ge=1, le=100), db: Session = Depends(get_sync_db)
+    ):
+        orders = order_crud.get_orders_by_user_email(
+            db=db, user_email=EMAIL, skip=0, limit=limit
+        )
+        return order_router.order_list_response(orders, limit)
+
+    return app
+
+
+async def run(name: str, client: httpx.AsyncClient, path: str) -> None:
+    remaining = iter(range(REQUESTS))
+    latencies = []
+
+    async def worker():
+        for _ in remaining:
+            start = time.perf_counter()
+            response = await client.get(path, params={"limit": 10})
+            latencies.append(time.perf_counter() - start)
+            assert response.status_code == 200, response.text
+
+    await client.get(path)  # warm up (opens the pool connections)
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(CONCURRENCY)))
+    elapsed = time.perf_counter() - start
+
+    latencies.sort()
+    p50 = latencies[len(latencies) // 2]
+    p95 = latencies[int(len(latencies) * 0.95)]
+    print(
+        f"{name:>12}: {REQUESTS / elapsed:7.1f} req/s, "
+        f"p50 {p50 * 1000:6.1f} ms, p95 {p95 * 1000:6.1f} ms"
+    )
+
+
+async def main():
+    path = os.path.join(tempfile.mkdtemp(), "bench_orders.db")
+    # A connection per client, like the Postgres pools (20 + 30 overflow)
+    sync_engine = create_engine(
+        f"sqlite:///{path}",
+        connect_args={"check_same_thread": False},
+        pool_size=CONCURRENCY,
+    )
+    async_engine = create_async_engine(
+        f"sqlite+aiosqlite:///{path}", pool_size=CONCURRENCY
+    )
+    Base.metadata.create_all(bind=sync_engine)
+    seed(sessionmaker(bind=sync_engine))
+    add_latency(sync_engine)
+    add_latency(async_engine.sync_engine)
+
+    app = create_app(
+        sessionmaker(bind=sync_engine, expire_on_commit=False),
+        async_sessionmaker(async_engine, expire_on_commit=False),
+    )
+    transport = httpx.ASGITransport(app=app)
+    print(
+        f"{REQUESTS} requests, {CONCURRENCY} concurrent, {ORDERS} orders, "
+        f"{DB_LATENCY_MS:g} ms per statement"
+    )
+    async with httpx.AsyncClient(
+        transport=transport, base_url="http://bench"
+    ) as client:
+        await run("sync session", client, "/legacy/my-orders")
+        await run("async session", client, "/orders/my-orders")
+
+    await async_engine.dispose()
+    sync_engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,151 @@
+"""
+Micro-benchmark for the order list serialization.
+
+    python -m app.load_tests.bench_order_serialization
+
+"legacy" rebuilds the hand-written dicts the order router used to return and
+lets FastAPI validate them against a dict-typed response model, dump them to
+JSON-compatible python and json.dumps the result (what JSONResponse does).
+"current" is `serialize_orders`, which validates the ORM rows once and dumps
+bytes directly.
+"""
+
+import json
+import time
+from datetime import datetime, timedelta
+from typing import List, Optional
+
+from pydantic import BaseModel, ConfigDict, TypeAdapter
+
+from app.models.order import Order, OrderItem, OrderState
+from app.models.product import Product, ProductCategory
+from app.models.user import User
+from app.schemas.order import serialize_orders
+
+ORDERS_PER_PAGE = 100
+ITEMS_PER_ORDER = 4
+ROUNDS = 50
+
+
+class LegacyOrderItemResponse(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
+    product_id: int
+    quantity: int
+    id: int
+    product: Optional[dict] = None
+
+
+class LegacyOrderResponse(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
+    id: int
+    user_email: str
+    order_date: datetime
+    state: OrderState
+    order_items: List[LegacyOrderItemResponse] = []
+    user: Optional[dict] = None
+
+
+legacy_adapter = TypeAdapter(List[LegacyOrderResponse])
+
+
+def build_orders(count: int) -> List[Order]:
+    user = User(email="bench@example.com", company_name="Bench GmbH")
+    products = [
+        Product(
+            id=i,
+            description=f"Product {i}",
+            image_link=f"/static/product_images/beef/{i}.png",
+            category=ProductCategory.BEEF,
+        )
+        for i in range(ITEMS_PER_ORDER)
+    ]
+    orders = []
+    for order_id in range(count):
+        order = Order(
+            id=order_id,
+            user_email=user.email,
+            order_date=datetime(2025, 1, 1) + timedelta(minutes=order_id),
+            state=OrderState.EMAIL_SENT,
+            user=user,
+        )
+        order.order_items = [
+            OrderItem(
+                id=order_id * ITEMS_PER_ORDER + i,
+                product_id=product.id,
+                quantity=i + 1,
+                product=product,
+            )
+            for i, product in enumerate(products)
+        ]
+        orders.append(order)
+    return orders
+
+
+def legacy_serialize(orders: List[Order]) -> bytes:
+    response_orders = []
+    for order in orders:
+        response_orders.append(
+            {
+                "id": order.id,
+                "user_email": order.user_email,
+                "order_date": order.order_date,
+                "state": order.state,
+                "order_items": [
+                    {
+                        "id": item.id,
+                        "product_id": item.product_id,
+                        "quantity": item.quantity,
+                        "product": (
+                            {
+                                "id": item.product.id,
+                                "description": item.product.description,
+                                "image_link": item.product.image_link,
+                                "category": item.product.category,
+                            }
+                            if item.product
+                            else None
+                        ),
+                    }
+                    for item in order.order_items
+                ],
+                "user": (
+                    {"email": order.user.email, "company_name": order.user.company_name}
+                    if order.user
+                    else None
+                ),
+            }
+        )
+    validated = legacy_adapter.validate_python(response_orders)
+    content = legacy_adapter.dump_python(validated, mode="json")
+    return json.dumps(
+        content, ensure_ascii=False, allow_nan=False, indent=None, separators=(",", ":")
+    ).encode("utf-8")
+
+
+def measure(name: str, serialize, orders: List[Order]) -> float:
+    serialize(orders)  # warm up
+    start = time.perf_counter()
+    for _ in range(ROUNDS):
+        serialize(orders)
+    elapsed = time.perf_counter() - start
+    per_order_us = elapsed / (ROUNDS * len(orders)) * 1_000_000
+    print(f"{name:>8}: {per_order_us:8.2f} µs/order")
+    return per_order_us
+
+
+def main():
+    orders = build_orders(ORDERS_PER_PAGE)
+    assert json.loads(legacy_serialize(orders)) == json.loads(serialize_orders(orders))
+
+    print(
+        f"{ORDERS_PER_PAGE} orders x {ITEMS_PER_ORDER} items, {ROUNDS} rounds per run"
+    )
+    legacy = measure("legacy", legacy_serialize, orders)
+    current = measure("current", serialize_orders, orders)
+    print(f"speedup: {legacy / current:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+"""
+Event loop stalls during a burst of logins: bcrypt on the event loop (as
+the auth routes did) vs the password hashing pool.
+
+    python -m app.load_tests.bench_password_hashing
+
+LOGINS password checks start at once while a heartbeat task sleeps TICK
+seconds in a loop; how late it wakes up is how long every other request
+on the worker would have waited. BCRYPT_ROUNDS defaults to 10 here to
+keep the run short (set it to compare other costs).
+"""
+
+import asyncio
+import os
+import sys
+import time
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "../..")))
+
+os.environ.setdefault("BCRYPT_ROUNDS", "10")
+
+from app.auth.core import (BCRYPT_ROUNDS, PASSWORD_HASH_WORKERS, pwd_context,
+                           verify_password_async)
+
+LOGINS = 20
+TICK = 0.005
+PASSWORD = "correct horse battery staple"
+
+
+async def heartbeat(stop: asyncio.Event, lags: list):
+    while not stop.is_set():
+        start = time.perf_counter()
+        await asyncio.sleep(TICK)
+        lags.append(time.perf_counter() - start - TICK)
+
+
+async def run(name: str, verify) -> None:
+    stop = asyncio.Event()
+    lags = []
+    ticker = asyncio.create_task(heartbeat(stop, lags))
+    await asyncio.sleep(TICK * 2)
+
+    start = time.perf_counter()
+    results = await asyncio.gather(*(verify() for _ in range(LOGINS)))
+    elapsed = time.perf_counter() - start
+    assert all(results)
+
+    stop.set()
+    await ticker
+    print(
+        f"{name:>7}: {LOGINS / elapsed:6.1f} logins/s, {len(lags):4d} heartbeats, "
+        f"loop lag max {max(lags) * 1000:7.1f} ms"
+    )
+
+
+async def main():
+    hashed = pwd_context.hash(PASSWORD)
+
+    async def inline():
+        return pwd_context.verify(PASSWORD, hashed)
+
+    async def pooled():
+        valid, _ = await verify_password_async(PASSWORD, hashed)
+        return valid
+
+    print(
+        f"{LOGINS} concurrent logins, bcrypt cost {BCRYPT_ROUNDS}, "
+        f"{PASSWORD_HASH_WORKERS} hashing threads"
+    )
+    await pooled()  # warm up (starts the hashing threads)
+    await run("pool", pooled)
+    await run("inline", inline)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,182 @@
+"""
+Latency of the rate limited app under concurrent load: blocking vs async Redis.
+
+    python -m app.load_tests.bench_rate_limit_latency
+
+Needs the Redis from REDIS_URL. Redis traffic goes through a local proxy that
+delays every command by REDIS_DELAY_MS, standing in for a slow or remote
+Redis. "blocking" is the previous behaviour (synchronous client called from
+the async middleware), "async" the redis.asyncio limiter, "async+timeout" the
+same with a RATE_LIMIT_TIMEOUT below the Redis delay (fail-open).
+"""
+
+import asyncio
+import os
+import secrets
+import statistics
+import sys
+import threading
+import time
+from urllib.parse import urlparse
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "../..")))
+
+import httpx
+import redis
+import redis.asyncio
+from fastapi import FastAPI
+
+from app.middleware import rate_limit_middleware
+from app.middleware.rate_limiter import (
+    SLIDING_WINDOW,
+    RateLimitConfig,
+    RedisRateLimiter,
+)
+
+REDIS_DELAY_MS = int(os.getenv("REDIS_DELAY_MS", 20))
+CONCURRENCY = 50
+REQUESTS = 500
+
+redis_url = urlparse(os.getenv("REDIS_URL", "redis://localhost:6379"))
+
+
+class BlockingRateLimiter(RedisRateLimiter):
+    """Sliding window check through the synchronous client: the event loop
+    stalls for the whole round trip"""
+
+    async def _is_rate_limited(
+        self, key: str, config: RateLimitConfig, current_time: float, cost: int = 1
+    ):
+        now_ms = int(current_time * 1000)
+        granted, current_count, reset_ms, retry_ms = self._scripts[SLIDING_WINDOW](
+            keys=[key],
+            args=[
+                now_ms,
+                config.window * 1000,
+                config.requests,
+                cost,
+                f"{now_ms}:{secrets.token_hex(4)}",
+            ],
+        )
+        return {
+            "limited": not granted,
+            "granted": granted,
+            "retry_at": current_time + retry_ms / 1000,
+            "current_count": current_count,
+            "limit": config.requests,
+            "window": config.window,
+            "reset_time": reset_ms / 1000,
+            "retry_after": 0,
+        }
+
+
+def start_delay_proxy() -> int:
+    """Forward to Redis, holding back each client write by REDIS_DELAY_MS.
+    Runs on its own loop so a blocked app loop cannot stall it."""
+
+    async def pipe(reader, writer, delay):
+        try:
+            while data := await reader.read(65536):
+                if delay:
+                    await asyncio.sleep(delay)
+                writer.write(data)
+                await writer.drain()
+        finally:
+            writer.close()
+
+    async def handle(client_reader, client_writer):
+        upstream_reader, upstream_writer = await asyncio.open_connection(
+            redis_url.hostname, redis_url.port or 6379
+        )
+        await asyncio.gather(
+            pipe(client_reader, upstream_writer, REDIS_DELAY_MS / 1000),
+            pipe(upstream_reader, client_writer, 0),
+            return_exceptions=True,
+        )
+
+    loop = asyncio.new_event_loop()
+    server = loop.run_until_complete(asyncio.start_server(handle, "127.0.0.1", 0))
+    threading.Thread(target=loop.run_forever, daemon=True).start()
+    return server.sockets[0].getsockname()[1]
+
+
+def create_app(rate_limiter: RedisRateLimiter) -> FastAPI:
+    class BenchRateLimitMiddleware(rate_limit_middleware.RateLimitMiddleware):
+        def __init__(self, app):
+            super().__init__(app, rate_limiter.redis)
+            self.rate_limiter = rate_limiter
+
+    app = FastAPI()
+    app.add_middleware(BenchRateLimitMiddleware)
+
+    @app.get("/products/")
+    async def products():
+        return {"message": "ok"}
+
+    return app
+
+
+async def run(name: str, rate_limiter: RedisRateLimiter):
+    app = create_app(rate_limiter)
+    semaphore = asyncio.Semaphore(CONCURRENCY)
+    latencies = []
+    statuses = []
+
+    async with httpx.AsyncClient(
+        transport=httpx.ASGITransport(app=app), base_url="http://bench"
+    ) as client:
+
+        async def request(i: int):
+            async with semaphore:
+                start = time.perf_counter()
+                # One client ip per request: nothing gets limited
+                response = await client.get(
+                    "/products/", headers={"X-Forwarded-For": f"10.0.{i // 250}.{i}"}
+                )
+                latencies.append(time.perf_counter() - start)
+                statuses.append(response.status_code)
+
+        await request(-1)  # warm up (connection, script load)
+        latencies.clear()
+        statuses.clear()
+
+        start = time.perf_counter()
+        await asyncio.gather(*(request(i) for i in range(REQUESTS)))
+        elapsed = time.perf_counter() - start
+
+    assert statuses.count(200) == REQUESTS, statuses
+    latencies.sort()
+    print(
+        f"{name:>14}: p50 {statistics.median(latencies) * 1000:7.1f} ms, "
+        f"p99 {latencies[int(len(latencies) * 0.99)] * 1000:7.1f} ms, "
+        f"{REQUESTS / elapsed:7.1f} req/s"
+    )
+
+
+async def main(port: int):
+    sync_conn = redis.Redis(host="127.0.0.1", port=port, db=redis_url.path[1:] or 0)
+    print(
+        f"{REQUESTS} requests, {CONCURRENCY} concurrent, "
+        f"Redis delayed by {REDIS_DELAY_MS} ms"
+    )
+
+    # Without the local tier: every request is a Redis check
+    await run("blocking", BlockingRateLimiter(sync_conn, timeout=10, local=False))
+    for name, timeout in [("async", 10), ("async+timeout", REDIS_DELAY_MS / 2000)]:
+        async_conn = redis.asyncio.Redis(
+            host="127.0.0.1",
+            port=port,
+            db=redis_url.path[1:] or 0,
+            max_connections=CONCURRENCY,
+        )
+        rate_limiter = RedisRateLimiter(
+            async_conn, timeout=timeout, fail_open=True, local=False
+        )
+        await run(name, rate_limiter)
+        await async_conn.aclose()
+
+    sync_conn.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main(start_delay_proxy()))
@@ -0,0 +1,142 @@
+"""
+Redis round trips and latency per request with the local rate limit tier.
+
+    python -m app.load_tests.bench_rate_limit_local
+
+Needs the Redis from REDIS_URL, reached through the delaying proxy of
+bench_rate_limit_latency (REDIS_DELAY_MS). Mixed traffic from 20 clients:
+product pages, static images, health checks and one client hammering
+/products/ past its limit. "redis only" checks every request in Redis,
+"exempt" skips RATE_LIMIT_EXEMPT_PATHS, "exempt+local" also uses the
+per-worker LocalRateLimiter.
+"""
+
+import asyncio
+import os
+import random
+import statistics
+import sys
+import time
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "../..")))
+
+import httpx
+import redis.asyncio
+from fastapi import FastAPI
+
+from app.load_tests.bench_rate_limit_latency import (
+    REDIS_DELAY_MS,
+    redis_url,
+    start_delay_proxy,
+)
+from app.load_tests.bench_rate_limiter import CountingConnection
+from app.middleware import rate_limit_middleware
+
+CONCURRENCY = 50
+REQUESTS = 2000
+CLIENTS = 20
+
+
+def build_traffic():
+    rng = random.Random(42)
+    traffic = []
+    for _ in range(REQUESTS):
+        roll = rng.random()
+        ip = f"10.0.0.{rng.randrange(CLIENTS)}"
+        if roll < 0.5:
+            traffic.append((f"/products/{rng.randrange(100)}", ip))
+        elif roll < 0.75:
+            traffic.append((f"/static/product_images/{rng.randrange(100)}.png", ip))
+        elif roll < 0.8:
+            traffic.append(("/health", ip))
+        else:
+            traffic.append(("/products/", "10.0.1.1"))  # over its limit
+    return traffic
+
+
+def create_app(redis_connection, **limiter_options) -> FastAPI:
+    app = FastAPI()
+    app.add_middleware(
+        rate_limit_middleware.RateLimitMiddleware,
+        redis_connection=redis_connection,
+        timeout=10,
+        **limiter_options,
+    )
+
+    @app.get("/products/")
+    async def products():
+        return []
+
+    @app.get("/products/{product_id}")
+    async def product(product_id: int):
+        return {"id": product_id}
+
+    @app.get("/static/{path:path}")
+    async def static(path: str):
+        return {"path": path}
+
+    @app.get("/health")
+    async def health():
+        return {"status": "healthy"}
+
+    return app
+
+
+async def run(name: str, port: int, traffic, **limiter_options):
+    async_conn = redis.asyncio.Redis(
+        connection_pool=redis.asyncio.ConnectionPool(
+            host="127.0.0.1",
+            port=port,
+            db=int(redis_url.path[1:] or 0),
+            max_connections=CONCURRENCY,
+            connection_class=CountingConnection,
+        )
+    )
+    await async_conn.flushdb()
+    app = create_app(async_conn, **limiter_options)
+    semaphore = asyncio.Semaphore(CONCURRENCY)
+    latencies = []
+    statuses = []
+
+    async with httpx.AsyncClient(
+        transport=httpx.ASGITransport(app=app), base_url="http://bench"
+    ) as client:
+
+        async def request(path: str, ip: str):
+            async with semaphore:
+                start = time.perf_counter()
+                response = await client.get(path, headers={"X-Forwarded-For": ip})
+                latencies.append(time.perf_counter() - start)
+                statuses.append(response.status_code)
+
+        round_trips_before = CountingConnection.round_trips
+        start = time.perf_counter()
+        await asyncio.gather(*(request(path, ip) for path, ip in traffic))
+        elapsed = time.perf_counter() - start
+        round_trips = CountingConnection.round_trips - round_trips_before
+
+    await async_conn.flushdb()
+    await async_conn.aclose()
+
+    latencies.sort()
+    print(
+        f"{name:>12}: {round_trips / len(traffic):4.2f} redis round trips/req, "
+        f"p50 {statistics.median(latencies) * 1000:6.1f} ms, "
+        f"p99 {latencies[int(len(latencies) * 0.99)] * 1000:6.1f} ms, "
+        f"{len(traffic) / elapsed:6.1f} req/s, {statuses.count(429)} limited"
+    )
+
+
+async def main(port: int):
+    traffic = build_traffic()
+    print(
+        f"{REQUESTS} requests, {CONCURRENCY} concurrent, "
+        f"Redis delayed by {REDIS_DELAY_MS} ms"
+    )
+    await run("redis only", port, traffic, exempt_paths=(), local=False)
+    await run("exempt", port, traffic, local=False)
+    await run("exempt+local", port, traffic)
+
+
+if __name__ == "__main__":
+    asyncio.run(main(start_delay_proxy()))
@@ -0,0 +1,154 @@
+"""
+Compare the Lua sliding window limiter with the previous pipeline version.
+
+    python -m app.load_tests.bench_rate_limiter
+
+Needs the Redis from REDIS_URL (flushes its current db). It replays the
+scenario of test_rate_limit.py through the middleware: the default
+/products/ limit (200 per 60s) is used up and then hammered with rejected
+requests. Reported per limiter: mean latency per request, Redis round
+trips per request and the size of the client's sorted set afterwards.
+"""
+
+import os
+import sys
+import time
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "../..")))
+
+import redis
+import redis.asyncio
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.middleware import rate_limit_middleware
+from app.middleware.rate_limiter import RateLimitConfig, RedisRateLimiter
+
+ALLOWED_REQUESTS = 200
+REJECTED_REQUESTS = 1000
+
+
+class CountingConnection(redis.asyncio.Connection):
+    round_trips = 0
+
+    async def send_packed_command(self, command, check_health=True):
+        CountingConnection.round_trips += 1
+        await super().send_packed_command(command, check_health)
+
+
+redis_url = os.getenv("REDIS_URL", "redis://localhost:6379")
+redis_conn = redis.from_url(redis_url, decode_responses=True)
+
+
+class PipelineRateLimiter(RedisRateLimiter):
+    """The limiter before the Lua script: 4-command pipeline plus a zrange
+    round trip once limited, adding every request to the set"""
+
+    async def _is_rate_limited(
+        self, key: str, config: RateLimitConfig, current_time: float, cost: int = 1
+    ):
+        pipeline = self.redis.pipeline()
+        pipeline.zremrangebyscore(key, 0, current_time - config.window)
+        pipeline.zcard(key)
+        pipeline.zadd(key, {str(current_time): current_time})
+        pipeline.expire(key, config.window + 60)
+        current_count = (await pipeline.execute())[1]
+
+        if current_count >= config.requests:
+            oldest_requests = await self.redis.zrange(key, 0, 0, withscores=True)
+            if oldest_requests:
+                reset_time = oldest_requests[0][1] + config.window
+            else:
+                reset_time = current_time + config.window
+            return {
+                "limited": True,
+                "granted": 0,
+                "retry_at": reset_time,
+                "current_count": current_count + 1,
+                "limit": config.requests,
+                "window": config.window,
+                "reset_time": reset_time,
+                "retry_after": int(reset_time - current_time),
+            }
+
+        return {
+            "limited": False,
+            "granted": 1,
+            "retry_at": current_time,
+            "current_count": current_count + 1,
+            "limit": config.requests,
+            "window": config.window,
+            "reset_time": current_time + config.window,
+            "retry_after": 0,
+        }
+
+
+def create_app(limiter_class):
+    class BenchRateLimitMiddleware(rate_limit_middleware.RateLimitMiddleware):
+        def __init__(self, app, redis_connection):
+            super().__init__(app, redis_connection)
+            # Without the local tier: every request is a Redis check
+            self.rate_limiter = limiter_class(redis_connection, local=False)
+
+    # A fresh pool per app: async connections are bound to the loop of the
+    # TestClient that opened them
+    async_redis_conn = redis.asyncio.Redis(
+        connection_pool=redis.asyncio.ConnectionPool.from_url(
+            redis_url, connection_class=CountingConnection
+        )
+    )
+    app = FastAPI()
+    app.add_middleware(BenchRateLimitMiddleware, redis_connection=async_redis_conn)
+
+    @app.get("/products/")
+    def products():
+        return {"message": "ok"}
+
+    return app
+
+
+def run(name: str, limiter_class):
+    redis_conn.flushdb()
+    with TestClient(create_app(limiter_class)) as client:
+        measure(name, client)
+
+
+def measure(name: str, client: TestClient):
+    client.get("/products/")  # warm up (script load, connection)
+    redis_conn.flushdb()
+
+    round_trips_before = CountingConnection.round_trips
+    start = time.perf_counter()
+    statuses = [client.get("/products/").status_code for _ in range(ALLOWED_REQUESTS)]
+    allowed_elapsed = time.perf_counter() - start
+
+    start = time.perf_counter()
+    statuses += [
+        client.get("/products/").status_code for _ in range(REJECTED_REQUESTS)
+    ]
+    rejected_elapsed = time.perf_counter() - start
+    round_trips = CountingConnection.round_trips - round_trips_before
+
+    assert statuses.count(200) == ALLOWED_REQUESTS, statuses.count(200)
+    set_size = max(redis_conn.zcard(key) for key in redis_conn.keys("rate_limit:*"))
+
+    print(
+        f"{name:>9}: allowed {allowed_elapsed / ALLOWED_REQUESTS * 1000:6.3f} ms/req, "
+        f"rejected {rejected_elapsed / REJECTED_REQUESTS * 1000:6.3f} ms/req, "
+        f"{round_trips / len(statuses):4.2f} redis round trips/req, "
+        f"sorted set size {set_size}"
+    )
+
+
+def main():
+    print(
+        f"{ALLOWED_REQUESTS} allowed + {REJECTED_REQUESTS} rejected requests "
+        "on /products/"
+    )
+    run("pipeline", PipelineRateLimiter)
+    run("lua", RedisRateLimiter)
+    redis_conn.flushdb()
+
+
+if __name__ == "__main__":
+    main()
@@ -10,11 +10,12 @@ import time
 
 import pytest
 import redis
+import redis.asyncio
 from fastapi import FastAPI
 from fastapi.testclient import TestClient
 
 from app.middleware.rate_limit_middleware import RateLimitMiddleware
-from app.middleware.rate_limiter import RateLimitConfig, RedisRateLimiter
+from app.middleware.rate_limiter import GCRA, RateLimitConfig, RedisRateLimiter
 
 """
     Test strategy:
@@ -39,25 +40,41 @@ def clear_redis():
 
 
 # Testing the endpoints
-def create_test_app():
+def create_test_app(redis_connection, **limiter_options):
     app = FastAPI()
-    app.add_middleware(RateLimitMiddleware, redis_connection=redis_conn)
+    app.add_middleware(
+        RateLimitMiddleware, redis_connection=redis_connection, **limiter_options
+    )
 
     @app.get("/products/")
     def products():
         return {"message": "ok"}
 
+    @app.get("/products/{product_id}")
+    def product(product_id: int):
+        return {"id": product_id}
+
     @app.post("/auth/login")
     def login():
         return {"message": "logged in"}
 
+    @app.get("/health")
+    def health():
+        return {"status": "healthy"}
+
     return app
 
 
-client = TestClient(create_test_app())
+@pytest.fixture
+def client():
+    # A fresh limiter (and its local tier) per test; the async connection is
+    # bound to the loop of the TestClient that opens it
+    async_redis_conn = redis.asyncio.Redis(host="localhost", port=6379, db=0)
+    with TestClient(create_test_app(async_redis_conn, timeout=1)) as client:
+        yield client
 
 
-def test_products_rate_limit():
+def test_products_rate_limit(client):
     for i in range(200):
         res = client.get("/products/")
         assert res.status_code == 200, f"Failed at request {i+1}"
@@ -66,7 +83,72 @@ def test_products_rate_limit():
     assert res.status_code == 429
 
 
-def test_auth_login_rate_limit():
+def test_rejected_requests_do_not_grow_window(client):
+    for _ in range(250):
+        client.get("/products/")
+
+    (key,) = redis_conn.keys("rate_limit:*")
+    assert redis_conn.zcard(key) == 200
+
+
+def test_keys_use_route_template(client):
+    for product_id in range(5):
+        client.get(f"/products/{product_id}")
+
+    (key,) = redis_conn.keys("rate_limit:*")
+    assert ":/products/{product_id}:" in key
+
+
+def test_local_tier_leases_tokens(client):
+    for i in range(25):
+        res = client.get("/products/")
+        assert res.status_code == 200, f"Failed at request {i+1}"
+        assert res.headers["X-RateLimit-Remaining"] == str(200 - i - 1)
+
+    # Three leases of 10 tokens, the rest of the last one is still local
+    (key,) = redis_conn.keys("rate_limit:*")
+    assert redis_conn.zcard(key) == 30
+
+
+def test_exempt_paths_skip_redis(client):
+    for _ in range(5):
+        assert client.get("/health").status_code == 200
+        client.get("/static/product_images/beef/1.png")
+
+    assert redis_conn.keys("rate_limit:*") == []
+
+
+def test_gcra_keeps_one_value_per_key():
+    limits = {"default": RateLimitConfig(5, 60, algorithm=GCRA)}
+    gcra_redis = redis.asyncio.Redis(host="localhost", port=6379, db=0)
+    app = create_test_app(gcra_redis, limits=limits, fail_open=False, timeout=1)
+
+    with TestClient(app) as gcra_client:
+        for i in range(5):
+            res = gcra_client.get(f"/products/{i}")
+            assert res.status_code == 200, f"Failed at request {i+1}"
+
+        res = gcra_client.get("/products/5")
+        assert res.status_code == 429
+        # One request is let through every window / limit = 12s
+        assert 1 <= int(res.headers["Retry-After"]) <= 12
+
+    (key,) = redis_conn.keys("rate_limit:*")
+    assert redis_conn.type(key) == "string"
+
+
+@pytest.mark.parametrize("fail_open, status_code", [(True, 200), (False, 503)])
+def test_unreachable_redis_policy(fail_open, status_code):
+    unreachable = redis.asyncio.Redis(host="localhost", port=1)
+    app = create_test_app(unreachable, fail_open=fail_open)
+
+    with TestClient(app) as down_client:
+        res = down_client.get("/products/")
+
+    assert res.status_code == status_code
+
+
+def test_auth_login_rate_limit(client):
     for i in range(10):
         res = client.post("/auth/login")
         assert res.status_code == 200, f"Failed at login request {i+1}"
@@ -75,7 +157,7 @@ def test_auth_login_rate_limit():
     assert res.status_code == 429
 
 
-def test_default_rate_limit_resets_after_ttl():
+def test_default_rate_limit_resets_after_ttl(client):
     for i in range(200):
         res = client.get("/products/")
         assert res.status_code == 200, f"Failed at request: {i+1}"
@@ -89,7 +171,7 @@ def test_default_rate_limit_resets_after_ttl():
     assert res.status_code == 200
 
 
-def test_auth_login_rate_limit_resets_after_ttl():
+def test_auth_login_rate_limit_resets_after_ttl(client):
     for i in range(10):
         res = client.post("/auth/login")
         assert res.status_code == 200, f"Failed at login request {i+1}"
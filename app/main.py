@@ -7,13 +7,20 @@ from fastapi.middleware.cors import CORSMiddleware
 from fastapi.middleware.gzip import GZipMiddleware
 from fastapi.responses import JSONResponse
 from fastapi.staticfiles import StaticFiles
-from prometheus_client import CONTENT_TYPE_LATEST, generate_latest
+from prometheus_client import CONTENT_TYPE_LATEST
 from starlette.middleware.trustedhost import TrustedHostMiddleware
 
-from app.config.database import Base, engine, init_database
+from app.config.database import Base, async_engine, engine, init_database
 from app.config.init_products import initialize_products
+from app.config.init_sales_rollups import initialize_sales_rollups
 from app.config.logging_config import get_logger, setup_logging
-from app.config.redis_config import get_redis_connection
+from app.config.prometheus_config import generate_metrics, mark_process_dead
+from app.config.read_replicas import read_replicas
+from app.config.redis_config import (
+    get_async_redis_connection,
+    get_redis_connection,
+)
+from app.core.pagination import NEXT_CURSOR_HEADER
 from app.middleware.logging_middleware import LoggingMiddleware
 from app.middleware.prometheus_middleware import PrometheusMiddleware
 from app.middleware.rate_limit_middleware import RateLimitMiddleware
@@ -50,8 +57,16 @@ async def lifespan(app: FastAPI):
         # print("Products initialized")
     except Exception as e:
         print(f"Failed to initialize products!")
+    try:
+        initialize_sales_rollups()
+    except Exception as e:
+        print(f"Failed to backfill sales rollups: {e}")
     #populate_dummy_data() #for testing purposes
     yield
+    await get_async_redis_connection().aclose()
+    await async_engine.dispose()
+    await read_replicas.dispose()
+    mark_process_dead()
     print("Application shutdown complete!")
 
 
@@ -59,8 +74,9 @@ app = FastAPI(title="Grunland API", lifespan=lifespan)
 
 app.mount("/static", StaticFiles(directory="app/static"), name="static")
 
-redis_conn = get_redis_connection()
-app.add_middleware(RateLimitMiddleware, redis_connection=redis_conn)
+app.add_middleware(
+    RateLimitMiddleware, redis_connection=get_async_redis_connection()
+)
 app.add_middleware(LoggingMiddleware)
 app.add_middleware(PrometheusMiddleware)
 
@@ -83,7 +99,7 @@ async def health_check():
 
 @app.get("/metrics", tags=["Monitoring"])
 async def get_metrics():
-    return Response(generate_latest(), media_type=CONTENT_TYPE_LATEST)
+    return Response(generate_metrics(), media_type=CONTENT_TYPE_LATEST)
 
 @app.get("/endpoints", tags=["Debug"])
 async def list_all_endpoints():
@@ -113,4 +129,5 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[NEXT_CURSOR_HEADER],
 )
@@ -0,0 +1,93 @@
+import math
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+
+
+class _LocalEntry:
+    __slots__ = ("tokens", "expires_at", "result")
+
+    def __init__(self, tokens: int, expires_at: float, result: Dict[str, Any]):
+        self.tokens = tokens
+        self.expires_at = expires_at
+        self.result = result
+
+
+class LocalRateLimiter:
+    """Per-worker tier in front of Redis.
+
+    Redis hands out leases of several tokens per call; they are spent here
+    without a round trip until used up or `lease_ttl` seconds old, so every
+    active key is reconciled with Redis at least that often. A denial from
+    Redis is remembered until its retry time, so a client hammering a
+    limited route is answered locally. Leased tokens count against the
+    shared limit as soon as they are handed out, which makes the limit
+    slightly stricter, never looser.
+    """
+
+    def __init__(self, max_keys: int = 10000, lease_ttl: float = 1.0):
+        self.max_keys = max_keys
+        self.lease_ttl = lease_ttl
+        self._entries: "OrderedDict[str, _LocalEntry]" = OrderedDict()
+        self._leasing = set()
+
+    def start_lease(self, key: str) -> bool:
+        """True if no lease for `key` is in flight; other misses meanwhile
+        ask Redis for a single token so leases do not pile up unused"""
+        if key in self._leasing:
+            return False
+        self._leasing.add(key)
+        return True
+
+    def end_lease(self, key: str):
+        self._leasing.discard(key)
+
+    def check(self, key: str, now: float) -> Optional[Dict[str, Any]]:
+        """Decision for `key` if it can be made locally, else None"""
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if now >= entry.expires_at:
+            del self._entries[key]
+            return None
+
+        if entry.result["limited"]:
+            return {
+                **entry.result,
+                "retry_after": math.ceil(entry.expires_at - now),
+            }
+        if entry.tokens <= 0:
+            return None
+
+        entry.tokens -= 1
+        self._entries.move_to_end(key)
+        return {
+            **entry.result,
+            "current_count": entry.result["current_count"] - entry.tokens,
+        }
+
+    def store(self, key: str, result: Dict[str, Any], now: float):
+        """Keep the rest of a lease (the first token is the current
+        request) or a denial until its retry time"""
+        entry = self._entries.get(key)
+        leased = (
+            entry is not None and not entry.result["limited"] and now < entry.expires_at
+        )
+        if result["limited"]:
+            if leased and entry.tokens > 0:
+                # Leased tokens that are left are still good
+                return
+            entry = _LocalEntry(0, result["retry_at"], result)
+        elif leased:
+            # The previous lease is still valid; keep its leftover tokens
+            entry.tokens += result["granted"] - 1
+            entry.result = result
+        elif result["granted"] > 1:
+            entry = _LocalEntry(result["granted"] - 1, now + self.lease_ttl, result)
+        else:
+            self._entries.pop(key, None)
+            return
+
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_keys:
+            self._entries.popitem(last=False)
@@ -1,71 +1,103 @@
-import json
+import os
+import random
 import time
 import uuid
-from typing import Callable
 
-from fastapi import Request, Response
-from starlette.middleware.base import BaseHTTPMiddleware
-from starlette.types import ASGIApp
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.requests import Request
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
 
 from app.config.logging_config import get_logger
 
 logger = get_logger(__name__)
 
+# Share of requests below 500 that get a completion line (0.0 - 1.0);
+# server errors, exceptions and slow requests are always logged
+LOG_SAMPLE_RATE = float(os.getenv("LOG_SAMPLE_RATE", 1.0))
+LOG_SLOW_REQUEST_MS = float(os.getenv("LOG_SLOW_REQUEST_MS", 1000))
+
+
+class LoggingMiddleware:
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        sample_rate: float = LOG_SAMPLE_RATE,
+        slow_request_ms: float = LOG_SLOW_REQUEST_MS,
+    ):
+        self.app = app
+        self.sample_rate = sample_rate
+        self.slow_request_seconds = slow_request_ms / 1000
+
+    def _request_fields(self, scope: Scope, request_id: str) -> dict:
+        # Only built for requests that are logged
+        client = scope.get("client")
+        return {
+            "request_id": request_id,
+            "method": scope["method"],
+            "url": str(Request(scope).url),
+            "client_ip": client[0] if client else None,
+            "user_agent": Headers(scope=scope).get("user-agent"),
+        }
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
 
-class LoggingMiddleware(BaseHTTPMiddleware):
-
-    def __init__(self, app: ASGIApp):
-        super().__init__(app)
-
-    async def dispatch(self, request: Request, call_next: Callable) -> Response:
         request_id = str(uuid.uuid4())
 
-        start_time = time.time()
-
-        method = request.method
-        url = str(request.url)
-        headers = dict(request.headers)
+        start_time = time.perf_counter()
 
-        logger.info(
+        logger.debug(
             "Request started",
             request_id=request_id,
-            method=method,
-            url=url,
-            client_ip=request.client.host if request.client else None,
-            user_agent=headers.get("user-agent"),
+            method=scope["method"],
+            path=scope["path"],
         )
 
-        request.state.request_id = request_id
+        # Same storage as request.state.request_id
+        scope.setdefault("state", {})["request_id"] = request_id
 
-        try:
-            response = await call_next(request)
+        status_code = None
 
-            duration = time.time() - start_time
+        async def send_with_request_id(message: Message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                MutableHeaders(scope=message)["X-Request-ID"] = request_id
+            await send(message)
 
-            logger.info(
-                "Request completed",
-                request_id=request_id,
-                method=method,
-                url=url,
-                status_code=response.status_code,
-                duration=round(duration, 3),
-            )
-
-            response.headers["X-Request-ID"] = request_id
-
-            return response
+        try:
+            await self.app(scope, receive, send_with_request_id)
 
         except Exception as e:
-            duration = time.time() - start_time
+            duration = time.perf_counter() - start_time
 
             logger.error(
                 "Request failed",
-                request_id=request_id,
-                method=method,
-                url=url,
+                **self._request_fields(scope, request_id),
                 duration=round(duration, 3),
                 error=str(e),
                 exc_info=True,
             )
 
             raise
+
+        duration = time.perf_counter() - start_time
+
+        if duration >= self.slow_request_seconds:
+            log, event = logger.warning, "Slow request"
+        elif status_code is None or status_code >= 500:
+            log, event = logger.error, "Request completed"
+        elif random.random() < self.sample_rate:
+            log, event = logger.info, "Request completed"
+        else:
+            return
+
+        log(
+            event,
+            **self._request_fields(scope, request_id),
+            status_code=status_code,
+            duration=round(duration, 3),
+        )
@@ -1,11 +1,22 @@
+import os
 import time
-from typing import Callable
 
-from fastapi import Request, Response
 from prometheus_client import (CONTENT_TYPE_LATEST, Counter, Gauge, Histogram,
                                generate_latest)
-from starlette.middleware.base import BaseHTTPMiddleware
-from starlette.types import ASGIApp
+from starlette.datastructures import Headers
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+# Imported before the metrics below are created: it switches them to
+# multi-process storage when PROMETHEUS_MULTIPROC_DIR is set
+import app.config.prometheus_config  # noqa: F401  (sets up multiprocess mode)
+from app.middleware.route_utils import get_route_template
+
+# Distinct `endpoint` label values per process; templates seen after the cap
+# is reached are counted as OTHER_LABEL
+MAX_ENDPOINT_LABELS = int(os.getenv("MAX_ENDPOINT_LABELS", 200))
+# Unmatched paths (404s, scans) and unknown methods
+OTHER_LABEL = "other"
+KNOWN_METHODS = frozenset({"GET", "HEAD", "POST", "PUT", "PATCH", "DELETE", "OPTIONS"})
 
 REQUEST_COUNTS = Counter(
     "http_requests_total",
@@ -19,7 +30,12 @@ REQUEST_DURATION = Histogram(
     ["method", "endpoint"],
 )
 
-ACTIVE_REQUESTS = Gauge("http_requests_active", "Number of active HTTP requests")
+# livesum: summed over the processes that are still running
+ACTIVE_REQUESTS = Gauge(
+    "http_requests_active",
+    "Number of active HTTP requests",
+    multiprocess_mode="livesum",
+)
 
 REQUEST_SIZE = Histogram(
     "http_request_size_bytes", "HTTP request size in bytes", ["method", "endpoint"]
@@ -47,30 +63,103 @@ EMAIL_SENT = Counter(
     "business_emails_sent_total", "Total number of emails sent", ["type", "status"]
 )
 
+# Password hashing pool (app.auth.core)
+
+PASSWORD_HASH_DURATION = Histogram(
+    "password_hash_duration_seconds",
+    "Time spent in bcrypt per operation",
+    ["operation"],
+)
+
+PASSWORD_HASH_WAIT = Histogram(
+    "password_hash_wait_seconds",
+    "Time operations waited for a free hashing thread",
+    ["operation"],
+)
 
-class PrometheusMiddleware(BaseHTTPMiddleware):
-    def __init__(self, app: ASGIApp):
-        super().__init__(app)
+PASSWORD_HASH_PENDING = Gauge(
+    "password_hash_pending",
+    "Hashing operations running or waiting for a thread",
+    multiprocess_mode="livesum",
+)
 
-    async def dispatch(self, request: Request, call_next: Callable) -> Response:
-        if request.url.path == "/metrics":
-            return await call_next(request)
+PASSWORD_HASH_REJECTED = Counter(
+    "password_hash_rejected_total",
+    "Hashing operations rejected because the pool was full",
+    ["operation"],
+)
 
-        method = request.method
-        path = request.url.path
+# Read replica routing (app.config.read_replicas)
+
+DATABASE_READ_SESSIONS = Counter(
+    "database_read_sessions_total",
+    "Read-only sessions handed out, by database (replica name or primary)",
+    ["target"],
+)
+
+DATABASE_REPLICA_LAG = Gauge(
+    "database_replica_lag_seconds",
+    "Replication lag measured by the last health check",
+    ["replica"],
+    multiprocess_mode="max",
+)
+
+
+class PrometheusMiddleware:
+    def __init__(self, app: ASGIApp, max_endpoint_labels: int = MAX_ENDPOINT_LABELS):
+        self.app = app
+        self.max_endpoint_labels = max_endpoint_labels
+        self._endpoint_labels = set()
+
+    def _get_endpoint_label(self, scope: Scope, root_path: str) -> str:
+        """Route template of the request (`/orders/{order_id}/status`)"""
+        route = scope.get("route")
+        if route is not None:
+            template = route.path
+        else:
+            # Mounts (static files) do not record their route; match again
+            # with the root_path the request came in with
+            template = get_route_template({**scope, "root_path": root_path})
+        if template is None:
+            return OTHER_LABEL
+
+        if template not in self._endpoint_labels:
+            if len(self._endpoint_labels) >= self.max_endpoint_labels:
+                return OTHER_LABEL
+            self._endpoint_labels.add(template)
+        return template
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http" or scope["path"] == "/metrics":
+            await self.app(scope, receive, send)
+            return
+
+        method = scope["method"] if scope["method"] in KNOWN_METHODS else OTHER_LABEL
+        root_path = scope.get("root_path", "")
 
         ACTIVE_REQUESTS.inc()
         start_time = time.time()
-        request_size = int(request.headers.get("content-length", 0))
+        request_size = int(Headers(scope=scope).get("content-length", 0))
+
+        status_code = 500
+        response_size = 0
+
+        async def send_with_metrics(message: Message):
+            nonlocal status_code, response_size
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                response_size = int(
+                    Headers(raw=message["headers"]).get("content-length", 0)
+                )
+            await send(message)
 
         try:
-            response = await call_next(request)
+            await self.app(scope, receive, send_with_metrics)
             duration = time.time() - start_time
-
-            response_size = int(response.headers.get("content-length", 0))
+            path = self._get_endpoint_label(scope, root_path)
 
             REQUEST_COUNTS.labels(
-                method=method, endpoint=path, status_code=response.status_code
+                method=method, endpoint=path, status_code=status_code
             ).inc()
 
             REQUEST_DURATION.labels(method=method, endpoint=path).observe(duration)
@@ -79,9 +168,8 @@ class PrometheusMiddleware(BaseHTTPMiddleware):
 
             RESPONSE_SIZE.labels(method=method, endpoint=path).observe(response_size)
 
-            return response
-
         except Exception as e:
+            path = self._get_endpoint_label(scope, root_path)
             REQUEST_COUNTS.labels(method=method, endpoint=path, status_code=500).inc()
 
             duration = time.time() - start_time
@@ -1,24 +1,34 @@
-from starlette.middleware.base import BaseHTTPMiddleware
+from starlette.datastructures import MutableHeaders
 from starlette.requests import Request
-from starlette.responses import Response
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
 
 from app.middleware.rate_limiter import RedisRateLimiter
 
 
-class RateLimitMiddleware(BaseHTTPMiddleware):
-    def __init__(self, app, redis_connection):
-        super().__init__(app)
-        self.rate_limiter = RedisRateLimiter(redis_connection)
+class RateLimitMiddleware:
+    def __init__(self, app: ASGIApp, redis_connection, **limiter_options):
+        self.app = app
+        self.rate_limiter = RedisRateLimiter(redis_connection, **limiter_options)
 
-    async def dispatch(self, request: Request, call_next):
-        rate_limit_response = self.rate_limiter.check_rate_limit(request)
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        request = Request(scope)
+        rate_limit_response = await self.rate_limiter.check_rate_limit(request)
         if rate_limit_response:
-            return rate_limit_response
+            await rate_limit_response(scope, receive, send)
+            return
 
-        response = await call_next(request)
+        rate_limit_headers = getattr(request.state, "rate_limit_headers", None)
+        if not rate_limit_headers:
+            await self.app(scope, receive, send)
+            return
 
-        if hasattr(request.state, "rate_limit_headers"):
-            for key, value in request.state.rate_limit_headers.items():
-                response.headers.update(request.state.rate_limit_headers)
+        async def send_with_headers(message: Message):
+            if message["type"] == "http.response.start":
+                MutableHeaders(scope=message).update(rate_limit_headers)
+            await send(message)
 
-        return response
+        await self.app(scope, receive, send_with_headers)
@@ -1,37 +1,174 @@
+import asyncio
 import hashlib
 import json
+import math
+import os
+import secrets
 import time
 from datetime import datetime, timedelta
-from typing import Any, Dict, Optional
+from typing import Any, Dict, Optional, Tuple
 
-import redis
+import redis.asyncio as redis
 from fastapi import HTTPException, Request, status
 from fastapi.responses import JSONResponse
 
+from app.middleware.local_rate_limiter import LocalRateLimiter
+from app.middleware.route_utils import get_route_template
+
+# Seconds to wait for Redis before giving up on the check
+RATE_LIMIT_TIMEOUT = float(os.getenv("RATE_LIMIT_TIMEOUT", 0.1))
+# When Redis is slow or down: let the request through (true) or answer 503
+RATE_LIMIT_FAIL_OPEN = os.getenv("RATE_LIMIT_FAIL_OPEN", "true").lower() == "true"
+
+SLIDING_WINDOW = "sliding_window"  # exact count, one set member per request
+GCRA = "gcra"  # token bucket, one timestamp per key
+RATE_LIMIT_ALGORITHMS = (SLIDING_WINDOW, GCRA)
+# Algorithm of the "default" limit (every route without its own entry)
+RATE_LIMIT_ALGORITHM = os.getenv("RATE_LIMIT_ALGORITHM", SLIDING_WINDOW)
+
+# Key segment shared by all paths that match no route
+UNMATCHED_ENDPOINT = "unmatched"
+
+# Path prefixes that are never limited (comma separated)
+_exempt_paths = os.getenv("RATE_LIMIT_EXEMPT_PATHS", "/static,/health,/metrics")
+RATE_LIMIT_EXEMPT_PATHS = tuple(
+    path.strip().rstrip("/")
+    for path in _exempt_paths.split(",")
+    if path.strip().rstrip("/")
+)
+# Per-worker tier (LocalRateLimiter): most decisions are made without Redis
+RATE_LIMIT_LOCAL = os.getenv("RATE_LIMIT_LOCAL", "true").lower() == "true"
+# Tokens leased from Redis per call, capped at a tenth of the limit so small
+# limits (auth) stay exact
+RATE_LIMIT_LEASE_SIZE = int(os.getenv("RATE_LIMIT_LEASE_SIZE", 10))
+# Seconds before unused leased tokens are dropped and Redis is asked again
+RATE_LIMIT_LEASE_TTL = float(os.getenv("RATE_LIMIT_LEASE_TTL", 1.0))
+RATE_LIMIT_LOCAL_MAX_KEYS = int(os.getenv("RATE_LIMIT_LOCAL_MAX_KEYS", 10000))
+
 
 class RateLimitConfig:
 
     def __init__(
-        self, requests: int, window: int, message: Optional[str] = None  # seconds
+        self,
+        requests: int,
+        window: int,  # seconds
+        message: Optional[str] = None,
+        algorithm: str = SLIDING_WINDOW,
     ):
+        if algorithm not in RATE_LIMIT_ALGORITHMS:
+            raise ValueError(f"Unknown rate limit algorithm: {algorithm}")
         self.requests = requests
         self.window = window
+        self.algorithm = algorithm
         self.message = (
             message
             or f"Rate limit exceeded. Maximum {requests} requests per {window} seconds."
         )
 
 
+# Sliding window check in a single round trip (EVALSHA).
+# Scores are milliseconds; rejected requests are not added to the set, so
+# hammering a limited key cannot grow it past `limit` members.
+# `cost` asks for up to that many requests at once (a local lease); fewer
+# are granted when the window is nearly full.
+# KEYS[1] = key, ARGV = now_ms, window_ms, limit, cost, member prefix
+# Returns {granted (0 = limited), count incl. granted, reset time in ms,
+#          retry after in ms}
+SLIDING_WINDOW_SCRIPT = """
+local key = KEYS[1]
+local now = tonumber(ARGV[1])
+local window = tonumber(ARGV[2])
+local limit = tonumber(ARGV[3])
+local cost = tonumber(ARGV[4])
+
+redis.call("ZREMRANGEBYSCORE", key, 0, now - window)
+local count = redis.call("ZCARD", key)
+
+local granted = math.min(cost, limit - count)
+if granted > 0 then
+    local members = {}
+    for i = 1, granted do
+        members[#members + 1] = now
+        members[#members + 1] = ARGV[5] .. ":" .. i
+    end
+    redis.call("ZADD", key, unpack(members))
+    redis.call("PEXPIRE", key, window + 60000)
+    return {granted, count + granted, now + window, 0}
+end
+
+local reset = now + window
+local oldest = redis.call("ZRANGE", key, 0, 0, "WITHSCORES")
+if oldest[2] then
+    reset = tonumber(oldest[2]) + window
+end
+return {0, count, reset, reset - now}
+"""
+
+# GCRA: the key only holds the theoretical arrival time (TAT) of the next
+# request. Each request pushes it by window / limit; a request is allowed
+# while the TAT stays within one window of now, so `limit` requests can
+# burst and capacity refills evenly over the window.
+# KEYS[1] = key, ARGV = now_ms, window_ms, limit, cost
+# Same reply as SLIDING_WINDOW_SCRIPT; the reset time is when the bucket is
+# full again.
+GCRA_SCRIPT = """
+local key = KEYS[1]
+local now = tonumber(ARGV[1])
+local window = tonumber(ARGV[2])
+local limit = tonumber(ARGV[3])
+local cost = tonumber(ARGV[4])
+local interval = window / limit
+
+local tat = tonumber(redis.call("GET", key))
+if not tat or tat < now then
+    tat = now
+end
+
+local available = math.floor((now + window - tat) / interval + 1e-9)
+if available < 1 then
+    return {0, limit, math.ceil(tat), math.ceil(tat + interval - window - now)}
+end
+
+local granted = math.min(cost, available)
+local new_tat = tat + granted * interval
+redis.call("SET", key, new_tat, "PX", math.max(1, math.ceil(new_tat - now)))
+return {granted, math.ceil((new_tat - now) / interval), math.ceil(new_tat), 0}
+"""
+
+
 class RedisRateLimiter:
-    """Redis-based rate limiter with sliding window algorithm"""
+    """Redis-based rate limiter, sliding window or GCRA per RateLimitConfig"""
 
-    def __init__(self, redis_connection: redis.Redis):
+    def __init__(
+        self,
+        redis_connection: redis.Redis,
+        timeout: float = RATE_LIMIT_TIMEOUT,
+        fail_open: bool = RATE_LIMIT_FAIL_OPEN,
+        limits: Optional[Dict[str, RateLimitConfig]] = None,
+        exempt_paths: Tuple[str, ...] = RATE_LIMIT_EXEMPT_PATHS,
+        local: bool = RATE_LIMIT_LOCAL,
+        lease_size: int = RATE_LIMIT_LEASE_SIZE,
+    ):
         self.redis = redis_connection
+        self.timeout = timeout
+        self.fail_open = fail_open
+        self.exempt_paths = exempt_paths
+        self.lease_size = lease_size
+        self.local = (
+            LocalRateLimiter(RATE_LIMIT_LOCAL_MAX_KEYS, RATE_LIMIT_LEASE_TTL)
+            if local
+            else None
+        )
+        self._scripts = {
+            SLIDING_WINDOW: self.redis.register_script(SLIDING_WINDOW_SCRIPT),
+            GCRA: self.redis.register_script(GCRA_SCRIPT),
+        }
 
-        self.default_limits = {
+        # Keyed by route template without trailing slash
+        self.default_limits = limits or {
             "/auth/login": RateLimitConfig(10, 300),  # 10 attempts per 6 minutes
             "/auth/register": RateLimitConfig(3, 600),  # 3 attempts per 11 minutes
-            "default": RateLimitConfig(200, 60),
+            "default": RateLimitConfig(200, 60, algorithm=RATE_LIMIT_ALGORITHM),
         }
 
         # self.strict_limits = {
@@ -50,61 +187,79 @@ class RedisRateLimiter:
 
         return request.client.host if request.client else "unknown"
 
+    def _is_exempt(self, path: str) -> bool:
+        return any(
+            path == prefix or path.startswith(prefix + "/")
+            for prefix in self.exempt_paths
+        )
+
+    def _get_lease_size(self, config: RateLimitConfig) -> int:
+        return max(1, min(self.lease_size, config.requests // 10))
+
     def _get_rate_limit_key(
         self, ip: str, endpoint: str, window_type: str = "default"
     ) -> str:
         ip_hash = hashlib.sha256(ip.encode()).hexdigest()[:16]
         return f"rate_limit:{window_type}:{endpoint}:{ip_hash}"
 
-    def _is_rate_limited(
-        self, key: str, config: RateLimitConfig, current_time: float
+    async def _is_rate_limited(
+        self, key: str, config: RateLimitConfig, current_time: float, cost: int = 1
     ) -> Dict[str, Any]:
 
-        pipeline = self.redis.pipeline()
-
-        pipeline.zremrangebyscore(key, 0, current_time - config.window)
-
-        pipeline.zcard(key)
-
-        pipeline.zadd(key, {str(current_time): current_time})
-
-        pipeline.expire(key, config.window + 60)
+        now_ms = int(current_time * 1000)
+        args = [now_ms, config.window * 1000, config.requests, cost]
+        if config.algorithm == SLIDING_WINDOW:
+            args.append(f"{now_ms}:{secrets.token_hex(4)}")
 
-        results = pipeline.execute()
-
-        current_count = results[1]
-
-        if current_count >= config.requests:
-            oldest_requests = self.redis.zrange(key, 0, 0, withscores=True)
-            if oldest_requests:
-                oldest_time = oldest_requests[0][1]
-                reset_time = oldest_time + config.window
-            else:
-                reset_time = current_time + config.window
-
-            return {
-                "limited": True,
-                "current_count": current_count + 1,
-                "limit": config.requests,
-                "window": config.window,
-                "reset_time": reset_time,
-                "retry_after": int(reset_time - current_time),
-            }
+        granted, current_count, reset_ms, retry_ms = await self._scripts[
+            config.algorithm
+        ](keys=[key], args=args)
 
         return {
-            "limited": False,
-            "current_count": current_count + 1,
+            "limited": not granted,
+            "granted": granted,
+            "retry_at": current_time + retry_ms / 1000,
+            "current_count": current_count,
             "limit": config.requests,
             "window": config.window,
-            "reset_time": current_time + config.window,
-            "retry_after": 0,
+            "reset_time": reset_ms / 1000,
+            "retry_after": math.ceil(retry_ms / 1000),
         }
 
-    def check_rate_limit(self, request: Request) -> Optional[JSONResponse]:
+    async def _check_redis(
+        self, key: str, config: RateLimitConfig, current_time: float
+    ) -> Dict[str, Any]:
+        if self.local is None:
+            return await asyncio.wait_for(
+                self._is_rate_limited(key, config, current_time), self.timeout
+            )
+
+        leasing = self.local.start_lease(key)
+        try:
+            cost = self._get_lease_size(config) if leasing else 1
+            result = await asyncio.wait_for(
+                self._is_rate_limited(key, config, current_time, cost), self.timeout
+            )
+        finally:
+            if leasing:
+                self.local.end_lease(key)
+        self.local.store(key, result, current_time)
+        if result["granted"] > 1:
+            # This request is the first of the lease, the rest are local
+            result = {
+                **result,
+                "current_count": result["current_count"] - result["granted"] + 1,
+            }
+        return result
+
+    async def check_rate_limit(self, request: Request) -> Optional[JSONResponse]:
+
+        if self._is_exempt(request.url.path):
+            return None
 
         try:
             ip = self._get_client_ip(request)
-            endpoint = request.url.path
+            endpoint = get_route_template(request.scope) or UNMATCHED_ENDPOINT
             current_time = time.time()
 
             normalized_endpoint = endpoint.rstrip("/")
@@ -113,8 +268,10 @@ class RedisRateLimiter:
                 normalized_endpoint, self.default_limits["default"]
             )
 
-            key = self._get_rate_limit_key(ip, normalized_endpoint)
-            result = self._is_rate_limited(key, config, current_time)
+            key = self._get_rate_limit_key(ip, normalized_endpoint, config.algorithm)
+            result = self.local.check(key, current_time) if self.local else None
+            if result is None:
+                result = await self._check_redis(key, config, current_time)
 
             """
             if normalized_endpoint in self.strict_limits:
@@ -156,6 +313,12 @@ class RedisRateLimiter:
             request.state.rate_limit_headers = headers
 
         except Exception as e:
-            print(f"Rate limiting error: {e}")
+            print(f"Rate limiting error: {e!r}")
+            if not self.fail_open:
+                return JSONResponse(
+                    status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                    content={"error": "Rate limiting unavailable"},
+                    headers={"Retry-After": "1"},
+                )
 
         return None
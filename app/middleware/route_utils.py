@@ -0,0 +1,27 @@
+from typing import Optional
+
+from starlette.routing import Match
+from starlette.types import Scope
+
+
+def get_route_template(scope: Scope) -> Optional[str]:
+    """Path template of the route the request will hit, e.g.
+    `/products/{product_id}`; mounts collapse to their prefix (`/static`).
+
+    Middlewares run before routing, so the app's routes are matched here the
+    same way the router does. Returns None when nothing matches (404s).
+    """
+    app = scope.get("app")
+    router = getattr(app, "router", None)
+    if router is None:
+        return None
+
+    partial = None
+    for route in router.routes:
+        match, _ = route.matches(scope)
+        if match == Match.FULL:
+            return route.path
+        if match == Match.PARTIAL and partial is None:
+            # Right path, wrong method: the router answers 405 for it
+            partial = route.path
+    return partial
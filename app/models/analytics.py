@@ -0,0 +1,30 @@
+from sqlalchemy import Column, Date, Integer, String
+
+from app.models.base import Base
+
+# Daily rollups of orders/order_items for the analytics endpoints. They are
+# derived data: crud.order.create_order adds every new order to them and
+# crud.analytics.rebuild_sales_rollups recomputes them from scratch.
+
+
+class DailyProductSales(Base):
+    __tablename__ = "daily_product_sales"
+
+    date = Column(Date, primary_key=True)
+    product_id = Column(Integer, primary_key=True)
+    user_email = Column(String, primary_key=True)
+    quantity = Column(Integer, nullable=False, default=0)
+    # Order items for the product (an order can list a product twice)
+    order_count = Column(Integer, nullable=False, default=0)
+
+
+class DailyCustomerOrders(Base):
+    """Per-order counts, which the product rollup cannot give: an order
+    with three products is three rows there."""
+
+    __tablename__ = "daily_customer_orders"
+
+    date = Column(Date, primary_key=True)
+    user_email = Column(String, primary_key=True)
+    quantity = Column(Integer, nullable=False, default=0)
+    order_count = Column(Integer, nullable=False, default=0)
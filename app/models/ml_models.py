@@ -1,7 +1,7 @@
 from datetime import datetime
 from typing import Any, Dict, List
 
-from sqlalchemy import Boolean, Column, DateTime, Float, Integer, String, Text
+from sqlalchemy import Boolean, Column, DateTime, Float, Index, Integer, String, Text
 from sqlalchemy.sql import func
 
 from app.models.base import Base
@@ -19,6 +19,17 @@ class Forecast(Base):
     horizon_type = Column(String, nullable=False)  # 'month' or 'quarter'
     created_at = Column(DateTime, default=func.now())
     model_version = Column(String, nullable=False)
+    model_type = Column(String, nullable=True)  # 'SARIMA' or 'Linear'
+
+    __table_args__ = (
+        # Stored forecast lookup (MLForecastingService.get_forecasts)
+        Index(
+            "ix_forecasts_category_horizon_version",
+            product_category,
+            horizon_type,
+            model_version,
+        ),
+    )
 
 
 class ModelMetadata(Base):
@@ -32,6 +43,10 @@ class ModelMetadata(Base):
     model_params = Column(Text)  # JSON string of model parameters
     performance_metrics = Column(Text)  # JSON string of metrics
     is_active = Column(Boolean, default=True)
+    # The fitted model in the model store (services.ml_model_store), relative
+    # to ML_MODEL_DIR
+    model_version = Column(String, nullable=True)
+    model_path = Column(String, nullable=True)
 
 
 class TrendAnalysis(Base):
@@ -5,7 +5,7 @@ from uuid import UUID as PyUUID
 
 from sqlalchemy import UUID, Column, DateTime
 from sqlalchemy import Enum as SQLEnum
-from sqlalchemy import ForeignKey, Integer, String
+from sqlalchemy import ForeignKey, Index, Integer, String
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 
@@ -33,6 +33,18 @@ class Order(Base):
         "OrderItem", back_populates="order", cascade="all, delete-orphan"
     )
 
+    # Keyset pagination walks (order_date, id) newest first, see crud.order
+    __table_args__ = (
+        Index("ix_orders_order_date_id", order_date.desc(), id.desc()),
+        Index(
+            "ix_orders_user_email_order_date_id",
+            user_email,
+            order_date.desc(),
+            id.desc(),
+        ),
+        Index("ix_orders_state_order_date", state, order_date.desc()),
+    )
+
 
 class OrderItem(Base):
     __tablename__ = "order_items"
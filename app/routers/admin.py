@@ -1,16 +1,19 @@
 from fastapi import APIRouter, Depends, HTTPException, Request, status
 from sqlalchemy.orm import Session
 
-from app.auth.core import get_current_user, get_password_hash
+from app.auth.core import get_current_user, get_password_hash_async
 from app.auth.dependencies import (require_admin, require_customer,
                                    require_manager)
+from app.auth.user_cache import user_cache
 from app.config.database import get_db
 from app.config.redis_config import get_queue_stats, get_worker_stats
+from app.crud.analytics import rename_customer_in_rollups
 from app.crud.roles import get_role_by_name
 from app.crud.user import get_user_by_email
 from app.models.order import Order
 from app.schemas.admin import (ChangeCompanyNameRequest, ChangePasswordRequest,
                                ChangeUserEmailRequest, ChangeUserRoleRequest)
+from app.services.analytics_cache import invalidate_dashboard_async
 
 router = APIRouter(prefix="/admin", tags=["Admin"])
 
@@ -87,6 +90,8 @@ async def change_user_role(
             detail="Failed to update user roles",
         )
 
+    await user_cache.invalidate_async(user.company_name)
+
     return {
         "message": f"Role changed successfully for {role_change.user_email}",
         "user": {
@@ -138,6 +143,7 @@ async def remove_user_role(
         user.roles.remove(role_to_remove)
         db.commit()
         db.refresh(user)
+        await user_cache.invalidate_async(user.company_name)
         message = (
             f"Role '{role_removal.new_role}' removed from {role_removal.user_email}"
         )
@@ -159,7 +165,7 @@ async def change_user_password(
             status_code=status.HTTP_404_NOT_FOUND, detail="User not found"
         )
 
-    hashed_password = get_password_hash(password_change.new_password)
+    hashed_password = await get_password_hash_async(password_change.new_password)
     user.hashed_password = hashed_password
     db.commit()
 
@@ -180,8 +186,10 @@ async def change_user_company(
             status_code=status.HTTP_404_NOT_FOUND, detail="User not found"
         )
 
+    old_company_name = user.company_name
     user.company_name = request.new_company_name
     db.commit()
+    await user_cache.invalidate_async(old_company_name, request.new_company_name)
 
     return {"message": f"Company name changed successfully for {request.user_email}"}
 
@@ -212,11 +220,15 @@ async def change_user_email(
         db.query(Order).filter(Order.user_email == old_email).update(
             {Order.user_email: request.new_email}
         )
+        rename_customer_in_rollups(db, old_email, request.new_email)
         db.commit()
     except Exception as e:
         db.rollback()
         raise HTTPException(status_code=500, detail="Internal server error")
 
+    await user_cache.invalidate_async(user.company_name)
+    await invalidate_dashboard_async()
+
     return {"message": f"Email changed from {request.old_email} to {request.new_email}"}
 
 
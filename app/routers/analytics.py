@@ -1,18 +1,24 @@
 from datetime import date
-from typing import List
+from typing import List, Optional
 
-from fastapi import APIRouter, Depends, HTTPException, Query, Request, status
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Request, status
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
 from app.auth.dependencies import require_admin
-from app.config.database import get_db
+from app.config.database import get_async_db
+from app.config.read_replicas import get_async_read_db, get_read_db
+from app.core.http_cache import conditional_json_response, strong_etag
 from app.crud import analytics as analytics_crud
 from app.schemas.analytics import (AverageQuantityOut,
                                    CustomerOrderFrequencyOut,
-                                   CustomerQuantityOut,
+                                   CustomerQuantityOut, DashboardOut,
                                    OrderTimeDistributionOut,
                                    ProductOrderFrequencyOut,
                                    ProductQuantityOut)
+from app.services.analytics_cache import (get_cached_dashboard,
+                                          get_dashboard_version,
+                                          set_cached_dashboard)
 
 router = APIRouter(prefix="/analytics", tags=["Analytics"])
 
@@ -26,16 +32,79 @@ endpoints:
     - top_customers_by_quantity
     - customer_order_frequency
     - order_time_distribution
+    - dashboard (all of the above in one response)
 """
 
 
+def _rows(rows, *fields):
+    return [dict(zip(fields, row)) for row in rows]
+
+
+@router.get(
+    "/dashboard",
+    response_model=DashboardOut,
+    dependencies=[Depends(require_admin())],
+)
+async def get_dashboard(
+    db: AsyncSession = Depends(get_async_db),
+    if_none_match: Optional[str] = Header(None),
+):
+    """All dashboard metrics, cached in Redis until the next order.
+
+    Sends an ETag; a matching If-None-Match gets an empty 304.
+    Built from the primary: a lagging replica could miss the order that
+    bumped the version, and its numbers would be cached under it.
+    """
+    version = await get_dashboard_version()
+    body = await get_cached_dashboard(version) if version is not None else None
+    if body is None:
+        dashboard = await db.run_sync(analytics_crud.get_dashboard)
+        body = (
+            DashboardOut(
+                total_quantity_per_product=_rows(
+                    dashboard["total_quantity_per_product"], "product_id", "total_kg"
+                ),
+                average_quantity_per_order=dashboard["average_quantity_per_order"],
+                most_ordered_products=_rows(
+                    dashboard["most_ordered_products"], "product_id", "total_kg"
+                ),
+                least_ordered_products=_rows(
+                    dashboard["least_ordered_products"], "product_id", "total_kg"
+                ),
+                product_order_frequency=_rows(
+                    dashboard["product_order_frequency"], "product_id", "times_ordered"
+                ),
+                top_customers_by_quantity=_rows(
+                    dashboard["top_customers_by_quantity"], "user_email", "total_kg"
+                ),
+                customer_order_frequency=_rows(
+                    dashboard["customer_order_frequency"], "user_email", "order_count"
+                ),
+                order_time_distribution=_rows(
+                    dashboard["order_time_distribution"], "date", "order_count"
+                ),
+            )
+            .model_dump_json()
+            .encode()
+        )
+        if version is not None:
+            await set_cached_dashboard(version, body)
+
+    # Admin data: browsers may keep it but must revalidate every time
+    return conditional_json_response(
+        body, strong_etag(body), "private, no-cache", if_none_match
+    )
+
+
 @router.get(
     "/total_quantity_per_product",
     response_model=List[ProductQuantityOut],
     dependencies=[Depends(require_admin())],
 )
-async def get_total_quantity_per_product(db: Session = Depends(get_db)):
-    result = analytics_crud.get_total_quantity_per_product(db)
+async def get_total_quantity_per_product(
+    db: AsyncSession = Depends(get_async_read_db),
+):
+    result = await db.run_sync(analytics_crud.get_total_quantity_per_product)
     return [
         ProductQuantityOut(product_id=product_id, total_kg=float(total_kg))
         for product_id, total_kg in result
@@ -47,8 +116,10 @@ async def get_total_quantity_per_product(db: Session = Depends(get_db)):
     response_model=AverageQuantityOut,
     dependencies=[Depends(require_admin())],
 )
-async def get_average_quantity_per_order(db: Session = Depends(get_db)):
-    result = analytics_crud.get_average_quantity_per_order(db)
+async def get_average_quantity_per_order(
+    db: AsyncSession = Depends(get_async_read_db),
+):
+    result = await db.run_sync(analytics_crud.get_average_quantity_per_order)
     return AverageQuantityOut(average_quantity=float(result))
 
 
@@ -57,8 +128,10 @@ async def get_average_quantity_per_order(db: Session = Depends(get_db)):
     response_model=List[ProductQuantityOut],
     dependencies=[Depends(require_admin())],
 )
-async def get_most_ordered_products(db: Session = Depends(get_db)):
-    result = analytics_crud.get_most_ordered_products(db)
+async def get_most_ordered_products(
+    db: AsyncSession = Depends(get_async_read_db),
+):
+    result = await db.run_sync(analytics_crud.get_most_ordered_products)
     return [
         ProductQuantityOut(product_id=product_id, total_kg=float(total_kg))
         for product_id, total_kg in result
@@ -70,8 +143,10 @@ async def get_most_ordered_products(db: Session = Depends(get_db)):
     response_model=List[ProductQuantityOut],
     dependencies=[Depends(require_admin())],
 )
-async def get_least_ordered_products(db: Session = Depends(get_db)):
-    result = analytics_crud.get_least_ordered_products(db)
+async def get_least_ordered_products(
+    db: AsyncSession = Depends(get_async_read_db),
+):
+    result = await db.run_sync(analytics_crud.get_least_ordered_products)
     return [
         ProductQuantityOut(product_id=product_id, total_kg=float(total_kg))
         for product_id, total_kg in result
@@ -83,8 +158,10 @@ async def get_least_ordered_products(db: Session = Depends(get_db)):
     response_model=List[ProductOrderFrequencyOut],
     dependencies=[Depends(require_admin())],
 )
-async def get_product_order_frequency(db: Session = Depends(get_db)):
-    result = analytics_crud.get_product_order_frequency(db)
+async def get_product_order_frequency(
+    db: AsyncSession = Depends(get_async_read_db),
+):
+    result = await db.run_sync(analytics_crud.get_product_order_frequency)
     return [
         ProductOrderFrequencyOut(product_id=product_id, times_ordered=times_ordered)
         for product_id, times_ordered in result
@@ -96,8 +173,10 @@ async def get_product_order_frequency(db: Session = Depends(get_db)):
     response_model=List[CustomerQuantityOut],
     dependencies=[Depends(require_admin())],
 )
-async def get_top_customers_by_quantity(db: Session = Depends(get_db)):
-    result = analytics_crud.get_top_customers_by_quantity(db)
+async def get_top_customers_by_quantity(
+    db: AsyncSession = Depends(get_async_read_db),
+):
+    result = await db.run_sync(analytics_crud.get_top_customers_by_quantity)
     return [
         CustomerQuantityOut(user_email=user_email, total_kg=float(total_kg))
         for user_email, total_kg in result
@@ -109,8 +188,10 @@ async def get_top_customers_by_quantity(db: Session = Depends(get_db)):
     response_model=List[CustomerOrderFrequencyOut],
     dependencies=[Depends(require_admin())],
 )
-async def get_customer_order_frequency(db: Session = Depends(get_db)):
-    result = analytics_crud.get_customer_order_frequency(db)
+async def get_customer_order_frequency(
+    db: AsyncSession = Depends(get_async_read_db),
+):
+    result = await db.run_sync(analytics_crud.get_customer_order_frequency)
     return [
         CustomerOrderFrequencyOut(user_email=user_email, order_count=order_count)
         for user_email, order_count in result
@@ -122,8 +203,10 @@ async def get_customer_order_frequency(db: Session = Depends(get_db)):
     response_model=List[OrderTimeDistributionOut],
     dependencies=[Depends(require_admin())],
 )
-async def get_order_time_distribution(db: Session = Depends(get_db)):
-    result = analytics_crud.get_order_time_distribution(db)
+async def get_order_time_distribution(
+    db: AsyncSession = Depends(get_async_read_db),
+):
+    result = await db.run_sync(analytics_crud.get_order_time_distribution)
     return [
         OrderTimeDistributionOut(date=date, order_count=order_count)
         for date, order_count in result
@@ -135,7 +218,7 @@ async def get_order_time_distribution(db: Session = Depends(get_db)):
     response_model=int,
     dependencies=[Depends(require_admin())],
 )
-def get_total_quantity_per_user(user_email: str, db: Session = Depends(get_db)):
+def get_total_quantity_per_user(user_email: str, db: Session = Depends(get_read_db)):
     total_quantity = analytics_crud.get_total_quantity_by_user(db, user_email)
     return total_quantity
 
@@ -145,7 +228,9 @@ def get_total_quantity_per_user(user_email: str, db: Session = Depends(get_db)):
     response_model=int,
     dependencies=[Depends(require_admin())],
 )
-def get_total_quantity_by_product_id(product_id: str, db: Session = Depends(get_db)):
+def get_total_quantity_by_product_id(
+    product_id: str, db: Session = Depends(get_read_db)
+):
     total_quantity = analytics_crud.get_total_quantity_for_product(db, product_id)
     return total_quantity
 
@@ -155,6 +240,6 @@ def get_total_quantity_by_product_id(product_id: str, db: Session = Depends(get_
     response_model=int,
     dependencies=[Depends(require_admin())],
 )
-def get_total_quantity_by_date(order_date: date, db: Session = Depends(get_db)):
+def get_total_quantity_by_date(order_date: date, db: Session = Depends(get_read_db)):
     total_quantity = analytics_crud.get_total_quantity_by_date(db, order_date)
     return total_quantity
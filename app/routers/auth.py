@@ -1,16 +1,17 @@
-from datetime import timedelta
+from datetime import datetime, timedelta
 from uuid import uuid4
 
 from fastapi import (APIRouter, Depends, HTTPException, Request, Response,
                      status)
-from sqlalchemy.orm import Session
+from sqlalchemy import delete, select
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.auth.core import (ACCESS_TOKEN_EXPIRE_DAYS, COOKIE_NAME,
                            authenticate_user, create_access_token,
-                           get_current_user, get_password_hash)
+                           get_current_user, get_password_hash_async)
 from app.auth.pw_reset import (generate_reset_token, hash_password,
                                verify_password)
-from app.config.database import get_db
+from app.config.database import get_async_db
 from app.crud.roles import assign_default_customer_role
 from app.crud.user import (create_user_with_hashed_password, get_user,
                            get_user_by_company_name, get_user_by_email)
@@ -25,17 +26,21 @@ router = APIRouter(prefix="/auth", tags=["Auth"])
 
 @router.post("/register", response_model=dict)
 async def register(
-    user_data: UserCreate, response: Response, db: Session = Depends(get_db)
+    user_data: UserCreate, response: Response, db: AsyncSession = Depends(get_async_db)
 ):
-    if get_user_by_email(db, user_data.email):
+    if await db.run_sync(get_user_by_email, user_data.email):
         return {"error": "Email already registered!"}
 
-    if get_user_by_company_name(db, user_data.company_name):
+    if await db.run_sync(get_user_by_company_name, user_data.company_name):
         return {"error": "Company name already taken!"}
 
-    db_user = create_user_with_hashed_password(db, user_data)
+    hashed_password = await get_password_hash_async(user_data.password)
+    db_user = await db.run_sync(
+        create_user_with_hashed_password, user_data, hashed_password
+    )
 
-    assign_default_customer_role(db, db_user)
+    await db.run_sync(assign_default_customer_role, db_user)
+    await db.refresh(db_user, ["roles"])
 
     # addition of roles to token
     user_roles = [role.name for role in db_user.roles]
@@ -74,9 +79,9 @@ async def register(
 
 @router.post("/login", response_model=dict)
 async def login(
-    user_data: UserLogin, response: Response, db: Session = Depends(get_db)
+    user_data: UserLogin, response: Response, db: AsyncSession = Depends(get_async_db)
 ):
-    user = authenticate_user(db, user_data.email, user_data.password)
+    user = await authenticate_user(db, user_data.email, user_data.password)
     if not user:
         return {"error": "Falscher Nutzername oder Passwort!"}
 
@@ -124,25 +129,25 @@ async def read_users_me(current_user: User = Depends(get_current_user)):
 
 @router.post("/forgot-password")
 async def forgot_password(
-    request: ForgotPasswordRequest, db: Session = Depends(get_db)
+    request: ForgotPasswordRequest, db: AsyncSession = Depends(get_async_db)
 ):
 
-    user = db.query(User).filter(User.email == request.email).first()
+    user = await db.scalar(select(User).where(User.email == request.email))
     if not user:
         return {"message": "If the email exists, a reset link has been sent."}
 
     token = generate_reset_token()
     expires_at = datetime.utcnow() + timedelta(hours=1)
 
-    db.query(PasswordResetToken).filter(
-        PasswordResetToken.email == request.email
-    ).delete()
+    await db.execute(
+        delete(PasswordResetToken).where(PasswordResetToken.email == request.email)
+    )
 
     reset_token = PasswordResetToken(
         token=token, email=request.email, expires_at=expires_at
     )
     db.add(reset_token)
-    db.commit()
+    await db.commit()
 
     email_sent = ""
     if not email_sent:
@@ -151,14 +156,14 @@ async def forgot_password(
 
 
 @router.post("/reset-password")
-async def reset_password(request: ResetPasswordRequest, db: Session = Depends(get_db)):
+async def reset_password(
+    request: ResetPasswordRequest, db: AsyncSession = Depends(get_async_db)
+):
 
-    token_record = (
-        db.query(PasswordResetToken)
-        .filter(
+    token_record = await db.scalar(
+        select(PasswordResetToken).where(
             PasswordResetToken.token == request.token, PasswordResetToken.used == False
         )
-        .first()
     )
 
     if not token_record:
@@ -167,13 +172,13 @@ async def reset_password(request: ResetPasswordRequest, db: Session = Depends(ge
     if datetime.utcnow() > token_record.expires_at:
         raise HTTPException(status_code=400, detail="Token has expired!")
 
-    user = db.query(User).filter(User.email == token_record.email).first()
+    user = await db.scalar(select(User).where(User.email == token_record.email))
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
 
-    user.hashed_password = get_password_hash(request.new_password)
+    user.hashed_password = await get_password_hash_async(request.new_password)
 
     token_record.used = True
-    db.commit()
+    await db.commit()
 
     return {"message": "Password succesfully reset"}
@@ -1,33 +1,84 @@
 from typing import Dict, List
 
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, status
+from rq.exceptions import NoSuchJobError
+from rq.job import Job, JobStatus
 from sqlalchemy import desc, func
 from sqlalchemy.orm import Session
 
 from app.auth.dependencies import require_admin
 from app.config.database import get_db
+from app.config.read_replicas import get_read_db
+from app.config.redis_config import get_redis_connection
 from app.models.ml_models import Forecast, ModelMetadata, TrendAnalysis
 from app.models.product import ProductCategory
 from app.schemas.ml_schemas import (CustomerClusterResponse, CustomerFeatures,
                                     ForecastResponse, ModelStatusResponse,
-                                    TrendResponse)
+                                    TrainingJobResponse, TrendResponse)
 from app.services.ml_clustering_service import (analyze_clusters,
                                                 create_visualization,
                                                 extract_customer_features,
                                                 perform_clustering)
-from app.services.ml_forecasting_service import MLForecastingService
+from app.services.ml_forecasting_service import (HORIZON_DAYS,
+                                                 MLForecastingService)
+from app.services.ml_tasks import enqueue_training
 
 router = APIRouter(prefix="/machine_learning", tags=["machine_learning"])
 
 
-@router.post("/retrain", dependencies=[Depends(require_admin())])
-def retrain_models(db: Session = Depends(get_db)):
+@router.post(
+    "/retrain",
+    status_code=status.HTTP_202_ACCEPTED,
+    dependencies=[Depends(require_admin())],
+)
+def retrain_models():
+    """Queue a retrain on the ML training worker (app.services.ml_worker).
+
+    Returns the job id for GET /machine_learning/retrain/{job_id}; while a
+    retrain is queued or running, that job is returned instead of a new one.
+    """
     try:
-        ml_service = MLForecastingService(db)
-        results = ml_service.train_all_models()
-        return {"status": "success", "results": results}
+        job = enqueue_training()
     except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Training failed: {str(e)}")
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=f"Could not queue training: {str(e)}",
+        )
+    return {"status": job.get_status(), "job_id": job.id}
+
+
+@router.get(
+    "/retrain/{job_id}",
+    response_model=TrainingJobResponse,
+    dependencies=[Depends(require_admin())],
+)
+def get_training_status(job_id: str):
+    try:
+        job = Job.fetch(job_id, connection=get_redis_connection())
+    except NoSuchJobError:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Training job {job_id} not found",
+        )
+
+    job_status = job.get_status()
+    error = None
+    if job_status == JobStatus.FAILED:
+        result = job.latest_result()
+        if result is not None and result.exc_string:
+            # The exception line of the traceback
+            error = result.exc_string.strip().splitlines()[-1]
+
+    return TrainingJobResponse(
+        job_id=job.id,
+        status=job_status,
+        enqueued_at=job.enqueued_at.isoformat() if job.enqueued_at else None,
+        started_at=job.started_at.isoformat() if job.started_at else None,
+        ended_at=job.ended_at.isoformat() if job.ended_at else None,
+        categories=job.meta.get("categories", {}),
+        results=job.return_value() if job_status == JobStatus.FINISHED else None,
+        error=error,
+    )
 
 
 @router.get(
@@ -40,19 +91,46 @@ def get_forecast(
     horizon: str = "month",
     db: Session = Depends(get_db),
 ):
-    if horizon not in ["month", "quarter"]:
+    """The stored forecast of the latest model; recomputed after a retrain"""
+    if horizon not in HORIZON_DAYS:
         raise HTTPException(
             status_code=400, detail="Horizon must be 'month' or 'quarter'"
         )
 
     try:
         ml_service = MLForecastingService(db)
-        result = ml_service.generate_forecast(product_category.value, horizon)
+        result = ml_service.get_forecasts(product_category.value, [horizon])[horizon]
         return ForecastResponse(**result)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Forecasting failed: {str(e)}")
 
 
+@router.get(
+    "/forecasts",
+    response_model=Dict[str, Dict[str, ForecastResponse]],
+    dependencies=[Depends(require_admin())],
+)
+def get_all_forecasts(db: Session = Depends(get_db)):
+    """Month and quarter forecasts of every category"""
+    try:
+        ml_service = MLForecastingService(db)
+        results = ml_service.get_all_forecasts()
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Forecasting failed: {str(e)}")
+
+    return {
+        category: {
+            horizon: (
+                ForecastResponse(status="error", error=result["error"])
+                if "error" in result
+                else ForecastResponse(**result)
+            )
+            for horizon, result in forecasts.items()
+        }
+        for category, forecasts in results.items()
+    }
+
+
 @router.get(
     "/trends/{product_category}",
     response_model=TrendResponse,
@@ -62,6 +140,7 @@ def get_trends(
     product_category: ProductCategory,
     period: str = "30d",
     db: Session = Depends(get_db),
+    read_db: Session = Depends(get_read_db),
 ):
     """Get growth/decline trends for a product category"""
     period_mapping = {"30d": 30, "90d": 90}
@@ -69,7 +148,7 @@ def get_trends(
         raise HTTPException(status_code=400, detail="Period must be '30d' or '90d'")
 
     try:
-        ml_service = MLForecastingService(db)
+        ml_service = MLForecastingService(db, read_db)
         result = ml_service.calculate_trends(
             product_category.value, period_mapping[period]
         )
@@ -83,7 +162,7 @@ def get_trends(
     response_model=ModelStatusResponse,
     dependencies=[Depends(require_admin())],
 )
-def get_model_status(db: Session = Depends(get_db)):
+def get_model_status(db: Session = Depends(get_read_db)):
     try:
         latest_models = {}
         for category in ProductCategory:
@@ -118,7 +197,9 @@ def get_model_status(db: Session = Depends(get_db)):
     "/customer-clusters/summary",
     dependencies=[Depends(require_admin())],
 )
-async def get_cluster_summary(db: Session = Depends(get_db), days_back: int = 365):
+async def get_cluster_summary(
+    db: Session = Depends(get_read_db), days_back: int = 365
+):
     df = extract_customer_features(db, days_back)
     clusters, _, _, _ = perform_clustering(df)
     cluster_analysis = analyze_clusters(df, clusters)
@@ -141,7 +222,7 @@ async def get_cluster_summary(db: Session = Depends(get_db), days_back: int = 36
     dependencies=[Depends(require_admin())],
 )
 async def analyze_customer_clusters(
-    db: Session = Depends(get_db), days_back: int = 365, n_clusters: int = 4
+    db: Session = Depends(get_read_db), days_back: int = 365, n_clusters: int = 4
 ):
     """
     -> customer segmentation based on purchasing behavior
@@ -1,24 +1,54 @@
 from datetime import date, datetime
-from typing import List
+from typing import List, Optional
 
-from fastapi import APIRouter, Depends, HTTPException, Query, Request, status
+from fastapi import (APIRouter, Depends, HTTPException, Query, Request,
+                     Response, status)
+from fastapi.responses import StreamingResponse
 from rq import Queue, Retry, Worker
 from rq.job import Job
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
 from app.auth.core import get_current_user
 from app.auth.dependencies import require_admin
-from app.config.database import get_db
+from app.config.database import get_async_db
+from app.config.read_replicas import get_async_read_db, get_read_db
 from app.config.redis_config import get_pdf_queue, move_to_dead_letter_queue
+from app.core.pagination import (NEXT_CURSOR_HEADER, decode_order_cursor,
+                                 next_order_cursor)
 from app.crud import order as order_crud
 from app.middleware.prometheus_middleware import record_order_created
 from app.models.order import OrderState
-from app.schemas.order import (FailureType, OrderCreate, OrderResponse,
-                               OrderStateUpdate)
+from app.schemas.order import (ExportFormat, FailureType, OrderCreate,
+                               OrderResponse, OrderStateUpdate,
+                               PlacedOrderResponse, QueueInfo,
+                               serialize_orders)
+from app.services.analytics_cache import invalidate_dashboard_async
+from app.services.order_export import MEDIA_TYPES, stream_orders_export
 from app.services.tasks import generate_pdf_task
 
 router = APIRouter(prefix="/orders", tags=["Orders"])
 
+JSON_MEDIA_TYPE = "application/json"
+
+CURSOR_DESCRIPTION = (
+    f"Opaque cursor from the {NEXT_CURSOR_HEADER} header of the previous page. "
+    "Takes precedence over skip."
+)
+
+
+def order_list_response(orders, limit: int) -> Response:
+    """Pre-serialized page of orders plus its next cursor.
+
+    The orders are validated against `OrderResponse` once while serializing,
+    so returning a plain `Response` lets FastAPI skip its own second pass.
+    """
+    response = Response(content=serialize_orders(orders), media_type=JSON_MEDIA_TYPE)
+    next_cursor = next_order_cursor(orders, limit)
+    if next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
+    return response
+
 
 @router.get(
     "/",
@@ -28,47 +58,14 @@ router = APIRouter(prefix="/orders", tags=["Orders"])
 async def get_all_orders(
     skip: int = Query(0, ge=0),
     limit: int = Query(50, ge=1, le=100),
-    db: Session = Depends(get_db),
+    cursor: Optional[str] = Query(None, description=CURSOR_DESCRIPTION),
+    db: AsyncSession = Depends(get_async_read_db),
 ):
-    orders = order_crud.get_all_orders(db=db, skip=skip, limit=limit)
-
-    if not orders:
-        return []
-
-    response_orders = []
-    for order in orders:
-        response_orders.append(
-            {
-                "id": order.id,
-                "user_email": order.user_email,
-                "order_date": order.order_date,
-                "state": order.state,
-                "order_items": [
-                    {
-                        "id": item.id,
-                        "product_id": item.product_id,
-                        "quantity": item.quantity,
-                        "product": (
-                            {
-                                "id": item.product.id,
-                                "description": item.product.description,
-                                "image_link": item.product.image_link,
-                                "category": item.product.category,
-                            }
-                            if item.product
-                            else None
-                        ),
-                    }
-                    for item in order.order_items
-                ],
-                "user": (
-                    {"email": order.user.email, "company_name": order.user.company_name}
-                    if order.user
-                    else None
-                ),
-            }
-        )
-    return response_orders
+    after = decode_order_cursor(cursor) if cursor else None
+    orders = await db.run_sync(
+        order_crud.get_all_orders, skip=skip, limit=limit, after=after
+    )
+    return order_list_response(orders, limit)
 
 
 @router.get(
@@ -80,99 +77,37 @@ async def get_orders_by_email(
     user_email: str,
     skip: int = Query(0, ge=0),
     limit: int = Query(10, ge=1, le=100),
-    db: Session = Depends(get_db),
+    cursor: Optional[str] = Query(None, description=CURSOR_DESCRIPTION),
+    db: AsyncSession = Depends(get_async_read_db),
 ):
-    orders = order_crud.get_orders_by_user_email(
-        db=db, user_email=user_email, skip=skip, limit=limit
+    after = decode_order_cursor(cursor) if cursor else None
+    orders = await db.run_sync(
+        order_crud.get_orders_by_user_email,
+        user_email=user_email,
+        skip=skip,
+        limit=limit,
+        after=after,
     )
-
-    if not orders:
-        return []
-
-    response_orders = []
-    for order in orders:
-        response_orders.append(
-            {
-                "id": order.id,
-                "user_email": order.user_email,
-                "order_date": order.order_date,
-                "state": order.state,
-                "order_items": [
-                    {
-                        "id": item.id,
-                        "product_id": item.product_id,
-                        "quantity": item.quantity,
-                        "product": (
-                            {
-                                "id": item.product.id,
-                                "description": item.product.description,
-                                "image_link": item.product.image_link,
-                                "category": item.product.category,
-                            }
-                            if item.product
-                            else None
-                        ),
-                    }
-                    for item in order.order_items
-                ],
-                "user": (
-                    {"email": order.user.email, "company_name": order.user.company_name}
-                    if order.user
-                    else None
-                ),
-            }
-        )
-    return response_orders
+    return order_list_response(orders, limit)
 
 
 @router.get("/my-orders", response_model=List[OrderResponse])
 async def get_my_orders(
     skip: int = Query(0, ge=0),
     limit: int = Query(10, ge=1, le=100),
-    db: Session = Depends(get_db),
+    cursor: Optional[str] = Query(None, description=CURSOR_DESCRIPTION),
+    db: AsyncSession = Depends(get_async_db),
     current_user=Depends(get_current_user),
 ):
-    orders = order_crud.get_orders_by_user_email(
-        db=db, user_email=current_user.email, skip=skip, limit=limit
+    after = decode_order_cursor(cursor) if cursor else None
+    orders = await db.run_sync(
+        order_crud.get_orders_by_user_email,
+        user_email=current_user.email,
+        skip=skip,
+        limit=limit,
+        after=after,
     )
-
-    if not orders:
-        return []
-
-    response_orders = []
-    for order in orders:
-        response_orders.append(
-            {
-                "id": order.id,
-                "user_email": order.user_email,
-                "order_date": order.order_date,
-                "state": order.state,
-                "order_items": [
-                    {
-                        "id": item.id,
-                        "product_id": item.product_id,
-                        "quantity": item.quantity,
-                        "product": (
-                            {
-                                "id": item.product.id,
-                                "description": item.product.description,
-                                "image_link": item.product.image_link,
-                                "category": item.product.category,
-                            }
-                            if item.product
-                            else None
-                        ),
-                    }
-                    for item in order.order_items
-                ],
-                "user": (
-                    {"email": order.user.email, "company_name": order.user.company_name}
-                    if order.user
-                    else None
-                ),
-            }
-        )
-    return response_orders
+    return order_list_response(orders, limit)
 
 
 @router.get(
@@ -184,59 +119,51 @@ async def get_orders_by_date(
     order_date: date,
     skip: int = Query(0, ge=0),
     limit: int = Query(10, ge=1, le=100),
-    db: Session = Depends(get_db),
+    cursor: Optional[str] = Query(None, description=CURSOR_DESCRIPTION),
+    db: AsyncSession = Depends(get_async_read_db),
 ):
-    orders = order_crud.get_orders_by_date(
-        db=db, order_date=order_date, skip=skip, limit=limit
+    after = decode_order_cursor(cursor) if cursor else None
+    orders = await db.run_sync(
+        order_crud.get_orders_by_date,
+        order_date=order_date,
+        skip=skip,
+        limit=limit,
+        after=after,
     )
+    return order_list_response(orders, limit)
 
-    if not orders:
-        return []
-
-    response_orders = []
-    for order in orders:
-        response_orders.append(
-            {
-                "id": order.id,
-                "user_email": order.user_email,
-                "order_date": order.order_date,
-                "state": order.state,
-                "order_items": [
-                    {
-                        "id": item.id,
-                        "product_id": item.product_id,
-                        "quantity": item.quantity,
-                        "product": (
-                            {
-                                "id": item.product.id,
-                                "description": item.product.description,
-                                "image_link": item.product.image_link,
-                                "category": item.product.category,
-                            }
-                            if item.product
-                            else None
-                        ),
-                    }
-                    for item in order.order_items
-                ],
-                "user": (
-                    {"email": order.user.email, "company_name": order.user.company_name}
-                    if order.user
-                    else None
-                ),
-            }
+
+@router.get("/export", dependencies=[Depends(require_admin())])
+def export_orders(
+    format: ExportFormat = Query(ExportFormat.NDJSON),
+    start_date: Optional[date] = Query(None, description="First order day"),
+    end_date: Optional[date] = Query(None, description="Last order day"),
+    state: Optional[List[OrderState]] = Query(None),
+):
+    if start_date and end_date and start_date > end_date:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="start_date must not be after end_date",
         )
 
-    return response_orders
+    return StreamingResponse(
+        stream_orders_export(
+            format, start_date=start_date, end_date=end_date, states=state
+        ),
+        media_type=MEDIA_TYPES[format],
+        headers={
+            "Content-Disposition": f'attachment; filename="orders.{format.value}"'
+        },
+    )
 
 
 @router.get("/{order_id}/status", dependencies=[Depends(require_admin())])
 async def get_order_status(
     order_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     dependencies=[Depends(require_admin())],
 ):
-    order = order_crud.get_order_by_id(db=db, order_id=order_id)
+    order = await db.run_sync(order_crud.get_order_by_id, order_id=order_id)
     if not order:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND, detail="Order not found"
@@ -245,17 +172,19 @@ async def get_order_status(
     return {"order_id": order.id, "state": order.state, "order_date": order.order_date}
 
 
-@router.post("/place-order", response_model=OrderResponse)
+@router.post("/place-order", response_model=PlacedOrderResponse)
 async def place_order(
     order: OrderCreate,
     request: Request,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user=Depends(get_current_user),
 ):
     try:
-        db_order = order_crud.create_order(
-            db=db, order=order, user_email=current_user.email
+        # create_order returns the order with its user and items loaded
+        db_order = await db.run_sync(
+            order_crud.create_order, order=order, user_email=current_user.email
         )
+        await invalidate_dashboard_async()
 
         order_data = {
             "order_id": db_order.id,
@@ -296,46 +225,17 @@ async def place_order(
 
         print(f"PDF generation task queued with job ID: {pdf_job.id}")
 
-        response_data = {
-            "id": db_order.id,
-            "user_email": db_order.user_email,
-            "order_date": db_order.order_date,
-            "state": db_order.state,
-            "order_items": [
-                {
-                    "id": item.id,
-                    "product_id": item.product_id,
-                    "quantity": item.quantity,
-                    "product": (
-                        {
-                            "id": item.product.id,
-                            "description": item.product.description,
-                            "image_link": item.product.image_link,
-                            "category": item.product.category,
-                        }
-                        if item.product
-                        else None
-                    ),
-                }
-                for item in db_order.order_items
-            ],
-            "user": (
-                {
-                    "email": db_order.user.email,
-                    "company_name": db_order.user.company_name,
-                }
-                if db_order.user
-                else None
-            ),
-            "queue_info": {
-                "pdf_job_id": pdf_job.id,
-                "message": "PDF generation and email sending have been queued.",
-            },
-        }
+        response_order = PlacedOrderResponse.model_validate(db_order)
+        response_order.queue_info = QueueInfo(
+            pdf_job_id=pdf_job.id,
+            message="PDF generation and email sending have been queued.",
+        )
 
         record_order_created()  # Prometheus metrics
 
-        return response_data
+        return Response(
+            content=response_order.model_dump_json(), media_type=JSON_MEDIA_TYPE
+        )
 
     except Exception as e:
         raise HTTPException(
@@ -346,10 +246,12 @@ async def place_order(
 
 @router.patch("/{order_id}/state", dependencies=[Depends(require_admin())])
 async def update_order_state(
-    order_id: int, state_update: OrderStateUpdate, db: Session = Depends(get_db)
+    order_id: int,
+    state_update: OrderStateUpdate,
+    db: AsyncSession = Depends(get_async_db),
 ):
-    updated_order = order_crud.update_order_state(
-        db=db, order_id=order_id, new_state=state_update.state
+    updated_order = await db.run_sync(
+        order_crud.update_order_state, order_id=order_id, new_state=state_update.state
     )
 
     if not updated_order:
@@ -378,13 +280,19 @@ def get_failed_orders(
     limit: int = Query(
         100, ge=1, le=100, description="Maximum number of orders to return"
     ),
-    db: Session = Depends(get_db),
+    cursor: Optional[str] = Query(None, description=CURSOR_DESCRIPTION),
+    db: Session = Depends(get_read_db),
 ):
+    after = decode_order_cursor(cursor) if cursor else None
     try:
         orders = order_crud.get_failed_orders(
-            db=db, failure_type=failure_type.value, skip=skip, limit=limit
+            db=db,
+            failure_type=failure_type.value,
+            skip=skip,
+            limit=limit,
+            after=after,
         )
-        return orders
+        return order_list_response(orders, limit)
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -393,7 +301,7 @@ def get_failed_orders(
 
 
 @router.get("/failed/stats", dependencies=[Depends(require_admin())])
-def get_failed_orders_stats(db: Session = Depends(get_db)):
+def get_failed_orders_stats(db: Session = Depends(get_read_db)):
     try:
         stats = order_crud.get_failed_orders_count(db=db)
         return stats
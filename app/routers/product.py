@@ -1,42 +1,69 @@
 from typing import List, Optional
 
-from fastapi import (APIRouter, Depends, File, Form, HTTPException, Query,
-                     UploadFile, status)
+from fastapi import (APIRouter, Depends, File, Form, Header, HTTPException,
+                     Query, UploadFile, status)
+from pydantic import TypeAdapter
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
 from app import crud
 from app.auth.dependencies import require_admin
-from app.config.database import get_db
+from app.config.database import get_async_db, get_db
 from app.core.file_utils import (ALLOWED_IMAGE_TYPES, MAX_DESCRIPTION_LENGTH,
                                  MAX_IMAGE_SIZE, MIN_DESCRIPTION_LENGTH,
                                  delete_product_image, handle_database_error,
                                  save_product_image, validate_image_file)
+from app.core.http_cache import conditional_json_response
 from app.models.product import Product, ProductCategory
 from app.schemas.product import (ProductBase, ProductCreate, ProductResponse,
                                  ProductUpdate)
+from app.services.product_cache import (ALL_CATEGORIES,
+                                        PRODUCT_CATALOG_MAX_AGE,
+                                        product_catalog_cache)
 
 router = APIRouter(prefix="/products", tags=["Products"])
 
+product_list_adapter = TypeAdapter(List[ProductResponse])
+
 
 @router.get("/", response_model=List[ProductResponse])
 async def get_all_products(
     category: Optional[ProductCategory] = Query(None, description="Filter by category"),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
+    if_none_match: Optional[str] = Header(None),
 ):
-    try:
-        if category:
-            products = crud.product.get_products_by_category(db, category=category)
-        else:
-            products = crud.product.get_products(db)
-        return products
-    except Exception as e:
-        raise handle_database_error(e, "get_all_products")
+    """The catalog, served from the product cache while it is unchanged"""
+    cache_key = category.name if category else ALL_CATEGORIES
+    version, entry = await product_catalog_cache.get(cache_key)
+    if entry is None:
+        try:
+            if category:
+                products = await db.run_sync(
+                    crud.product.get_products_by_category, category=category
+                )
+            else:
+                products = await db.run_sync(crud.product.get_products)
+        except Exception as e:
+            raise handle_database_error(e, "get_all_products")
+        body = product_list_adapter.dump_json(
+            product_list_adapter.validate_python(products, from_attributes=True)
+        )
+        entry = await product_catalog_cache.set(version, cache_key, body)
+
+    return conditional_json_response(
+        entry.body,
+        entry.etag,
+        f"public, max-age={PRODUCT_CATALOG_MAX_AGE}, must-revalidate",
+        if_none_match,
+    )
 
 
 @router.get("/{product_id}", response_model=ProductResponse)
-async def get_product_by_id(product_id: int, db: Session = Depends(get_db)):
+async def get_product_by_id(
+    product_id: int, db: AsyncSession = Depends(get_async_db)
+):
     try:
-        product = crud.product.get_product(db, product_id=product_id)
+        product = await db.run_sync(crud.product.get_product, product_id=product_id)
         if product is None:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
@@ -49,13 +76,16 @@ async def get_product_by_id(product_id: int, db: Session = Depends(get_db)):
         raise handle_database_error(e, "get_product_by_id")
 
 
+# The admin writes save and delete image files around their transaction.
+# As plain `def` routes FastAPI runs them in its threadpool, so neither the
+# file I/O nor the sync session blocks the event loop.
 @router.post(
     "/",
     response_model=ProductResponse,
     status_code=status.HTTP_201_CREATED,
     dependencies=[Depends(require_admin)],
 )
-async def create_product(
+def create_product(
     description: str = Form(..., min_length=1, max_length=100),
     category: ProductCategory = Form(...),
     image: Optional[UploadFile] = File(None),
@@ -72,6 +102,7 @@ async def create_product(
                 db=db, product=product_data, image_file=image
             )
             db.commit()
+            product_catalog_cache.invalidate()
             return created_product
         except Exception as e:
             db.rollback()
@@ -92,7 +123,7 @@ async def create_product(
     response_model=ProductResponse,
     dependencies=[Depends(require_admin)],
 )
-async def update_product(
+def update_product(
     product_id: int,
     description: Optional[str] = Form(
         None, min_length=MIN_DESCRIPTION_LENGTH, max_length=MAX_DESCRIPTION_LENGTH
@@ -140,6 +171,7 @@ async def update_product(
 
             new_image_path = updated_product.image_link
             db.commit()
+            product_catalog_cache.invalidate()
 
             if old_image_path and old_image_path != new_image_path:
                 try:
@@ -173,7 +205,7 @@ async def update_product(
     status_code=status.HTTP_204_NO_CONTENT,
     dependencies=[Depends(require_admin)],
 )
-async def delete_product(
+def delete_product(
     product_id: int,
     db: Session = Depends(get_db),
 ):
@@ -190,6 +222,7 @@ async def delete_product(
         except Exception as e:
             db.rollback()
             raise e
+        product_catalog_cache.invalidate()
     except HTTPException:
         raise
     except Exception as e:
@@ -197,7 +230,7 @@ async def delete_product(
 
 
 @router.post("/{product_id}/image", dependencies=[Depends(require_admin)])
-async def upload_product_image(
+def upload_product_image(
     product_id: int, image: UploadFile = File(...), db: Session = Depends(get_db)
 ):
     validate_image_file(image)
@@ -225,6 +258,7 @@ async def upload_product_image(
             db.product.image_link = db_product.image_link
             db.commit()
             db.refresh(db_product)
+            product_catalog_cache.invalidate()
 
             if old_image_path:
                 try:
@@ -253,7 +287,7 @@ async def upload_product_image(
 
 
 @router.delete("/{product_id}/image", dependencies=[Depends(require_admin)])
-async def delete_product_image_only(
+def delete_product_image_only(
     product_id: int,
     db: Session = Depends(get_db),
 ):
@@ -272,6 +306,7 @@ async def delete_product_image_only(
             db_product.image_link = None
             db.commit()
             db.refresh(db_product)
+            product_catalog_cache.invalidate()
 
             if old_image_path:
                 try:
@@ -5,10 +5,12 @@ from sqlalchemy.orm import Session
 
 from app import crud
 from app.auth.dependencies import require_admin
+from app.auth.user_cache import user_cache
 from app.config.database import get_db
 from app.models.user import User
 from app.schemas.user import (UserCreate, UserCreateWithRoles, UserRead,
                               UserUpdate)
+from app.services.analytics_cache import invalidate_dashboard
 
 router = APIRouter(prefix="/users", tags=["Users"])
 
@@ -39,11 +41,18 @@ def create_user(user: UserCreate, db: Session = Depends(get_db)):
     "/{user_id}", response_model=UserRead, dependencies=[Depends(require_admin())]
 )
 def update_user(user_id: str, user_update: UserUpdate, db: Session = Depends(get_db)):
+    existing_user = crud.user.get_user(db, user_id)
+    old_company_name = existing_user.company_name if existing_user else None
+
     db_user = crud.user.update_user(db, user_id, user_update)
     if not db_user:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND, detail="User not found"
         )
+
+    user_cache.invalidate(
+        *{name for name in (old_company_name, db_user.company_name) if name}
+    )
     return db_user
 
 
@@ -56,9 +65,15 @@ def delete_user(user_id: str, db: Session = Depends(get_db)):
     """
     Delete a user by their ID.
     """
+    existing_user = crud.user.get_user(db, user_id)
+    old_company_name = existing_user.company_name if existing_user else None
+
     deleted_result = crud.user.delete_user(db, user_id)
     if not deleted_result:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND, detail="User not found"
         )
+    if old_company_name:
+        user_cache.invalidate(old_company_name)
+    invalidate_dashboard()
     # For 204 No Content, FastAPI automatically returns nothing.
@@ -31,3 +31,14 @@ class CustomerOrderFrequencyOut(BaseModel):
 class OrderTimeDistributionOut(BaseModel):
     date: date
     order_count: int
+
+
+class DashboardOut(BaseModel):
+    total_quantity_per_product: List[ProductQuantityOut]
+    average_quantity_per_order: float
+    most_ordered_products: List[ProductQuantityOut]
+    least_ordered_products: List[ProductQuantityOut]
+    product_order_frequency: List[ProductOrderFrequencyOut]
+    top_customers_by_quantity: List[CustomerQuantityOut]
+    customer_order_frequency: List[CustomerOrderFrequencyOut]
+    order_time_distribution: List[OrderTimeDistributionOut]
@@ -1,4 +1,4 @@
-from typing import Any, Dict, List
+from typing import Any, Dict, List, Optional
 
 from pydantic import BaseModel
 
@@ -22,6 +22,18 @@ class TrendResponse(BaseModel):
     error: str = None
 
 
+class TrainingJobResponse(BaseModel):
+    job_id: str
+    status: str
+    enqueued_at: Optional[str] = None
+    started_at: Optional[str] = None
+    ended_at: Optional[str] = None
+    # Per category: status, started_at and timings in seconds
+    categories: Dict[str, Dict[str, Any]] = {}
+    results: Optional[Dict[str, Any]] = None
+    error: Optional[str] = None
+
+
 class ModelStatusResponse(BaseModel):
     models: Dict
     last_training: str = None
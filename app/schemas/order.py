@@ -1,11 +1,12 @@
 from datetime import datetime
 from enum import Enum
-from typing import List, Literal, Optional
+from typing import Iterable, List, Literal, Optional
 from uuid import UUID as PyUUID
 
-from pydantic import BaseModel, ConfigDict
+from pydantic import BaseModel, ConfigDict, TypeAdapter
 
-from app.models.order import OrderState
+from app.models.order import Order, OrderState
+from app.models.product import ProductCategory
 
 
 class OrderItemBase(BaseModel):
@@ -17,11 +18,27 @@ class OrderItemCreate(OrderItemBase):
     pass
 
 
+class OrderProductResponse(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
+    id: int
+    description: str
+    image_link: Optional[str] = None
+    category: ProductCategory
+
+
+class OrderUserResponse(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
+    email: str
+    company_name: str
+
+
 class OrderItemResponse(OrderItemBase):
     model_config = ConfigDict(from_attributes=True)
 
     id: int
-    product: Optional[dict] = None
+    product: Optional[OrderProductResponse] = None
 
 
 class OrderBase(BaseModel):
@@ -44,7 +61,16 @@ class OrderResponse(OrderBase):
     order_date: datetime
     state: OrderState
     order_items: List[OrderItemResponse] = []
-    user: Optional[dict] = None
+    user: Optional[OrderUserResponse] = None
+
+
+class QueueInfo(BaseModel):
+    pdf_job_id: str
+    message: str
+
+
+class PlacedOrderResponse(OrderResponse):
+    queue_info: Optional[QueueInfo] = None
 
 
 class OrderSummary(BaseModel):
@@ -66,6 +92,11 @@ class FailureType(str, Enum):
     EMAIL = "email"
 
 
+class ExportFormat(str, Enum):
+    NDJSON = "ndjson"
+    CSV = "csv"
+
+
 class FailureOrdersRequest(BaseModel):
     failure_type: FailureType = FailureType.ALL
     skip: int = 0
@@ -73,3 +104,21 @@ class FailureOrdersRequest(BaseModel):
 
     class Config:
         use_enum_values = True
+
+
+order_adapter = TypeAdapter(OrderResponse)
+order_list_adapter = TypeAdapter(List[OrderResponse])
+
+
+def serialize_order(order: Order) -> bytes:
+    """JSON for one ORM order, validated once straight from its attributes"""
+    return order_adapter.dump_json(
+        order_adapter.validate_python(order, from_attributes=True)
+    )
+
+
+def serialize_orders(orders: Iterable[Order]) -> bytes:
+    """JSON for a list of ORM orders (relationships should be eager-loaded)"""
+    return order_list_adapter.dump_json(
+        order_list_adapter.validate_python(list(orders), from_attributes=True)
+    )
@@ -4,6 +4,8 @@ from uuid import UUID
 
 from pydantic import BaseModel, EmailStr, Field
 
+from app.models.user import UserRoleEnum
+
 
 class RoleBase(BaseModel):
     name: str
@@ -75,6 +77,41 @@ class UserInDBBase(UserBase):
         from_attributes = True
 
 
+class RoleSnapshot(BaseModel):
+    name: str
+
+    class Config:
+        from_attributes = True
+
+
+class UserSnapshot(BaseModel):
+    """The user as authenticated requests see it (get_current_user), cached
+    between requests instead of loading the User row and its roles"""
+
+    id: str
+    email: str
+    company_name: str
+    is_active: bool
+    created_at: datetime
+    roles: List[RoleSnapshot] = []
+
+    class Config:
+        from_attributes = True
+
+    def has_role(self, role_name: str) -> bool:
+        return any(role.name == role_name for role in self.roles)
+
+    def is_admin(self) -> bool:
+        return self.has_role(UserRoleEnum.ADMIN.value)
+
+    def is_manager(self) -> bool:
+        return self.has_role(UserRoleEnum.MANAGER.value) or self.is_admin()
+
+    @property
+    def role_names(self) -> list[str]:
+        return [role.name for role in self.roles]
+
+
 # Auth
 class TokenData(BaseModel):
     company_name: Optional[str] = None
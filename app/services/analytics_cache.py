@@ -0,0 +1,70 @@
+import asyncio
+import os
+from typing import Optional
+
+from app.config.redis_config import get_async_redis_connection, get_redis_connection
+
+# Seconds a computed dashboard is served from Redis. Writes that change the
+# numbers bump the version instead of waiting for this; the TTL bounds how
+# stale it can get if a bump is lost (Redis down, key evicted).
+ANALYTICS_CACHE_TTL = int(os.getenv("ANALYTICS_CACHE_TTL", 60))
+ANALYTICS_CACHE_TIMEOUT = float(os.getenv("ANALYTICS_CACHE_TIMEOUT", 0.1))
+
+DASHBOARD_VERSION_KEY = "analytics:dashboard:version"
+DASHBOARD_KEY_PREFIX = "analytics:dashboard:v"
+
+
+async def get_dashboard_version() -> Optional[str]:
+    """Current version, None when Redis is unavailable (skip the cache)"""
+    try:
+        version = await asyncio.wait_for(
+            get_async_redis_connection().get(DASHBOARD_VERSION_KEY),
+            ANALYTICS_CACHE_TIMEOUT,
+        )
+    except Exception as e:
+        print(f"Analytics cache error: {e!r}")
+        return None
+    return version.decode() if version is not None else "0"
+
+
+async def get_cached_dashboard(version: str) -> Optional[bytes]:
+    try:
+        return await asyncio.wait_for(
+            get_async_redis_connection().get(f"{DASHBOARD_KEY_PREFIX}{version}"),
+            ANALYTICS_CACHE_TIMEOUT,
+        )
+    except Exception as e:
+        print(f"Analytics cache error: {e!r}")
+        return None
+
+
+async def set_cached_dashboard(version: str, body: bytes):
+    try:
+        await asyncio.wait_for(
+            get_async_redis_connection().set(
+                f"{DASHBOARD_KEY_PREFIX}{version}", body, ex=ANALYTICS_CACHE_TTL
+            ),
+            ANALYTICS_CACHE_TIMEOUT,
+        )
+    except Exception as e:
+        print(f"Analytics cache error: {e!r}")
+
+
+def invalidate_dashboard():
+    """Call after committing orders (or rollup changes); the next dashboard
+    request recomputes it"""
+    try:
+        get_redis_connection().incr(DASHBOARD_VERSION_KEY)
+    except Exception as e:
+        print(f"Analytics cache error: {e!r}")
+
+
+async def invalidate_dashboard_async():
+    """invalidate_dashboard for code running on the event loop"""
+    try:
+        await asyncio.wait_for(
+            get_async_redis_connection().incr(DASHBOARD_VERSION_KEY),
+            ANALYTICS_CACHE_TIMEOUT,
+        )
+    except Exception as e:
+        print(f"Analytics cache error: {e!r}")
@@ -1,10 +1,10 @@
 import os
 import sys
 
-from rq import Worker
 from rq.job import Job
 
 from app.config.logging_config import get_logger, setup_logging
+from app.config.prometheus_config import get_worker_class, mark_process_dead
 from app.config.redis_config import get_email_queue, get_redis_connection
 
 environment = os.getenv("ENVIRONMENT", "development")
@@ -24,7 +24,8 @@ def main():
         email_queue = get_email_queue()
         print(f"Listening to Email queue only")
 
-        worker = Worker([email_queue], connection=redis_conn)
+        worker_class = get_worker_class()
+        worker = worker_class([email_queue], connection=redis_conn)
         worker.push_exc_handler(handle_job_failure)
 
         print(f"Email Worker is ready and listening")
@@ -34,6 +35,8 @@ def main():
     except Exception as e:
         print(f"Email Worker error: {e}")
         sys.exit(1)
+    finally:
+        mark_process_dead()
 
 
 if __name__ == "__main__":
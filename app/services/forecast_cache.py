@@ -0,0 +1,36 @@
+import json
+import os
+from typing import Dict, Optional
+
+from app.config.redis_config import get_redis_connection
+
+# Seconds a forecast is served from Redis. Keys contain the model version and
+# the first forecast day, so a retrain or a new day never hits an old entry.
+FORECAST_CACHE_TTL = int(os.getenv("FORECAST_CACHE_TTL", 24 * 3600))
+
+FORECAST_KEY_PREFIX = "ml_forecast:"
+
+
+def get_forecast_key(
+    product_category: str, horizon: str, model_version: str, start_date: str
+) -> str:
+    return (
+        f"{FORECAST_KEY_PREFIX}{product_category}:{horizon}:"
+        f"{model_version}:{start_date}"
+    )
+
+
+def get_cached_forecast(key: str) -> Optional[Dict]:
+    try:
+        data = get_redis_connection().get(key)
+    except Exception as e:
+        print(f"Forecast cache error: {e!r}")
+        return None
+    return json.loads(data) if data is not None else None
+
+
+def set_cached_forecast(key: str, forecast: Dict):
+    try:
+        get_redis_connection().set(key, json.dumps(forecast), ex=FORECAST_CACHE_TTL)
+    except Exception as e:
+        print(f"Forecast cache error: {e!r}")
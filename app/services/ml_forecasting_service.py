@@ -1,13 +1,18 @@
 import json
+import multiprocessing
+import os
+import time
 import warnings
-from datetime import datetime, timedelta
-from typing import Dict, List, Optional, Tuple
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import date, datetime, timedelta
+from typing import Callable, Dict, List, Optional, Tuple
 
 import joblib
 import numpy as np
 import pandas as pd
-from sqlalchemy import desc, func
+from sqlalchemy import desc, func, insert
 from sqlalchemy.orm import Session
+from threadpoolctl import threadpool_limits
 
 warnings.filterwarnings("ignore")
 
@@ -20,63 +25,120 @@ from statsmodels.tsa.statespace.sarimax import SARIMAX
 from app.models.ml_models import Forecast, ModelMetadata, TrendAnalysis
 from app.models.order import Order, OrderItem
 from app.models.product import Product, ProductCategory
+from app.services.forecast_cache import (
+    get_cached_forecast,
+    get_forecast_key,
+    set_cached_forecast,
+)
+from app.services.ml_model_store import ModelStore, get_model_store
+
+HORIZON_DAYS = {"month": 30, "quarter": 90}
+HORIZONS = list(HORIZON_DAYS)
+
+FEATURE_COLUMNS = [
+    "day_of_week",
+    "day_of_month",
+    "month",
+    "quarter",
+    "days_since_start",
+    "seasonal_sin",
+    "seasonal_cos",
+]
+
+# Categories trained in parallel, one process each
+ML_TRAINING_WORKERS = int(os.getenv("ML_TRAINING_WORKERS", os.cpu_count() or 1))
+# BLAS/OpenMP threads per training process
+ML_TRAINING_BLAS_THREADS = int(os.getenv("ML_TRAINING_BLAS_THREADS", 1))
 
 
 class MLForecastingService:
-    def __init__(self, db_session: Session):
+    def __init__(
+        self,
+        db_session: Session,
+        read_session: Optional[Session] = None,
+        model_store: Optional[ModelStore] = None,
+    ):
         self.db = db_session
+        # Historical order data can come from a read replica (get_read_db);
+        # models, forecasts and trends are written through db_session
+        self.read_db = read_session or db_session
+        # Trained models are saved to the store; forecasts load the latest
+        # ones recorded in ModelMetadata (see _load_model)
+        self.model_store = model_store or get_model_store()
         self.models = {}
         self.model_version = datetime.now().strftime("%Y%m%d_%H%M%S")
 
-    def get_historical_data(
-        self, product_category: str, days_back: int = 365
-    ) -> pd.DataFrame:
-        cutoff_date = datetime.now() - timedelta(days=days_back)
+    def get_demand_matrix(self, days_back: int = 365) -> "DemandMatrix":
+        """Daily quantities of every category since `days_back` days ago, from
+        a single grouped query"""
+        today = datetime.now().date()
+        start = today - timedelta(days=days_back)
 
         query = (
-            self.db.query(
+            self.read_db.query(
                 func.date(Order.order_date).label("date"),
+                Product.category,
                 func.sum(OrderItem.quantity).label("total_quantity"),
             )
             .join(OrderItem, Order.id == OrderItem.order_id)
             .join(Product, OrderItem.product_id == Product.id)
-            .filter(Product.category == product_category)
-            .filter(Order.order_date >= cutoff_date)
-            .group_by(func.date(Order.order_date))
-            .order_by(func.date(Order.order_date))
+            .filter(Order.order_date >= datetime.combine(start, datetime.min.time()))
+            .group_by(func.date(Order.order_date), Product.category)
         )
+        rows = query.all()
+
+        quantities = np.zeros((days_back + 1, len(DemandMatrix.categories)), np.int64)
+        if rows:
+            dates, categories, totals = zip(*rows)
+            day_index = (
+                pd.to_datetime(list(dates)).values.astype("datetime64[D]")
+                - np.datetime64(start, "D")
+            ).astype(np.int64)
+            category_index = np.array(
+                [
+                    DemandMatrix.category_index[ProductCategory(c).value]
+                    for c in categories
+                ]
+            )
+            # Orders dated after today fall outside the matrix
+            in_range = day_index < len(quantities)
+            quantities[day_index[in_range], category_index[in_range]] = np.array(
+                totals
+            )[in_range]
 
-        df = pd.read_sql(query.statement, self.db.bind)
-
-        if df.empty:
-            return pd.DataFrame()
-
-        df["date"] = pd.to_datetime(df["date"])
-        df.set_index("date", inplace=True)
+        return DemandMatrix(start, quantities)
 
-        date_range = pd.date_range(start=df.index.min(), end=df.index.max(), freq="D")
-        df = df.reindex(date_range, fill_value=0)
+    def get_historical_data(
+        self, product_category: str, days_back: int = 365
+    ) -> pd.DataFrame:
+        return self.get_demand_matrix(days_back).series(product_category)
 
-        return df
+    def get_all_historical_data(self, days_back: int = 365) -> Dict[str, pd.DataFrame]:
+        """get_historical_data of every category that has orders"""
+        demand = self.get_demand_matrix(days_back)
+        frames = {category: demand.series(category) for category in demand.categories}
+        return {category: df for category, df in frames.items() if not df.empty}
 
     def prepare_features(self, df: pd.DataFrame) -> pd.DataFrame:
-        features_df = df.copy()
-        features_df["day_of_week"] = features_df.index.dayofweek
-        features_df["day_of_month"] = features_df.index.day
-        features_df["month"] = features_df.index.month
-        features_df["quarter"] = features_df.index.quarter
-        features_df["days_since_start"] = (
-            features_df.index - features_df.index.min()
-        ).days
-
-        features_df["seasonal_sin"] = np.sin(
-            2 * np.pi * features_df["days_since_start"] / 90
-        )
-        features_df["seasonal_cos"] = np.cos(
-            2 * np.pi * features_df["days_since_start"] / 90
-        )
+        days_since_start = (df.index - df.index.min()).days
+        return df.join(self._time_features(df.index, days_since_start))
 
-        return features_df
+    def _time_features(
+        self, index: pd.DatetimeIndex, days_since_start: np.ndarray
+    ) -> pd.DataFrame:
+        """The linear model's inputs (FEATURE_COLUMNS) for the days in `index`"""
+        return pd.DataFrame(
+            {
+                "day_of_week": index.dayofweek,
+                "day_of_month": index.day,
+                "month": index.month,
+                "quarter": index.quarter,
+                "days_since_start": days_since_start,
+                "seasonal_sin": np.sin(2 * np.pi * days_since_start / 90),
+                "seasonal_cos": np.cos(2 * np.pi * days_since_start / 90),
+            },
+            index=index,
+        )
 
     def train_sarima_model(self, df: pd.DataFrame, product_category: str) -> Dict:
         if len(df) < 90:
@@ -100,7 +162,10 @@ class MLForecastingService:
             rmse = np.sqrt(mean_squared_error(df["total_quantity"], fitted_values))
 
             model_key = f"sarima_{product_category}"
-            self.models[model_key] = fitted_model
+            # Forecast steps count from the day after the last training day
+            model_data = {"model": fitted_model, "end": df.index.max()}
+            self.model_store.save(model_key, self.model_version, model_data)
+            self.models[model_key] = model_data
 
             return {
                 "model_type": "SARIMA",
@@ -123,17 +188,7 @@ class MLForecastingService:
         try:
             features_df = self.prepare_features(df)
 
-            feature_cols = [
-                "day_of_week",
-                "day_of_month",
-                "month",
-                "quarter",
-                "days_since_start",
-                "seasonal_sin",
-                "seasonal_cos",
-            ]
-
-            X = features_df[feature_cols]
+            X = features_df[FEATURE_COLUMNS]
             y = features_df["total_quantity"]
 
             scaler = StandardScaler()
@@ -147,7 +202,10 @@ class MLForecastingService:
             rmse = np.sqrt(mean_squared_error(y, y_pred))
 
             model_key = f"linear_{product_category}"
-            self.models[model_key] = {"model": model, "scaler": scaler}
+            # Forecasts count days_since_start from the same day
+            model_data = {"model": model, "scaler": scaler, "start": df.index.min()}
+            self.model_store.save(model_key, self.model_version, model_data)
+            self.models[model_key] = model_data
 
             return {
                 "model_type": "Linear",
@@ -161,117 +219,278 @@ class MLForecastingService:
             return {"error": f"Linear model training failed: {str(e)}"}
 
     def generate_forecast(self, product_category: str, horizon: str) -> Dict:
-        days_ahead = 30 if horizon == "month" else 90
+        return self.generate_forecasts(product_category, [horizon])[horizon]
 
-        # Try SARIMA first, fall back to linear model if it fails
-        sarima_key = f"sarima_{product_category}"
-        linear_key = f"linear_{product_category}"
+    def generate_forecasts(
+        self, product_category: str, horizons: List[str] = HORIZONS
+    ) -> Dict[str, Dict]:
+        """Forecasts of one category for several horizons from a single model
+        run over the longest one"""
+        days_ahead = max(HORIZON_DAYS[horizon] for horizon in horizons)
 
-        if sarima_key in self.models:
-            return self._forecast_sarima(product_category, days_ahead, horizon)
-        elif linear_key in self.models:
-            return self._forecast_linear(product_category, days_ahead, horizon)
+        # Try SARIMA first, fall back to linear model if it fails
+        if self._load_model("SARIMA", product_category):
+            model_type, predict = "SARIMA", self._forecast_sarima
+        elif self._load_model("Linear", product_category):
+            model_type, predict = "Linear", self._forecast_linear
         else:
-            return {"error": "No trained model available for this category"}
-
-    def _forecast_sarima(
-        self, product_category: str, days_ahead: int, horizon: str
-    ) -> Dict:
-        model_key = f"sarima_{product_category}"
-        model = self.models[model_key]
+            error = {"error": "No trained model available for this category"}
+            return {horizon: error for horizon in horizons}
 
         try:
-            forecast = model.forecast(steps=days_ahead)
-            forecast_ci = model.get_forecast(steps=days_ahead).conf_int()
-
-            start_date = datetime.now().date() + timedelta(days=1)
-            dates = [start_date + timedelta(days=i) for i in range(days_ahead)]
-
-            predictions = []
-            for i, date in enumerate(dates):
-                predictions.append(
-                    {
-                        "date": date.isoformat(),
-                        "predicted_quantity": float(forecast.iloc[i]),
-                        "confidence_lower": float(forecast_ci.iloc[i, 0]),
-                        "confidence_upper": float(forecast_ci.iloc[i, 1]),
-                    }
-                )
-
-            self._save_forecasts(product_category, predictions, horizon)
+            forecast = predict(product_category, days_ahead)
+        except Exception as e:
+            error = {"error": f"{model_type} forecasting failed: {str(e)}"}
+            return {horizon: error for horizon in horizons}
 
-            return {
+        results = {}
+        for horizon in horizons:
+            predictions = forecast(HORIZON_DAYS[horizon])
+            self._save_forecasts(product_category, predictions, horizon, model_type)
+            results[horizon] = {
                 "status": "success",
-                "model_type": "SARIMA",
+                "model_type": model_type,
                 "horizon": horizon,
                 "predictions": predictions,
             }
+        return results
 
-        except Exception as e:
-            return {"error": f"SARIMA forecasting failed: {str(e)}"}
+    def generate_all_forecasts(
+        self, horizons: List[str] = HORIZONS
+    ) -> Dict[str, Dict[str, Dict]]:
+        """generate_forecasts for every category"""
+        return {
+            category.value: self.generate_forecasts(category.value, horizons)
+            for category in ProductCategory
+        }
+
+    def get_forecasts(
+        self, product_category: str, horizons: List[str] = HORIZONS
+    ) -> Dict[str, Dict]:
+        """Like generate_forecasts, but serves stored forecasts (Redis, then
+        the forecasts table) while they are fresh: made by the latest model
+        and starting tomorrow. So they are recomputed after a retrain, and
+        once a day for the new dates (the models skip the days since their
+        training data)."""
+        model_version = self._latest_model_version(product_category)
+        if model_version is None:
+            return self.generate_forecasts(product_category, horizons)
+
+        start_date = self._future_dates(1)[0].date()
+        keys = {
+            horizon: get_forecast_key(
+                product_category, horizon, model_version, start_date.isoformat()
+            )
+            for horizon in horizons
+        }
 
-    def _forecast_linear(
-        self, product_category: str, days_ahead: int, horizont: str
-    ) -> Dict:
-        model_key = f"linear_{product_category}"
-        model_data = self.models[model_key]
-        model = model_data["model"]
-        scaler = model_data["scaler"]
+        results = {}
+        for horizon in horizons:
+            forecast = get_cached_forecast(keys[horizon])
+            if forecast is None:
+                forecast = self._load_stored_forecast(
+                    product_category, horizon, model_version, start_date
+                )
+                if forecast is not None:
+                    set_cached_forecast(keys[horizon], forecast)
+            if forecast is not None:
+                results[horizon] = forecast
+
+        missing = [horizon for horizon in horizons if horizon not in results]
+        if missing:
+            forecasts = self.generate_forecasts(product_category, missing)
+            for horizon, forecast in forecasts.items():
+                # Cache only what the latest model made
+                if "error" not in forecast and self.model_version == model_version:
+                    set_cached_forecast(keys[horizon], forecast)
+            results.update(forecasts)
+
+        return {horizon: results[horizon] for horizon in horizons}
+
+    def get_all_forecasts(
+        self, horizons: List[str] = HORIZONS
+    ) -> Dict[str, Dict[str, Dict]]:
+        """get_forecasts for every category"""
+        return {
+            category.value: self.get_forecasts(category.value, horizons)
+            for category in ProductCategory
+        }
+
+    def _latest_model_version(self, product_category: str) -> Optional[str]:
+        return (
+            self.db.query(ModelMetadata.model_version)
+            .filter(
+                ModelMetadata.product_category == product_category,
+                ModelMetadata.model_path.isnot(None),
+            )
+            .order_by(desc(ModelMetadata.last_trained))
+            .limit(1)
+            .scalar()
+        )
 
-        try:
-            start_date = datetime.now().date() + timedelta(days=1)
-            dates = [start_date + timedelta(days=i) for i in range(days_ahead)]
-
-            future_features = []
-            for i, date in enumerate(dates):
-                dt = datetime.combine(date, datetime.min.time())
-                features = [
-                    dt.weekday(),
-                    dt.day,
-                    dt.month,
-                    dt.quarter,
-                    i + 1,
-                    np.sin(2 * np.pi * (i + 1) / 90),
-                    np.cos(2 * np.pi * (i + 1) / 90),
-                ]
-                future_features.append(features)
+    def _load_stored_forecast(
+        self, product_category: str, horizon: str, model_version: str, start_date: date
+    ) -> Optional[Dict]:
+        rows = (
+            self.db.query(Forecast)
+            .filter(
+                Forecast.product_category == product_category,
+                Forecast.horizon_type == horizon,
+                Forecast.model_version == model_version,
+            )
+            .order_by(Forecast.forecast_date)
+            .all()
+        )
+        # Rows from before model_type was stored cannot be served as they are
+        if (
+            len(rows) != HORIZON_DAYS[horizon]
+            or rows[0].forecast_date.date() != start_date
+            or rows[0].model_type is None
+        ):
+            return None
+
+        return {
+            "status": "success",
+            "model_type": rows[0].model_type,
+            "horizon": horizon,
+            "predictions": [
+                {
+                    "date": row.forecast_date.date().isoformat(),
+                    "predicted_quantity": row.predicted_quantity,
+                    "confidence_lower": row.confidence_lower,
+                    "confidence_upper": row.confidence_upper,
+                }
+                for row in rows
+            ],
+        }
+
+    def _load_model(self, model_name: str, product_category: str) -> bool:
+        """Put the latest stored model into self.models, unless this service
+        trained one itself"""
+        model_key = f"{model_name.lower()}_{product_category}"
+        if model_key in self.models:
+            if self._is_current(model_name, self.models[model_key]):
+                return True
+            del self.models[model_key]
+            self._request_retrain(model_key)
+            return False
+
+        metadata = (
+            self.db.query(ModelMetadata)
+            .filter(
+                ModelMetadata.product_category == product_category,
+                ModelMetadata.model_name == model_name,
+                ModelMetadata.model_path.isnot(None),
+            )
+            .order_by(desc(ModelMetadata.last_trained))
+            .first()
+        )
+        if metadata is None:
+            return False
 
-            X_future = np.array(future_features)
-            X_future_scaled = scaler.transform(X_future)
+        model = self.model_store.load(
+            model_key, metadata.model_version, metadata.model_path
+        )
+        if model is None:
+            print(f"Model file {metadata.model_path} is missing")
+            return False
+        if not self._is_current(model_name, model):
+            self._request_retrain(model_key)
+            return False
+
+        self.models[model_key] = model
+        # Forecasts record the version of the model that made them
+        self.model_version = metadata.model_version
+        return True
+
+    def _future_dates(self, days_ahead: int) -> pd.DatetimeIndex:
+        start_date = datetime.now().date() + timedelta(days=1)
+        return pd.date_range(start=start_date, periods=days_ahead, freq="D")
+
+    def _predictions(
+        self, dates: pd.DatetimeIndex, predicted, lower, upper
+    ) -> List[Dict]:
+        return pd.DataFrame(
+            {
+                "date": dates.strftime("%Y-%m-%d"),
+                "predicted_quantity": predicted,
+                "confidence_lower": lower,
+                "confidence_upper": upper,
+            }
+        ).to_dict("records")
 
-            predictions_raw = model.predict(X_future_scaled)
+    def _is_current(self, model_name: str, model_data) -> bool:
+        """Forecast dates are counted from the training days stored with the
+        model; models saved without them would be labelled wrongly"""
+        required = "end" if model_name == "SARIMA" else "start"
+        return isinstance(model_data, dict) and required in model_data
 
-            residual_std = np.std(predictions_raw) * 0.2  # simple confidence interval
+    def _request_retrain(self, model_key: str):
+        print(f"Model {model_key} predates the current format, retraining")
+        # Imported here: ml_tasks imports this module
+        from app.services.ml_tasks import enqueue_training
 
-            predictions = []
-            for i, date in enumerate(dates):
-                pred_value = max(0, predictions_raw[i])  # Ensure non-negative
-                predictions.append(
-                    {
-                        "date": date.isoformat(),
-                        "predicted_quantity": float(pred_value),
-                        "confidence_lower": float(
-                            max(0, pred_value - 1.96 * residual_std)
-                        ),
-                        "confidence_upper": float(pred_value + 1.96 * residual_std),
-                    }
-                )
+        try:
+            enqueue_training()
+        except Exception as e:
+            print(f"Could not queue training: {e!r}")
 
-            # Store in database
-            self._save_forecasts(product_category, predictions, horizon)
+    def _forecast_sarima(
+        self, product_category: str, days_ahead: int
+    ) -> Callable[[int], List[Dict]]:
+        """Forecast `days_ahead` days; returns the predictions for the first
+        n of them"""
+        model_data = self.models[f"sarima_{product_category}"]
+        model = model_data["model"]
+        dates = self._future_dates(days_ahead)
+        # Days between the last training day and tomorrow; the model is
+        # reused until the next retrain, so this grows daily
+        gap = max((dates[0] - model_data["end"]).days - 1, 0)
+
+        # Mean and interval from one forecast run
+        forecast = model.get_forecast(steps=gap + days_ahead)
+        predicted = np.asarray(forecast.predicted_mean, dtype=float)[gap:]
+        interval = np.asarray(forecast.conf_int(), dtype=float)[gap:]
+
+        def predictions(days: int) -> List[Dict]:
+            return self._predictions(
+                dates[:days], predicted[:days], interval[:days, 0], interval[:days, 1]
+            )
 
-            return {
-                "status": "success",
-                "model_type": "Linear",
-                "horizon": horizon,
-                "predictions": predictions,
-            }
+        return predictions
 
-        except Exception as e:
-            return {"error": f"Linear forecasting failed: {str(e)}"}
+    def _forecast_linear(
+        self, product_category: str, days_ahead: int
+    ) -> Callable[[int], List[Dict]]:
+        """Like _forecast_sarima, for the linear model"""
+        model_data = self.models[f"linear_{product_category}"]
+        model = model_data["model"]
+        scaler = model_data["scaler"]
+
+        dates = self._future_dates(days_ahead)
+        days_since_start = (dates - model_data["start"]).days.to_numpy()
+        X_future = self._time_features(dates, days_since_start)[FEATURE_COLUMNS]
+        predictions_raw = model.predict(scaler.transform(X_future))
+        predicted = np.maximum(predictions_raw, 0)  # Ensure non-negative
+
+        def predictions(days: int) -> List[Dict]:
+            # Simple confidence interval from the spread over the horizon
+            residual_std = np.std(predictions_raw[:days]) * 0.2
+            return self._predictions(
+                dates[:days],
+                predicted[:days],
+                np.maximum(predicted[:days] - 1.96 * residual_std, 0),
+                predicted[:days] + 1.96 * residual_std,
+            )
+
+        return predictions
 
     def _save_forecasts(
-        self, product_category: str, predictions: List[Dict], horizon: str
+        self,
+        product_category: str,
+        predictions: List[Dict],
+        horizon: str,
+        model_type: Optional[str] = None,
     ):
         try:
             self.db.query(Forecast).filter(
@@ -279,49 +498,56 @@ class MLForecastingService:
                 Forecast.horizon_type == horizon,
             ).delete()
 
-            for pred in predictions:
-                forecast = Forecast(
-                    product_category=product_category,
-                    forecast_date=datetime.fromisoformat(pred["date"]),
-                    predicted_quantity=pred["predicted_quantity"],
-                    confidence_lower=pred["confidence_lower"],
-                    confidence_upper=pred["confidence_upper"],
-                    horizon_type=horizon,
-                    model_version=self.model_version,
-                )
-                self.db.add(forecast)
+            # One multi-row insert for the 30-90 days
+            self.db.execute(
+                insert(Forecast),
+                [
+                    {
+                        "product_category": product_category,
+                        "forecast_date": datetime.fromisoformat(pred["date"]),
+                        "predicted_quantity": pred["predicted_quantity"],
+                        "confidence_lower": pred["confidence_lower"],
+                        "confidence_upper": pred["confidence_upper"],
+                        "horizon_type": horizon,
+                        "model_version": self.model_version,
+                        "model_type": model_type,
+                    }
+                    for pred in predictions
+                ],
+            )
 
             self.db.commit()
         except Exception as e:
             self.db.rollback()
             print(f"Error saving forecasts: {e}")
 
-    def calculate_trends(self, product_category: str, period_days: int) -> Dict:
+    def calculate_trends(
+        self,
+        product_category: str,
+        period_days: int,
+        demand: Optional["DemandMatrix"] = None,
+    ) -> Dict:
+        """Compare the last `period_days` days with the ones before.
 
+        Pass `demand` (get_demand_matrix) to compute several categories or
+        periods from one query.
+        """
         try:
             end_date = datetime.now()
-            start_date = end_date - timedelta(days=period_days)
-            comparison_start = start_date - timedelta(days=period_days)
-
-            current_query = (
-                self.db.query(func.sum(OrderItem.quantity))
-                .join(Order, OrderItem.order_id == Order.id)
-                .join(Product, OrderItem.product_id == Product.id)
-                .filter(Product.category == product_category)
-                .filter(Order.order_date >= start_date)
-                .filter(Order.order_date <= end_date)
+            # Whole days: the current period ends today, the previous one
+            # right before it
+            current_start = end_date.date() - timedelta(days=period_days - 1)
+            previous_start = current_start - timedelta(days=period_days)
+            start_date = datetime.combine(current_start, datetime.min.time())
+
+            if demand is None:
+                demand = self.get_demand_matrix(days_back=2 * period_days)
+            current_total = demand.total(
+                product_category, current_start, end_date.date() + timedelta(days=1)
             )
-            current_total = current_query.scalar() or 0
-
-            previous_query = (
-                self.db.query(func.sum(OrderItem.quantity))
-                .join(Order, OrderItem.order_id == Order.id)
-                .join(Product, OrderItem.product_id == Product.id)
-                .filter(Product.category == product_category)
-                .filter(Order.order_date >= comparison_start)
-                .filter(Order.order_date < start_date)
+            previous_total = demand.total(
+                product_category, previous_start, current_start
             )
-            previous_total = previous_query.scalar() or 0
 
             if previous_total == 0:
                 percentage_change = 100.0 if current_total > 0 else 0.0
@@ -368,27 +594,104 @@ class MLForecastingService:
             self.db.rollback()
             return {"error": f"Trend calculation failed: {str(e)}"}
 
-    def train_all_models(self) -> Dict:
+    def train_all_models(
+        self, on_progress: Optional[Callable[[str, Dict], None]] = None
+    ) -> Dict:
+        """Train both models for every category.
+
+        Categories are fitted in parallel, in up to ML_TRAINING_WORKERS
+        processes. `on_progress(category, progress)` is called when a
+        category starts and when it is done, with its status and timings in
+        seconds.
+        """
+        frames = self.get_all_historical_data()
         results = {}
 
+        def report(category: str, progress: Dict):
+            if on_progress:
+                on_progress(category, progress)
+
+        def finish(category: str, progress: Dict, trained: Dict):
+            sarima_result, linear_result = trained["sarima"], trained["linear"]
+            results[category] = {"sarima": sarima_result, "linear": linear_result}
+            self._save_model_metadata(category, sarima_result, linear_result)
+            progress.update(
+                status="done",
+                sarima=sarima_result.get("status", "failed"),
+                linear=linear_result.get("status", "failed"),
+                sarima_seconds=trained["sarima_seconds"],
+                linear_seconds=trained["linear_seconds"],
+                seconds=trained["seconds"],
+            )
+            report(category, progress)
+
+        to_train = []
         for category in ProductCategory:
-            category_results = {"sarima": None, "linear": None}
+            if category.value in frames:
+                to_train.append(category.value)
+            else:
+                results[category.value] = {
+                    "sarima": None,
+                    "linear": None,
+                    "error": "No historical data available",
+                }
+                report(category.value, {"status": "no_data", "seconds": 0.0})
+
+        workers = min(ML_TRAINING_WORKERS, len(to_train))
+        if workers > 1:
+            # spawn, not fork: children must not share the parent's database
+            # connections
+            with ProcessPoolExecutor(
+                max_workers=workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_limit_blas_threads,
+                initargs=(ML_TRAINING_BLAS_THREADS,),
+            ) as pool:
+                futures = {}
+                for category in to_train:
+                    future = pool.submit(
+                        _train_category_in_process,
+                        category,
+                        frames[category],
+                        self.model_version,
+                        self.model_store,
+                    )
+                    futures[future] = (category, self._training_progress())
+                    report(category, futures[future][1])
+                for future in as_completed(futures):
+                    category, progress = futures[future]
+                    finish(category, progress, future.result())
+        else:
+            for category in to_train:
+                progress = self._training_progress()
+                report(category, progress)
+                finish(
+                    category, progress, self._train_category(category, frames[category])
+                )
 
-            df = self.get_historical_data(category.value)
+        self.model_store.prune()
+        return {category.value: results[category.value] for category in ProductCategory}
 
-            if df.empty:
-                category_results["error"] = "No historical data available"
-            else:
-                sarima_result = self.train_sarima_model(df, category.value)
-                category_results["sarima"] = sarima_result
+    def _training_progress(self) -> Dict:
+        return {"status": "training", "started_at": datetime.now().isoformat()}
 
-                linear_result = self.train_linear_model(df, category.value)
-                category_results["linear"] = linear_result
+    def _train_category(self, product_category: str, df: pd.DataFrame) -> Dict:
+        """Fit both models for one category, with timings in seconds"""
+        started = time.perf_counter()
+        sarima_result = self.train_sarima_model(df, product_category)
+        sarima_seconds = time.perf_counter() - started
 
-                self._save_model_metadata(category.value, sarima_result, linear_result)
+        linear_started = time.perf_counter()
+        linear_result = self.train_linear_model(df, product_category)
+        linear_seconds = time.perf_counter() - linear_started
 
-            results[category.value] = category_results
-        return results
+        return {
+            "sarima": sarima_result,
+            "linear": linear_result,
+            "sarima_seconds": sarima_seconds,
+            "linear_seconds": linear_seconds,
+            "seconds": time.perf_counter() - started,
+        }
 
     def _save_model_metadata(
         self, category: str, sarima_result: Dict, linear_result: Dict
@@ -413,6 +716,10 @@ class MLForecastingService:
                         }
                     ),
                     is_active=True,
+                    model_version=self.model_version,
+                    model_path=self.model_store.relative_path(
+                        f"sarima_{category}", self.model_version
+                    ),
                 )
                 self.db.add(sarima_metadata)
 
@@ -429,6 +736,10 @@ class MLForecastingService:
                         }
                     ),
                     is_active="error" in sarima_result,
+                    model_version=self.model_version,
+                    model_path=self.model_store.relative_path(
+                        f"linear_{category}", self.model_version
+                    ),
                 )
                 self.db.add(linear_metadata)
 
@@ -436,3 +747,54 @@ class MLForecastingService:
         except Exception as e:
             self.db.rollback()
             print(f"Error saving model metadata: {e}")
+
+
+class DemandMatrix:
+    """Daily quantities as a dense matrix: one row per day from `start`, one
+    column per ProductCategory (see `categories`)"""
+
+    categories = [category.value for category in ProductCategory]
+    category_index = {category: i for i, category in enumerate(categories)}
+
+    def __init__(self, start: date, quantities: np.ndarray):
+        self.start = start
+        self.quantities = quantities
+
+    def column(self, product_category: str) -> np.ndarray:
+        return self.quantities[:, self.category_index[product_category]]
+
+    def series(self, product_category: str) -> pd.DataFrame:
+        """The days from the category's first to its last order, with 0 for
+        days without orders; empty if it has none"""
+        column = self.column(product_category)
+        ordered = np.flatnonzero(column)
+        if len(ordered) == 0:
+            return pd.DataFrame()
+
+        first, last = ordered[0], ordered[-1] + 1
+        dates = pd.date_range(
+            start=self.start + timedelta(days=int(first)),
+            periods=last - first,
+            freq="D",
+        )
+        return pd.DataFrame({"total_quantity": column[first:last]}, index=dates)
+
+    def total(self, product_category: str, start: date, end: date) -> int:
+        """Quantity ordered from `start` up to, not including, `end`"""
+        first = max((start - self.start).days, 0)
+        last = max((end - self.start).days, 0)
+        return int(self.column(product_category)[first:last].sum())
+
+
+def _limit_blas_threads(threads: int):
+    # One BLAS thread per worker by default: the pool already uses the cores
+    threadpool_limits(limits=threads)
+
+
+def _train_category_in_process(
+    product_category: str, df: pd.DataFrame, model_version: str, model_store: ModelStore
+) -> Dict:
+    """Worker side of train_all_models; fits without a database session"""
+    service = MLForecastingService(None, model_store=model_store)
+    service.model_version = model_version
+    return service._train_category(product_category, df)
@@ -0,0 +1,142 @@
+import io
+import os
+import shutil
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Optional, Tuple
+
+import joblib
+
+from app.config.redis_config import get_redis_connection
+
+# Fitted forecasting models, one directory per training run (model version):
+#     ML_MODEL_DIR/<model_version>/<model_key>.joblib
+# ModelMetadata.model_path points at the file relative to ML_MODEL_DIR.
+# Without a volume shared by the API and training hosts, ML_MODEL_REDIS
+# mirrors every model to Redis; a host missing the file fetches it from there.
+ML_MODEL_DIR = os.getenv("ML_MODEL_DIR", "ml_model_store")
+ML_MODEL_KEEP_VERSIONS = int(os.getenv("ML_MODEL_KEEP_VERSIONS", 3))
+ML_MODEL_CACHE_SIZE = int(os.getenv("ML_MODEL_CACHE_SIZE", 16))
+ML_MODEL_REDIS = os.getenv("ML_MODEL_REDIS", "false").lower() == "true"
+ML_MODEL_REDIS_TTL = int(os.getenv("ML_MODEL_REDIS_TTL", 7 * 24 * 3600))
+
+ML_MODEL_KEY_PREFIX = "ml_model:"
+
+
+class ModelStore:
+    """Versioned model files with an in-memory LRU of loaded models.
+
+    Models are immutable once saved (a retrain writes a new version), so
+    cached models never go stale; the LRU only bounds memory.
+    """
+
+    def __init__(
+        self,
+        directory: str = ML_MODEL_DIR,
+        cache_size: int = ML_MODEL_CACHE_SIZE,
+        use_redis: bool = ML_MODEL_REDIS,
+        redis_ttl: int = ML_MODEL_REDIS_TTL,
+    ):
+        self.directory = Path(directory)
+        self.cache_size = cache_size
+        self.use_redis = use_redis
+        self.redis_ttl = redis_ttl
+        self._models: "OrderedDict[Tuple[str, str], Any]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __getstate__(self):
+        # Sent to training processes: the settings, not the loaded models
+        state = self.__dict__.copy()
+        state["_models"] = OrderedDict()
+        del state["_lock"]
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+
+    def relative_path(self, model_key: str, model_version: str) -> str:
+        return f"{model_version}/{model_key}.joblib"
+
+    def _get_redis_key(self, relative_path: str) -> str:
+        return f"{ML_MODEL_KEY_PREFIX}{relative_path}"
+
+    def _cache(self, model_key: str, model_version: str, model: Any):
+        with self._lock:
+            self._models[(model_key, model_version)] = model
+            self._models.move_to_end((model_key, model_version))
+            while len(self._models) > self.cache_size:
+                self._models.popitem(last=False)
+
+    def _write_file(self, relative_path: str, data: bytes):
+        path = self.directory / relative_path
+        path.parent.mkdir(parents=True, exist_ok=True)
+        # Readers never see a partly written file
+        tmp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+        tmp_path.write_bytes(data)
+        os.replace(tmp_path, path)
+
+    def save(self, model_key: str, model_version: str, model: Any) -> str:
+        """Persist a fitted model; returns its path relative to the store"""
+        relative_path = self.relative_path(model_key, model_version)
+        buffer = io.BytesIO()
+        joblib.dump(model, buffer)
+        data = buffer.getvalue()
+
+        self._write_file(relative_path, data)
+        if self.use_redis:
+            try:
+                get_redis_connection().set(
+                    self._get_redis_key(relative_path), data, ex=self.redis_ttl
+                )
+            except Exception as e:
+                print(f"Model store error: {e!r}")
+
+        self._cache(model_key, model_version, model)
+        return relative_path
+
+    def load(
+        self, model_key: str, model_version: str, relative_path: str
+    ) -> Optional[Any]:
+        """The model from memory, disk or Redis; None if it is gone"""
+        with self._lock:
+            model = self._models.get((model_key, model_version))
+            if model is not None:
+                self._models.move_to_end((model_key, model_version))
+                return model
+
+        path = self.directory / relative_path
+        if path.exists():
+            model = joblib.load(path)
+        elif self.use_redis:
+            try:
+                data = get_redis_connection().get(self._get_redis_key(relative_path))
+            except Exception as e:
+                print(f"Model store error: {e!r}")
+                return None
+            if data is None:
+                return None
+            self._write_file(relative_path, data)
+            model = joblib.load(io.BytesIO(data))
+        else:
+            return None
+
+        self._cache(model_key, model_version, model)
+        return model
+
+    def prune(self, keep: int = ML_MODEL_KEEP_VERSIONS):
+        """Delete all but the newest `keep` versions from disk"""
+        if not self.directory.exists():
+            return
+        # Versions are timestamps, so name order is age order
+        versions = sorted(p for p in self.directory.iterdir() if p.is_dir())
+        for path in versions[:-keep] if keep > 0 else versions:
+            shutil.rmtree(path, ignore_errors=True)
+
+
+model_store = ModelStore()
+
+
+def get_model_store() -> ModelStore:
+    return model_store
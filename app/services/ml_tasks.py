@@ -0,0 +1,99 @@
+import os
+from contextlib import contextmanager
+from typing import Dict, Optional
+
+from redis.exceptions import WatchError
+from rq import get_current_job
+from rq.job import Job, JobStatus
+
+from app.config.database import SessionLocal
+from app.config.read_replicas import get_read_db
+from app.config.redis_config import get_ml_training_queue, get_redis_connection
+from app.services.ml_forecasting_service import MLForecastingService
+
+# Fitting SARIMA for every category can take many minutes
+ML_TRAINING_JOB_TIMEOUT = int(os.getenv("ML_TRAINING_JOB_TIMEOUT", 3600))
+# How long finished jobs (and their results) stay queryable
+ML_TRAINING_RESULT_TTL = int(os.getenv("ML_TRAINING_RESULT_TTL", 24 * 3600))
+
+CURRENT_TRAINING_JOB_KEY = "ml_training:current_job"
+
+
+def train_models_task() -> Dict:
+    """RQ job: train every category, reporting progress in job.meta"""
+    job = get_current_job()
+    job.meta["categories"] = {}
+    job.save_meta()
+
+    def on_progress(category: str, progress: Dict):
+        job.meta["categories"][category] = dict(progress)
+        job.save_meta()
+
+    db = SessionLocal()
+    try:
+        with contextmanager(get_read_db)() as read_db:
+            ml_service = MLForecastingService(db, read_db)
+            return ml_service.train_all_models(on_progress=on_progress)
+    finally:
+        db.close()
+
+
+def get_current_training_job() -> Optional[Job]:
+    """The training job that is still queued or running, if any"""
+    redis_conn = get_redis_connection()
+    job_id = redis_conn.get(CURRENT_TRAINING_JOB_KEY)
+    if job_id is None:
+        return None
+    try:
+        job = Job.fetch(job_id.decode(), connection=redis_conn)
+    except Exception:
+        return None
+    if job.get_status() in (JobStatus.QUEUED, JobStatus.STARTED):
+        return job
+    return None
+
+
+def _release_finished_training(redis_conn):
+    """Free the slot if its run is over, unless another caller claims it first"""
+    with redis_conn.pipeline() as pipe:
+        try:
+            pipe.watch(CURRENT_TRAINING_JOB_KEY)
+            if get_current_training_job() is None:
+                pipe.multi()
+                pipe.delete(CURRENT_TRAINING_JOB_KEY)
+                pipe.execute()
+        except WatchError:
+            pass
+
+
+def enqueue_training() -> Job:
+    """Queue a retrain, or return the one already queued or running.
+
+    Two concurrent runs would only fit the same models twice. The job is
+    saved before it claims the slot, so the slot never names a missing job.
+    """
+    redis_conn = get_redis_connection()
+    queue = get_ml_training_queue()
+    job = queue.create_job(
+        train_models_task,
+        timeout=ML_TRAINING_JOB_TIMEOUT,
+        result_ttl=ML_TRAINING_RESULT_TTL,
+        failure_ttl=ML_TRAINING_RESULT_TTL,
+    )
+    job.save()
+
+    while not redis_conn.set(
+        CURRENT_TRAINING_JOB_KEY, job.id, nx=True, ex=ML_TRAINING_JOB_TIMEOUT
+    ):
+        current_job = get_current_training_job()
+        if current_job is not None:
+            job.delete()
+            return current_job
+        _release_finished_training(redis_conn)
+
+    try:
+        return queue.enqueue_job(job)
+    except Exception:
+        redis_conn.delete(CURRENT_TRAINING_JOB_KEY)
+        job.delete()
+        raise
@@ -0,0 +1,35 @@
+import os
+import sys
+
+from app.config.logging_config import get_logger, setup_logging
+from app.config.prometheus_config import get_worker_class, mark_process_dead
+from app.config.redis_config import get_ml_training_queue, get_redis_connection
+
+environment = os.getenv("ENVIRONMENT", "development")
+setup_logging(environment)
+logger = get_logger(__name__)
+
+
+def main():
+    print("Starting ML training Worker")
+    try:
+        redis_conn = get_redis_connection()
+        ml_training_queue = get_ml_training_queue()
+        print("Listening to ML training queue only")
+
+        worker_class = get_worker_class()
+        worker = worker_class([ml_training_queue], connection=redis_conn)
+
+        print("ML training worker is ready and listening")
+        worker.work()
+    except KeyboardInterrupt:
+        print("ML training Worker interrupted by user")
+    except Exception as e:
+        print(f"ML training Worker error: {e}")
+        sys.exit(1)
+    finally:
+        mark_process_dead()
+
+
+if __name__ == "__main__":
+    main()
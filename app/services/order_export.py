@@ -0,0 +1,130 @@
+import csv
+import io
+import json
+from datetime import date
+from itertools import groupby
+from typing import Iterable, Iterator, List, Optional
+
+from sqlalchemy import Row
+
+from app.config.database import SessionLocal
+from app.crud import order as order_crud
+from app.models.order import OrderState
+from app.schemas.order import ExportFormat
+
+EXPORT_CHUNK_ROWS = 500
+
+CSV_COLUMNS = [
+    "order_id",
+    "user_email",
+    "company_name",
+    "order_date",
+    "state",
+    "item_id",
+    "product_id",
+    "quantity",
+    "product_description",
+    "product_category",
+]
+
+MEDIA_TYPES = {
+    ExportFormat.NDJSON: "application/x-ndjson",
+    ExportFormat.CSV: "text/csv",
+}
+
+
+def _enum_value(value):
+    return value.value if value is not None else None
+
+
+def _ndjson_lines(rows: Iterable[Row]) -> Iterator[str]:
+    for _, order_rows in groupby(rows, key=lambda row: row.order_id):
+        order_rows = list(order_rows)
+        first = order_rows[0]
+        order = {
+            "id": first.order_id,
+            "user_email": first.user_email,
+            "company_name": first.company_name,
+            "order_date": first.order_date.isoformat(),
+            "state": _enum_value(first.state),
+            "order_items": [
+                {
+                    "id": row.item_id,
+                    "product_id": row.product_id,
+                    "quantity": row.quantity,
+                    "product_description": row.product_description,
+                    "product_category": _enum_value(row.product_category),
+                }
+                for row in order_rows
+                if row.item_id is not None
+            ],
+        }
+        yield json.dumps(order, ensure_ascii=False) + "\n"
+
+
+def _csv_lines(rows: Iterable[Row]) -> Iterator[str]:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+
+    def flush() -> str:
+        line = buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+        return line
+
+    writer.writerow(CSV_COLUMNS)
+    yield flush()
+    for row in rows:
+        writer.writerow(
+            [
+                row.order_id,
+                row.user_email,
+                row.company_name,
+                row.order_date.isoformat(),
+                _enum_value(row.state),
+                row.item_id,
+                row.product_id,
+                row.quantity,
+                row.product_description,
+                _enum_value(row.product_category),
+            ]
+        )
+        yield flush()
+
+
+def _chunked(lines: Iterable[str], size: int = EXPORT_CHUNK_ROWS) -> Iterator[str]:
+    # Every chunk is one hop through the threadpool and one ASGI send
+    chunk = []
+    for line in lines:
+        chunk.append(line)
+        if len(chunk) >= size:
+            yield "".join(chunk)
+            chunk = []
+    if chunk:
+        yield "".join(chunk)
+
+
+def stream_orders_export(
+    export_format: ExportFormat,
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+    states: Optional[List[OrderState]] = None,
+) -> Iterator[str]:
+    """Export body generator.
+
+    It owns its session: request-scoped `get_db` sessions are closed before
+    a StreamingResponse starts iterating.
+    """
+    db = SessionLocal()
+    try:
+        rows = order_crud.stream_order_export_rows(
+            db, start_date=start_date, end_date=end_date, states=states
+        )
+        lines = (
+            _ndjson_lines(rows)
+            if export_format == ExportFormat.NDJSON
+            else _csv_lines(rows)
+        )
+        yield from _chunked(lines)
+    finally:
+        db.close()
@@ -0,0 +1,157 @@
+import asyncio
+import os
+import threading
+import time
+from typing import Dict, NamedTuple, Optional, Tuple
+
+from app.config.redis_config import get_async_redis_connection, get_redis_connection
+from app.core.http_cache import strong_etag
+
+# Seconds a worker trusts its copy of the catalog version before asking Redis
+# again, i.e. how long other workers may serve the catalog from before an
+# admin change. The worker that made the change sees it immediately.
+PRODUCT_CACHE_VERSION_CHECK_INTERVAL = float(
+    os.getenv("PRODUCT_CACHE_VERSION_CHECK_INTERVAL", 1)
+)
+# Upper bound on an entry's age, in memory and in Redis, in case a version
+# bump is lost while Redis is unreachable
+PRODUCT_CACHE_TTL = int(os.getenv("PRODUCT_CACHE_TTL", 3600))
+PRODUCT_CACHE_REDIS_TIMEOUT = float(os.getenv("PRODUCT_CACHE_REDIS_TIMEOUT", 0.1))
+# Cache-Control max-age for browsers and the CDN; they revalidate with the
+# ETag afterwards
+PRODUCT_CATALOG_MAX_AGE = int(os.getenv("PRODUCT_CATALOG_MAX_AGE", 0))
+
+PRODUCT_CATALOG_VERSION_KEY = "product_catalog:version"
+PRODUCT_CATALOG_KEY_PREFIX = "product_catalog:v"
+
+ALL_CATEGORIES = "all"
+
+
+class CatalogEntry(NamedTuple):
+    body: bytes
+    etag: str
+    created_at: float
+
+
+class ProductCatalogCache:
+    """Serialized `GET /products/` responses, one per category filter.
+
+    Entries belong to a catalog version, a counter in Redis that `invalidate`
+    bumps after every product change. When Redis is unavailable `get`
+    returns no version and the caller serves from the database.
+    """
+
+    def __init__(
+        self,
+        version_check_interval: float = PRODUCT_CACHE_VERSION_CHECK_INTERVAL,
+        ttl: int = PRODUCT_CACHE_TTL,
+        timeout: float = PRODUCT_CACHE_REDIS_TIMEOUT,
+    ):
+        self.version_check_interval = version_check_interval
+        self.ttl = ttl
+        self.timeout = timeout
+        # Entries for self._version only
+        self._entries: Dict[str, CatalogEntry] = {}
+        self._version: Optional[str] = None
+        self._version_checked_at = float("-inf")
+        # Admin routes invalidate from threadpool threads
+        self._lock = threading.Lock()
+
+    def _get_key(self, version: str, category: str) -> str:
+        return f"{PRODUCT_CATALOG_KEY_PREFIX}{version}:{category}"
+
+    async def _get_version(self, now: float) -> Optional[str]:
+        with self._lock:
+            if (
+                self._version is not None
+                and now - self._version_checked_at < self.version_check_interval
+            ):
+                return self._version
+
+        try:
+            version = await asyncio.wait_for(
+                get_async_redis_connection().get(PRODUCT_CATALOG_VERSION_KEY),
+                self.timeout,
+            )
+        except Exception as e:
+            print(f"Product cache error: {e!r}")
+            return None
+        version = version.decode() if version is not None else "0"
+
+        with self._lock:
+            if version != self._version:
+                self._entries.clear()
+                self._version = version
+            self._version_checked_at = now
+        return version
+
+    def _set_local(self, version: str, category: str, entry: CatalogEntry):
+        with self._lock:
+            # Skip results computed for a version that has since moved on
+            if version == self._version:
+                self._entries[category] = entry
+
+    async def get(self, category: str) -> Tuple[Optional[str], Optional[CatalogEntry]]:
+        """The current version and its entry for the category (None on a miss)"""
+        now = time.monotonic()
+        version = await self._get_version(now)
+        if version is None:
+            return None, None
+
+        with self._lock:
+            entry = self._entries.get(category)
+        if entry is not None and now - entry.created_at < self.ttl:
+            return version, entry
+
+        try:
+            body = await asyncio.wait_for(
+                get_async_redis_connection().get(self._get_key(version, category)),
+                self.timeout,
+            )
+        except Exception as e:
+            print(f"Product cache error: {e!r}")
+            return version, None
+        if body is None:
+            return version, None
+
+        entry = CatalogEntry(body, strong_etag(body), now)
+        self._set_local(version, category, entry)
+        return version, entry
+
+    async def set(
+        self, version: Optional[str], category: str, body: bytes
+    ) -> CatalogEntry:
+        entry = CatalogEntry(body, strong_etag(body), time.monotonic())
+        if version is None:
+            return entry
+
+        self._set_local(version, category, entry)
+        try:
+            await asyncio.wait_for(
+                get_async_redis_connection().set(
+                    self._get_key(version, category), body, ex=self.ttl
+                ),
+                self.timeout,
+            )
+        except Exception as e:
+            print(f"Product cache error: {e!r}")
+        return entry
+
+    def invalidate(self):
+        """Call after committing a product change"""
+        try:
+            version = str(get_redis_connection().incr(PRODUCT_CATALOG_VERSION_KEY))
+        except Exception as e:
+            print(f"Product cache error: {e!r}")
+            version = None
+        with self._lock:
+            self._entries.clear()
+            self._version = version
+            self._version_checked_at = time.monotonic()
+
+
+product_catalog_cache = ProductCatalogCache()
+
+
+def get_product_catalog_cache() -> ProductCatalogCache:
+    return product_catalog_cache
@@ -1,8 +1,17 @@
 import asyncio
 import os
+from datetime import datetime, timedelta
 from unittest.mock import patch
 
 import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.models.base import Base
+from app.models.order import Order, OrderItem
+from app.models.product import Product, ProductCategory
+from app.models.user import User
 
 
 @pytest.fixture(scope="session")
@@ -11,3 +20,33 @@ def event_loop():
     loop = asyncio.get_event_loop_policy().new_event_loop()
     yield loop
     loop.close()
+
+
+@pytest.fixture
+def forecast_db():
+    """In-memory database with 60 days of beef orders"""
+    engine = create_engine(
+        "sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool
+    )
+    Base.metadata.create_all(bind=engine)
+    session = sessionmaker(bind=engine, autoflush=False)()
+
+    product = Product(description="Rind Filet", category=ProductCategory.BEEF)
+    user = User(email="shop@example.com", company_name="Shop", hashed_password="x")
+    session.add_all([product, user])
+    session.flush()
+    # 60 days: enough for the linear model, too few for SARIMA
+    start = datetime.now() - timedelta(days=60)
+    for day in range(60):
+        session.add(
+            Order(
+                user_email=user.email,
+                order_date=start + timedelta(days=day),
+                order_items=[OrderItem(product_id=product.id, quantity=10 + day % 7)],
+            )
+        )
+    session.commit()
+
+    yield session
+    session.close()
+    engine.dispose()
@@ -0,0 +1,95 @@
+from datetime import date
+from unittest.mock import patch
+
+import redis.asyncio
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.config.database import get_async_db
+from app.config.read_replicas import get_async_read_db
+from app.config.redis_config import redis_url
+from app.routers import analytics as analytics_router
+from app.services import analytics_cache
+
+DASHBOARD = {
+    "total_quantity_per_product": [(1, 30), (2, 10)],
+    "average_quantity_per_order": 20.0,
+    "most_ordered_products": [(1, 30), (2, 10)],
+    "least_ordered_products": [(2, 10), (1, 30)],
+    "product_order_frequency": [(1, 2), (2, 1)],
+    "top_customers_by_quantity": [("shop@example.com", 40)],
+    "customer_order_frequency": [("shop@example.com", 2)],
+    "order_time_distribution": [(date(2024, 1, 1), 2)],
+}
+
+
+class FakeAsyncSession:
+    calls = 0
+
+    async def run_sync(self, fn, *args, **kwargs):
+        FakeAsyncSession.calls += 1
+        return DASHBOARD
+
+
+class LaggingReplicaSession:
+    """A replica that has not seen the latest order yet"""
+
+    async def run_sync(self, fn, *args, **kwargs):
+        return {**DASHBOARD, "top_customers_by_quantity": [("shop@example.com", 30)]}
+
+
+def create_test_app():
+    app = FastAPI()
+    app.include_router(analytics_router.router)
+    app.dependency_overrides[get_async_db] = FakeAsyncSession
+    app.dependency_overrides[get_async_read_db] = LaggingReplicaSession
+    for route in analytics_router.router.routes:
+        for dependency in route.dependencies:
+            app.dependency_overrides[dependency.dependency] = lambda: None
+    return app
+
+
+def test_dashboard_is_cached_until_an_order_bumps_the_version():
+    FakeAsyncSession.calls = 0
+    analytics_cache.invalidate_dashboard()
+    # A client for this test's event loop
+    async_redis = redis.asyncio.from_url(redis_url)
+
+    with patch.object(
+        analytics_cache, "get_async_redis_connection", lambda: async_redis
+    ), TestClient(create_test_app()) as client:
+        response = client.get("/analytics/dashboard")
+        assert response.status_code == 200
+        assert response.json()["top_customers_by_quantity"] == [
+            {"user_email": "shop@example.com", "total_kg": 40.0}
+        ]
+        assert response.headers["cache-control"] == "private, no-cache"
+        etag = response.headers["etag"]
+
+        response = client.get("/analytics/dashboard", headers={"If-None-Match": etag})
+        assert response.status_code == 304
+        assert response.content == b""
+        assert FakeAsyncSession.calls == 1
+
+        analytics_cache.invalidate_dashboard()
+        response = client.get("/analytics/dashboard", headers={"If-None-Match": etag})
+        assert FakeAsyncSession.calls == 2
+        # Same numbers, so the client's copy is still valid
+        assert response.status_code == 304
+
+
+def test_dashboard_cached_after_an_order_is_not_read_from_a_lagging_replica():
+    analytics_cache.invalidate_dashboard()
+    async_redis = redis.asyncio.from_url(redis_url)
+
+    with patch.object(
+        analytics_cache, "get_async_redis_connection", lambda: async_redis
+    ), TestClient(create_test_app()) as client:
+        # An order was just committed on the primary and bumped the version
+        analytics_cache.invalidate_dashboard()
+        client.get("/analytics/dashboard")
+        response = client.get("/analytics/dashboard")
+
+    assert response.json()["top_customers_by_quantity"] == [
+        {"user_email": "shop@example.com", "total_kg": 40.0}
+    ]
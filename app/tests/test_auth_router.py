@@ -5,10 +5,12 @@ from datetime import datetime, timezone
 import pytest
 from fastapi.testclient import TestClient
 from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import NullPool
 
 from app.auth.core import COOKIE_NAME, get_password_hash
-from app.config.database import get_db
+from app.config.database import get_async_db, get_db
 from app.main import app
 from app.models.base import Base
 from app.models.user import User
@@ -20,6 +22,11 @@ warnings.filterwarnings("ignore", category=DeprecationWarning)
 SQLITE_DATABASE_URL = "sqlite:///./test_grunland.db"
 engine = create_engine(SQLITE_DATABASE_URL, connect_args={"check_same_thread": False})
 TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+# NullPool: every TestClient request runs on a fresh event loop
+async_engine = create_async_engine(
+    "sqlite+aiosqlite:///./test_grunland.db", poolclass=NullPool
+)
+TestingAsyncSessionLocal = async_sessionmaker(async_engine, expire_on_commit=False)
 
 
 # Dependency override for get_db
@@ -31,7 +38,13 @@ def override_get_db():
         db.close()
 
 
+async def override_get_async_db():
+    async with TestingAsyncSessionLocal() as db:
+        yield db
+
+
 app.dependency_overrides[get_db] = override_get_db
+app.dependency_overrides[get_async_db] = override_get_async_db
 
 
 # ----------------------------
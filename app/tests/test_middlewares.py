@@ -0,0 +1,135 @@
+import logging
+import queue
+import time
+from unittest.mock import patch
+
+from fastapi import FastAPI
+from fastapi.responses import StreamingResponse
+from fastapi.staticfiles import StaticFiles
+from fastapi.testclient import TestClient
+
+from app.config.logging_config import _QueueHandler
+from app.middleware.logging_middleware import LoggingMiddleware
+from app.middleware.prometheus_middleware import REQUEST_COUNTS, PrometheusMiddleware
+
+
+def create_test_app(**prometheus_options):
+    app = FastAPI()
+    app.add_middleware(LoggingMiddleware)
+    app.add_middleware(PrometheusMiddleware, **prometheus_options)
+    app.mount("/static", StaticFiles(directory="app/static"), name="static")
+
+    @app.get("/stream")
+    def stream():
+        return StreamingResponse((f"{i}\n" for i in range(3)), media_type="text/plain")
+
+    @app.get("/items/{item_id}")
+    def item(item_id: int):
+        return {"id": item_id}
+
+    @app.get("/users/{email}")
+    def user(email: str):
+        return {"email": email}
+
+    return app
+
+
+def request_count(endpoint, status_code=200, method="GET"):
+    return REQUEST_COUNTS.labels(
+        method=method, endpoint=endpoint, status_code=status_code
+    )._value.get()
+
+
+def test_streaming_response_passes_through_middlewares():
+    counter = REQUEST_COUNTS.labels(method="GET", endpoint="/stream", status_code=200)
+    before = counter._value.get()
+
+    with TestClient(create_test_app()).stream("GET", "/stream") as response:
+        chunks = list(response.iter_text())
+
+    assert "".join(chunks) == "0\n1\n2\n"
+    assert response.headers["X-Request-ID"]
+    assert counter._value.get() == before + 1
+
+
+def test_endpoint_label_is_the_route_template():
+    client = TestClient(create_test_app())
+    items_before = request_count("/items/{item_id}")
+    static_before = request_count("/static", status_code=404)
+    other_before = request_count("other", status_code=404)
+
+    for item_id in range(3):
+        client.get(f"/items/{item_id}")
+    client.get("/static/does-not-exist.png")
+    client.get("/wp-login.php")
+
+    assert request_count("/items/{item_id}") == items_before + 3
+    assert request_count("/static", status_code=404) == static_before + 1
+    assert request_count("other", status_code=404) == other_before + 1
+    assert request_count("/items/0") == 0
+
+
+def test_endpoint_labels_are_capped():
+    client = TestClient(create_test_app(max_endpoint_labels=1))
+    other_before = request_count("other")
+
+    client.get("/items/1")
+    client.get("/users/a@example.com")
+
+    assert request_count("other") == other_before + 1
+
+
+def test_logging_samples_successful_requests():
+    app = FastAPI()
+    app.add_middleware(LoggingMiddleware, sample_rate=0.0, slow_request_ms=50)
+
+    @app.get("/ok")
+    def ok():
+        return {}
+
+    @app.get("/slow")
+    def slow():
+        time.sleep(0.06)
+        return {}
+
+    @app.get("/fail")
+    def fail():
+        raise RuntimeError("fail")
+
+    client = TestClient(app, raise_server_exceptions=False)
+    with patch("app.middleware.logging_middleware.logger") as logger:
+        assert client.get("/ok").headers["X-Request-ID"]
+        assert not logger.info.called
+
+        client.get("/slow")
+        assert logger.warning.call_args.args == ("Slow request",)
+
+        client.get("/fail")
+        assert logger.error.call_args.args == ("Request failed",)
+        assert logger.error.call_args.kwargs["exc_info"] is True
+
+
+def test_stdlib_records_are_formatted_when_logged():
+    log_queue = queue.SimpleQueue()
+    logger = logging.getLogger("test_stdlib_records")
+    logger.propagate = False
+    logger.addHandler(_QueueHandler(log_queue, include_location=True))
+
+    items = ["a"]
+    logger.warning("items: %s", items)
+    items.append("b")  # after the call, before the writer renders it
+    try:
+        raise ValueError("boom")
+    except ValueError:
+        logger.exception("failed")
+
+    event = log_queue.get_nowait()
+    assert event["event"] == "items: ['a']"
+    assert event["level"] == "warning"
+    assert event["function"] == "test_stdlib_records_are_formatted_when_logged"
+    assert event["module"] == "test_middlewares"
+    assert isinstance(event["line"], int)
+
+    event = log_queue.get_nowait()
+    assert "exc_info" not in event
+    assert "ValueError: boom" in event["exception"]
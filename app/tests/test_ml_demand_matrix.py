@@ -0,0 +1,58 @@
+from datetime import datetime, timedelta
+
+from app.models.order import Order, OrderItem
+from app.models.product import Product, ProductCategory
+from app.services.ml_forecasting_service import MLForecastingService
+
+BEEF = ProductCategory.BEEF.value
+LAMB = ProductCategory.LAMB.value
+
+
+def add_lamb_orders(session, days_ago, quantity):
+    lamb = Product(description="Lammkeule", category=ProductCategory.LAMB)
+    session.add(lamb)
+    session.flush()
+    for day in days_ago:
+        session.add(
+            Order(
+                user_email="shop@example.com",
+                order_date=datetime.now() - timedelta(days=day),
+                order_items=[OrderItem(product_id=lamb.id, quantity=quantity)],
+            )
+        )
+    session.commit()
+
+
+def test_demand_matrix_holds_daily_totals_per_category(forecast_db):
+    add_lamb_orders(forecast_db, days_ago=[3, 3, 10], quantity=4)
+    service = MLForecastingService(forecast_db)
+
+    demand = service.get_demand_matrix(days_back=365)
+
+    assert demand.quantities.shape == (366, len(ProductCategory))
+    assert demand.column(BEEF).sum() == sum(10 + day % 7 for day in range(60))
+    assert demand.column(LAMB)[-4] == 8  # both orders of three days ago
+    assert demand.column(ProductCategory.VEAL.value).sum() == 0
+
+    beef = service.get_historical_data(BEEF)
+    assert len(beef) == 60
+    assert beef["total_quantity"].iloc[0] == 10
+    lamb = service.get_all_historical_data()[LAMB]
+    # Days without orders in between are 0
+    assert list(lamb["total_quantity"]) == [4] + [0] * 6 + [8]
+    assert ProductCategory.VEAL.value not in service.get_all_historical_data()
+
+
+def test_trends_compare_whole_day_periods(forecast_db):
+    # 30 days ago is the previous period, 29 days ago the current one
+    add_lamb_orders(forecast_db, days_ago=[0, 29, 30, 30], quantity=5)
+    service = MLForecastingService(forecast_db)
+
+    result = service.calculate_trends(LAMB, 30)
+
+    assert result["current_period_total"] == 10
+    assert result["previous_period_total"] == 10
+    assert result["trend_direction"] == "stable"
+
+    demand = service.get_demand_matrix(days_back=60)
+    assert service.calculate_trends(LAMB, 30, demand) == result
@@ -0,0 +1,220 @@
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+from unittest.mock import patch
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from app.models.ml_models import Forecast, ModelMetadata
+from app.models.product import ProductCategory
+from app.services import ml_forecasting_service
+from app.services.ml_forecasting_service import FEATURE_COLUMNS, MLForecastingService
+from app.services.ml_model_store import ModelStore
+
+CATEGORY = ProductCategory.BEEF.value
+
+
+def test_batch_forecasts_every_category_and_horizon(forecast_db, tmp_path):
+    MLForecastingService(
+        forecast_db, model_store=ModelStore(tmp_path)
+    ).train_all_models()
+    service = MLForecastingService(forecast_db, model_store=ModelStore(tmp_path))
+
+    forecasts = service.generate_all_forecasts()
+
+    assert set(forecasts) == {category.value for category in ProductCategory}
+    month, quarter = forecasts[CATEGORY]["month"], forecasts[CATEGORY]["quarter"]
+    assert month["model_type"] == quarter["model_type"] == "Linear"
+    assert len(month["predictions"]) == 30
+    assert len(quarter["predictions"]) == 90
+    tomorrow = (datetime.now().date() + timedelta(days=1)).isoformat()
+    assert month["predictions"][0]["date"] == tomorrow
+    assert [p["predicted_quantity"] for p in month["predictions"]] == pytest.approx(
+        [p["predicted_quantity"] for p in quarter["predictions"][:30]]
+    )
+    assert forecasts[ProductCategory.LAMB.value]["month"] == {
+        "error": "No trained model available for this category"
+    }
+    assert forecast_db.query(Forecast).count() == 30 + 90
+
+    # The same forecast as one category and horizon at a time
+    single = MLForecastingService(
+        forecast_db, model_store=ModelStore(tmp_path)
+    ).generate_forecast(CATEGORY, "month")
+    assert [p["predicted_quantity"] for p in single["predictions"]] == pytest.approx(
+        [p["predicted_quantity"] for p in month["predictions"]]
+    )
+
+
+def test_linear_forecast_continues_the_training_days(forecast_db, tmp_path):
+    service = MLForecastingService(forecast_db, model_store=ModelStore(tmp_path))
+    df = service.get_historical_data(CATEGORY)
+    service.train_linear_model(df, CATEGORY)
+
+    predictions = service.generate_forecast(CATEGORY, "month")["predictions"]
+
+    # Features of the training days extended up to the forecast days
+    dates = pd.date_range(start=df.index.min(), end=predictions[-1]["date"], freq="D")
+    extended = pd.DataFrame({"total_quantity": 0}, index=dates)
+    features = service.prepare_features(extended)[FEATURE_COLUMNS].iloc[-30:]
+    model_data = service.models[f"linear_{CATEGORY}"]
+    expected = model_data["model"].predict(model_data["scaler"].transform(features))
+    assert [p["predicted_quantity"] for p in predictions] == pytest.approx(
+        np.maximum(expected, 0)
+    )
+
+
+def fake_sarima(end, calls):
+    """A fitted SARIMA model whose forecast for step n is n (the number of
+    days after its last training day `end`)"""
+
+    def get_forecast(steps):
+        calls.append(steps)
+        mean = np.arange(1, steps + 1, dtype=float)
+        return SimpleNamespace(
+            predicted_mean=pd.Series(mean),
+            conf_int=lambda: pd.DataFrame({"lower": mean - 1, "upper": mean + 1}),
+        )
+
+    return {"model": SimpleNamespace(get_forecast=get_forecast), "end": end}
+
+
+def test_sarima_forecast_runs_the_model_once(forecast_db):
+    calls = []
+    service = MLForecastingService(forecast_db)
+    today = pd.Timestamp(datetime.now().date())
+    service.models[f"sarima_{CATEGORY}"] = fake_sarima(today, calls)
+
+    forecasts = service.generate_forecasts(CATEGORY)
+
+    assert calls == [90]
+    assert forecasts["month"]["model_type"] == "SARIMA"
+    assert forecasts["month"]["predictions"][1] == {
+        "date": (datetime.now().date() + timedelta(days=2)).isoformat(),
+        "predicted_quantity": 2.0,
+        "confidence_lower": 1.0,
+        "confidence_upper": 3.0,
+    }
+    assert len(forecasts["quarter"]["predictions"]) == 90
+
+
+def test_sarima_forecast_skips_the_days_since_training(forecast_db):
+    calls = []
+    service = MLForecastingService(forecast_db)
+    # Trained on data up to 5 days ago: tomorrow is step 6
+    end = pd.Timestamp(datetime.now().date() - timedelta(days=5))
+    service.models[f"sarima_{CATEGORY}"] = fake_sarima(end, calls)
+
+    predictions = service.generate_forecast(CATEGORY, "month")["predictions"]
+
+    assert calls == [5 + 30]
+    assert len(predictions) == 30
+    tomorrow = datetime.now().date() + timedelta(days=1)
+    assert predictions[0]["date"] == tomorrow.isoformat()
+    assert predictions[0]["predicted_quantity"] == 6.0
+    assert predictions[-1]["predicted_quantity"] == 35.0
+
+
+def test_models_without_training_days_are_retrained(forecast_db):
+    service = MLForecastingService(forecast_db)
+    # Formats without "end" / "start": their forecast dates would be wrong
+    service.models[f"sarima_{CATEGORY}"] = fake_sarima(None, [])["model"]
+    service.models[f"linear_{CATEGORY}"] = {"model": None, "scaler": None}
+
+    with patch("app.services.ml_tasks.enqueue_training") as enqueue:
+        forecast = service.generate_forecast(CATEGORY, "month")
+
+    assert forecast == {"error": "No trained model available for this category"}
+    assert service.models == {}
+    assert enqueue.call_count == 2
+
+
+def test_stored_forecasts_are_served_until_a_retrain(forecast_db, tmp_path):
+    cache = {}
+    store = ModelStore(tmp_path)
+    MLForecastingService(forecast_db, model_store=store).train_all_models()
+
+    def forecasts(category=CATEGORY):
+        service = MLForecastingService(forecast_db, model_store=store)
+        with patch.object(
+            service, "generate_forecasts", wraps=service.generate_forecasts
+        ) as generate, patch.object(
+            ml_forecasting_service, "get_cached_forecast", cache.get
+        ), patch.object(
+            ml_forecasting_service, "set_cached_forecast", cache.__setitem__
+        ):
+            return service.get_forecasts(category), generate.call_count
+
+    computed, calls = forecasts()
+    assert calls == 1
+    assert len(cache) == 2
+    assert forecast_db.query(Forecast).filter_by(model_type="Linear").count() == 120
+
+    # Redis, then the forecasts table
+    assert forecasts() == (computed, 0)
+    cache.clear()
+    stored, calls = forecasts()
+    assert calls == 0
+    assert stored["quarter"]["predictions"] == pytest.approx(
+        computed["quarter"]["predictions"]
+    )
+
+    # A retrain makes a new model version
+    with patch.object(ml_forecasting_service, "datetime", wraps=datetime) as clock:
+        clock.now.return_value = datetime.now() + timedelta(seconds=1)
+        trainer = MLForecastingService(forecast_db, model_store=store)
+    trainer.train_all_models()
+    assert forecasts()[1] == 1
+    assert len(cache) == 4
+
+    # Errors are not cached
+    assert "error" in forecasts(ProductCategory.LAMB.value)[0]["month"]
+    assert len(cache) == 4
+
+
+def test_stored_sarima_forecast_stays_aligned_on_later_days(forecast_db):
+    cache = {}
+    forecast_db.add(
+        ModelMetadata(
+            model_name="SARIMA",
+            product_category=CATEGORY,
+            training_data_points=90,
+            model_version="v1",
+            model_path="v1/sarima_Rind.joblib",
+        )
+    )
+    forecast_db.commit()
+    # Trained on data up to 3 days ago
+    end = pd.Timestamp(datetime.now().date() - timedelta(days=3))
+    tomorrow = datetime.now().date() + timedelta(days=1)
+
+    def month_forecast(days_later=0):
+        service = MLForecastingService(forecast_db)
+        service.models[f"sarima_{CATEGORY}"] = fake_sarima(end, [])
+        service.model_version = "v1"
+        start = tomorrow + timedelta(days=days_later)
+        with patch.object(
+            service,
+            "_future_dates",
+            lambda days: pd.date_range(start=start, periods=days, freq="D"),
+        ), patch.object(
+            ml_forecasting_service, "get_cached_forecast", cache.get
+        ), patch.object(
+            ml_forecasting_service, "set_cached_forecast", cache.__setitem__
+        ):
+            return service.get_forecasts(CATEGORY, ["month"])["month"]
+
+    first = month_forecast()["predictions"][0]
+    assert first["date"] == tomorrow.isoformat()
+    assert first["predicted_quantity"] == 4.0  # 4 days after the training data
+
+    # The next day: recomputed for the new dates, not the same values shifted
+    first = month_forecast(days_later=1)["predictions"][0]
+    assert first["date"] == (tomorrow + timedelta(days=1)).isoformat()
+    assert first["predicted_quantity"] == 5.0
+    assert len(cache) == 2
+
+    stored = forecast_db.query(Forecast).order_by(Forecast.forecast_date).first()
+    assert stored.forecast_date.date() == tomorrow + timedelta(days=1)
+    assert stored.predicted_quantity == 5.0
@@ -0,0 +1,56 @@
+import numpy as np
+import pytest
+
+from app.models.ml_models import ModelMetadata
+from app.models.product import ProductCategory
+from app.services.ml_forecasting_service import MLForecastingService
+from app.services.ml_model_store import ModelStore
+
+CATEGORY = ProductCategory.BEEF.value
+
+
+def test_trained_models_are_stored_and_loaded_by_a_new_service(forecast_db, tmp_path):
+    store = ModelStore(directory=tmp_path, use_redis=True)
+    trainer = MLForecastingService(forecast_db, model_store=store)
+    results = trainer.train_all_models()
+    assert results[CATEGORY]["linear"]["status"] == "success"
+
+    metadata = (
+        forecast_db.query(ModelMetadata).filter_by(product_category=CATEGORY).one()
+    )
+    assert metadata.model_name == "Linear"
+    assert metadata.model_version == trainer.model_version
+    assert (tmp_path / metadata.model_path).exists()
+
+    # A later request: no models of its own, the stored one from the LRU
+    service = MLForecastingService(forecast_db, model_store=store)
+    assert service._load_model("Linear", CATEGORY)
+    assert service.models[f"linear_{CATEGORY}"] is trainer.models[f"linear_{CATEGORY}"]
+    assert service.model_version == trainer.model_version
+    assert not service._load_model("SARIMA", CATEGORY)
+
+    # Another host without the file (or a restart) falls back to Redis
+    (tmp_path / metadata.model_path).unlink()
+    other_host = MLForecastingService(
+        forecast_db, model_store=ModelStore(directory=tmp_path, use_redis=True)
+    )
+    assert other_host._load_model("Linear", CATEGORY)
+    model_data = other_host.models[f"linear_{CATEGORY}"]
+    X = np.ones((1, 7))
+    assert model_data["model"].predict(X) == pytest.approx(
+        trainer.models[f"linear_{CATEGORY}"]["model"].predict(X)
+    )
+    assert (tmp_path / metadata.model_path).exists()
+
+
+def test_prune_keeps_the_newest_versions(tmp_path):
+    store = ModelStore(directory=tmp_path)
+    for version in ["20240101_000000", "20240102_000000", "20240103_000000"]:
+        store.save("linear_Rind", version, {"model": None})
+
+    store.prune(keep=2)
+
+    assert sorted(p.name for p in tmp_path.iterdir()) == [
+        "20240102_000000",
+        "20240103_000000",
+    ]
@@ -0,0 +1,152 @@
+from datetime import datetime
+from types import SimpleNamespace
+from unittest.mock import patch
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from rq.exceptions import NoSuchJobError
+from rq.job import JobStatus
+
+from app.models.ml_models import ModelMetadata
+from app.models.order import Order, OrderItem
+from app.models.product import Product, ProductCategory
+from app.routers import ml_router
+from app.services import ml_forecasting_service, ml_tasks
+from app.services.ml_forecasting_service import MLForecastingService
+from app.services.ml_model_store import ModelStore
+
+CATEGORY = ProductCategory.BEEF.value
+
+
+def create_test_app():
+    app = FastAPI()
+    app.include_router(ml_router.router)
+    for route in ml_router.router.routes:
+        for dependency in route.dependencies:
+            app.dependency_overrides[dependency.dependency] = lambda: None
+    return app
+
+
+def test_training_task_reports_progress_per_category(forecast_db, tmp_path):
+    snapshots = []
+    job = SimpleNamespace(meta={})
+    job.save_meta = lambda: snapshots.append(
+        {category: dict(p) for category, p in job.meta["categories"].items()}
+    )
+
+    def get_test_read_db():
+        yield forecast_db
+
+    with patch.object(ml_tasks, "get_current_job", lambda: job), patch.object(
+        ml_tasks, "SessionLocal", lambda: forecast_db
+    ), patch.object(ml_tasks, "get_read_db", get_test_read_db), patch.object(
+        ml_forecasting_service, "get_model_store", lambda: ModelStore(tmp_path)
+    ):
+        results = ml_tasks.train_models_task()
+
+    assert results[CATEGORY]["linear"]["status"] == "success"
+    # Categories with data are reported when they start and when they are
+    # done, the others once
+    assert len(snapshots) == 1 + len(ProductCategory) + 1
+    assert any(s.get(CATEGORY, {}).get("status") == "training" for s in snapshots)
+
+    progress = job.meta["categories"]
+    assert set(progress) == {category.value for category in ProductCategory}
+    assert progress[CATEGORY]["status"] == "done"
+    assert progress[CATEGORY]["linear"] == "success"
+    assert progress[CATEGORY]["sarima"] == "failed"  # under 90 days of data
+    assert progress[CATEGORY]["seconds"] >= progress[CATEGORY]["linear_seconds"]
+    assert progress[ProductCategory.LAMB.value]["status"] == "no_data"
+
+
+def test_categories_are_trained_in_worker_processes(forecast_db, tmp_path):
+    lamb = Product(description="Lammkeule", category=ProductCategory.LAMB)
+    forecast_db.add(lamb)
+    forecast_db.flush()
+    for order in forecast_db.query(Order).all():
+        order.order_items.append(OrderItem(product_id=lamb.id, quantity=5))
+    forecast_db.commit()
+    service = MLForecastingService(forecast_db, model_store=ModelStore(tmp_path))
+
+    with patch.object(ml_forecasting_service, "ML_TRAINING_WORKERS", 2):
+        results = service.train_all_models()
+
+    for category in [CATEGORY, ProductCategory.LAMB.value]:
+        assert results[category]["linear"]["status"] == "success"
+        # The worker saved the model; the parent recorded where
+        assert service._load_model("Linear", category)
+    assert forecast_db.query(ModelMetadata).count() == 2
+    assert "error" in results[ProductCategory.VEAL.value]
+
+
+def test_retrain_queues_a_job():
+    job = SimpleNamespace(id="job-1", get_status=lambda: JobStatus.QUEUED)
+
+    with patch.object(ml_router, "enqueue_training", return_value=job):
+        response = TestClient(create_test_app()).post("/machine_learning/retrain")
+
+    assert response.status_code == 202
+    assert response.json() == {"status": "queued", "job_id": "job-1"}
+
+
+def test_training_status_reports_progress_and_results():
+    started_at = datetime(2024, 1, 1, 12, 0)
+    job = SimpleNamespace(
+        id="job-1",
+        get_status=lambda: JobStatus.FINISHED,
+        enqueued_at=started_at,
+        started_at=started_at,
+        ended_at=datetime(2024, 1, 1, 12, 5),
+        meta={"categories": {CATEGORY: {"status": "done", "seconds": 300.0}}},
+        return_value=lambda: {CATEGORY: {"linear": {"status": "success"}}},
+    )
+    client = TestClient(create_test_app())
+
+    with patch.object(ml_router.Job, "fetch", return_value=job):
+        response = client.get("/machine_learning/retrain/job-1")
+
+    assert response.status_code == 200
+    assert response.json() == {
+        "job_id": "job-1",
+        "status": "finished",
+        "enqueued_at": "2024-01-01T12:00:00",
+        "started_at": "2024-01-01T12:00:00",
+        "ended_at": "2024-01-01T12:05:00",
+        "categories": {CATEGORY: {"status": "done", "seconds": 300.0}},
+        "results": {CATEGORY: {"linear": {"status": "success"}}},
+        "error": None,
+    }
+
+    with patch.object(ml_router.Job, "fetch", side_effect=NoSuchJobError):
+        assert client.get("/machine_learning/retrain/missing").status_code == 404
+
+
+def test_concurrent_retrains_share_one_job():
+    redis_conn = ml_tasks.get_redis_connection()
+    redis_conn.delete(ml_tasks.CURRENT_TRAINING_JOB_KEY)
+    queue = ml_tasks.get_ml_training_queue()
+    enqueued, concurrent = [], []
+
+    def enqueue_job(job):
+        # A second request while the first one has claimed the slot
+        concurrent.append(ml_tasks.enqueue_training())
+        enqueued.append(job)
+        return job
+
+    with patch.object(ml_tasks, "get_ml_training_queue", lambda: queue), patch.object(
+        queue, "enqueue_job", side_effect=enqueue_job
+    ):
+        job = ml_tasks.enqueue_training()
+        assert [j.id for j in enqueued] == [job.id]
+        assert concurrent[0].id == job.id
+
+        # Once the run is over the next request queues a new one
+        job.set_status(JobStatus.FINISHED)
+        next_job = ml_tasks.enqueue_training()
+        assert next_job.id != job.id
+        assert [j.id for j in enqueued] == [job.id, next_job.id]
+        assert concurrent[1].id == next_job.id
+
+    redis_conn.delete(ml_tasks.CURRENT_TRAINING_JOB_KEY)
+    job.delete()
+    next_job.delete()
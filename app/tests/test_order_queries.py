@@ -0,0 +1,130 @@
+import pytest
+from fastapi import HTTPException
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.core.pagination import decode_order_cursor, next_order_cursor
+from app.crud import order as order_crud
+from app.models.base import Base
+from app.models.order import Order, OrderItem, OrderState
+from app.models.product import Product, ProductCategory
+from app.models.user import User
+
+
+@pytest.fixture
+def engine():
+    engine = create_engine(
+        "sqlite://",
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool,
+    )
+    Base.metadata.create_all(bind=engine)
+    yield engine
+    engine.dispose()
+
+
+@pytest.fixture
+def db(engine):
+    TestingSessionLocal = sessionmaker(bind=engine, autoflush=False)
+    session = TestingSessionLocal()
+
+    products = [
+        Product(description=f"Product {i}", category=ProductCategory.BEEF)
+        for i in range(5)
+    ]
+    users = [
+        User(
+            email=f"customer{i}@example.com",
+            company_name=f"Company {i}",
+            hashed_password="x",
+        )
+        for i in range(3)
+    ]
+    session.add_all(products + users)
+    session.flush()
+
+    for i in range(60):
+        order = Order(
+            user_email=users[i % len(users)].email,
+            state=OrderState.PDF_FAILED if i % 2 else OrderState.ORDER_PLACED,
+        )
+        order.order_items = [
+            OrderItem(product_id=products[(i + j) % len(products)].id, quantity=j + 1)
+            for j in range(3)
+        ]
+        session.add(order)
+    session.commit()
+    session.close()
+
+    session = TestingSessionLocal()
+    yield session
+    session.close()
+
+
+class StatementCounter:
+    def __init__(self, engine):
+        self.engine = engine
+        self.count = 0
+
+    def _on_execute(self, *args, **kwargs):
+        self.count += 1
+
+    def __enter__(self):
+        event.listen(self.engine, "before_cursor_execute", self._on_execute)
+        return self
+
+    def __exit__(self, *exc_info):
+        event.remove(self.engine, "before_cursor_execute", self._on_execute)
+
+
+def touch_relationships(orders):
+    for order in orders:
+        assert order.user.company_name
+        for item in order.order_items:
+            assert item.product.description
+
+
+@pytest.mark.parametrize(
+    "fetch",
+    [
+        lambda db, limit: order_crud.get_all_orders(db, limit=limit),
+        lambda db, limit: order_crud.get_orders_by_user_email(
+            db, "customer0@example.com", limit=limit
+        ),
+        lambda db, limit: order_crud.get_failed_orders(db, limit=limit),
+    ],
+)
+@pytest.mark.parametrize("limit", [1, 10, 50])
+def test_order_listing_statement_count_is_constant(engine, db, fetch, limit):
+    with StatementCounter(engine) as counter:
+        orders = fetch(db, limit)
+        touch_relationships(orders)
+
+    assert orders
+    # One statement for the page (with users joined), one for items + products.
+    assert counter.count == 2
+
+
+@pytest.mark.parametrize("limit", [7, 25])
+def test_cursor_pages_match_offset_pages(db, limit):
+    offset_ids = [order.id for order in order_crud.get_all_orders(db, limit=100)]
+
+    cursor_ids = []
+    after = None
+    while True:
+        page = order_crud.get_all_orders(db, limit=limit, after=after)
+        cursor_ids.extend(order.id for order in page)
+        cursor = next_order_cursor(page, limit)
+        if cursor is None:
+            break
+        after = decode_order_cursor(cursor)
+
+    assert cursor_ids == offset_ids
+    assert len(cursor_ids) == 60
+
+
+def test_invalid_cursor_is_rejected():
+    with pytest.raises(HTTPException) as exc_info:
+        decode_order_cursor("not-a-cursor")
+    assert exc_info.value.status_code == 400
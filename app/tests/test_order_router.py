@@ -0,0 +1,152 @@
+import csv
+import io
+import json
+import os
+import tempfile
+from types import SimpleNamespace
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.auth.core import get_current_user
+from app.config.database import get_async_db, get_db
+from app.config.read_replicas import get_async_read_db, get_read_db
+from app.core.pagination import NEXT_CURSOR_HEADER
+from app.models.base import Base
+from app.models.order import Order, OrderItem, OrderState
+from app.models.product import Product, ProductCategory
+from app.models.user import User
+from app.routers import order as order_router
+from app.services import order_export
+
+# A file, so the sync (export) and async (listings) engines share it
+DB_PATH = os.path.join(tempfile.mkdtemp(), "orders.db")
+engine = create_engine(
+    f"sqlite:///{DB_PATH}", connect_args={"check_same_thread": False}
+)
+TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+async_engine = create_async_engine(f"sqlite+aiosqlite:///{DB_PATH}")
+TestingAsyncSessionLocal = async_sessionmaker(async_engine, expire_on_commit=False)
+
+
+def override_get_db():
+    db = TestingSessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+
+
+async def override_get_async_db():
+    async with TestingAsyncSessionLocal() as db:
+        yield db
+
+
+@pytest.fixture(scope="module")
+def client():
+    Base.metadata.create_all(bind=engine)
+    db = TestingSessionLocal()
+    product = Product(description="Rind Filet", category=ProductCategory.BEEF)
+    user = User(email="shop@example.com", company_name="Shop", hashed_password="x")
+    db.add_all([product, user])
+    db.flush()
+    for i in range(3):
+        db.add(
+            Order(
+                user_email=user.email,
+                state=OrderState.ORDER_PLACED,
+                order_items=[OrderItem(product_id=product.id, quantity=i + 1)],
+            )
+        )
+    db.commit()
+    db.close()
+
+    app = FastAPI()
+    app.include_router(order_router.router)
+    app.dependency_overrides[get_db] = override_get_db
+    app.dependency_overrides[get_read_db] = override_get_db
+    app.dependency_overrides[get_async_db] = override_get_async_db
+    app.dependency_overrides[get_async_read_db] = override_get_async_db
+    app.dependency_overrides[get_current_user] = lambda: SimpleNamespace(
+        email="shop@example.com"
+    )
+    # The export opens its own session instead of using get_db
+    session_factory = order_export.SessionLocal
+    order_export.SessionLocal = TestingSessionLocal
+    # The admin checks are per-route RoleChecker instances
+    for route in order_router.router.routes:
+        for dependency in route.dependencies:
+            app.dependency_overrides[dependency.dependency] = lambda: None
+
+    # One event loop for the whole module; pooled aiosqlite connections
+    # are bound to the loop that opened them
+    with TestClient(app) as client:
+        yield client
+    order_export.SessionLocal = session_factory
+    Base.metadata.drop_all(bind=engine)
+
+
+def test_order_list_is_serialized_with_nested_objects(client):
+    response = client.get("/orders/")
+
+    assert response.status_code == 200
+    orders = response.json()
+    assert len(orders) == 3
+    assert orders[0]["user"] == {"email": "shop@example.com", "company_name": "Shop"}
+    assert orders[0]["order_items"][0]["product"] == {
+        "id": 1,
+        "description": "Rind Filet",
+        "image_link": None,
+        "category": "Rind",
+    }
+    assert NEXT_CURSOR_HEADER not in response.headers
+
+
+def test_order_list_cursor_walks_all_pages(client):
+    response = client.get("/orders/", params={"limit": 2})
+    first_page = response.json()
+    cursor = response.headers[NEXT_CURSOR_HEADER]
+
+    response = client.get("/orders/", params={"limit": 2, "cursor": cursor})
+    second_page = response.json()
+
+    assert [o["id"] for o in first_page + second_page] == [3, 2, 1]
+    assert NEXT_CURSOR_HEADER not in response.headers
+
+
+def test_my_orders_are_listed_through_the_async_session(client):
+    response = client.get("/orders/my-orders", params={"limit": 2})
+
+    assert response.status_code == 200
+    orders = response.json()
+    assert [o["id"] for o in orders] == [3, 2]
+    assert orders[0]["order_items"][0]["product"]["description"] == "Rind Filet"
+    assert NEXT_CURSOR_HEADER in response.headers
+
+
+def test_export_ndjson_streams_one_order_per_line(client):
+    response = client.get("/orders/export")
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    orders = [json.loads(line) for line in response.text.splitlines()]
+    assert [o["id"] for o in orders] == [1, 2, 3]
+    assert orders[2]["order_items"][0]["quantity"] == 3
+    assert orders[2]["order_items"][0]["product_category"] == "Rind"
+
+
+def test_export_csv_filters_by_state(client):
+    response = client.get(
+        "/orders/export", params={"format": "csv", "state": "order_placed"}
+    )
+    rows = list(csv.DictReader(io.StringIO(response.text)))
+    assert [row["order_id"] for row in rows] == ["1", "2", "3"]
+
+    response = client.get(
+        "/orders/export", params={"format": "csv", "state": "pdf_failed"}
+    )
+    assert list(csv.DictReader(io.StringIO(response.text))) == []
@@ -0,0 +1,29 @@
+import asyncio
+from unittest.mock import patch
+
+import pytest
+from fastapi import HTTPException
+
+from app.auth import core
+
+
+def test_verify_rehashes_when_cost_changes():
+    old_context = core.pwd_context.copy(bcrypt__rounds=4)
+    hashed = old_context.hash("secret-password")
+
+    valid, new_hash = asyncio.run(core.verify_password_async("secret-password", hashed))
+    assert valid
+    assert new_hash is not None
+    assert core.pwd_context.verify("secret-password", new_hash)
+    assert not core.pwd_context.needs_update(new_hash)
+
+    valid, new_hash = asyncio.run(core.verify_password_async("wrong", hashed))
+    assert not valid
+    assert new_hash is None
+
+
+def test_hashing_rejects_when_pool_is_full():
+    with patch.object(core, "PASSWORD_HASH_MAX_PENDING", 0):
+        with pytest.raises(HTTPException) as exc_info:
+            asyncio.run(core.get_password_hash_async("secret-password"))
+    assert exc_info.value.status_code == 503
@@ -0,0 +1,123 @@
+import os
+import tempfile
+
+import pytest
+import redis.asyncio
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.config.database import get_async_db, get_db
+from app.config.redis_config import redis_url
+from app.models.base import Base
+from app.models.product import Product, ProductCategory
+from app.routers import product as product_router
+from app.services import product_cache
+from app.services.product_cache import ProductCatalogCache
+
+DB_PATH = os.path.join(tempfile.mkdtemp(), "products.db")
+engine = create_engine(
+    f"sqlite:///{DB_PATH}", connect_args={"check_same_thread": False}
+)
+TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+async_engine = create_async_engine(f"sqlite+aiosqlite:///{DB_PATH}")
+TestingAsyncSessionLocal = async_sessionmaker(async_engine, expire_on_commit=False)
+
+
+def override_get_db():
+    db = TestingSessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+
+
+async def override_get_async_db():
+    async with TestingAsyncSessionLocal() as db:
+        yield db
+
+
+@pytest.fixture
+def client(monkeypatch):
+    Base.metadata.create_all(bind=engine)
+    db = TestingSessionLocal()
+    db.add_all(
+        [
+            Product(description="Rind Filet", category=ProductCategory.BEEF),
+            Product(description="Lammkeule", category=ProductCategory.LAMB),
+        ]
+    )
+    db.commit()
+    db.close()
+
+    # A fresh cache (version check on every request) on this test's loop
+    cache = ProductCatalogCache(version_check_interval=0)
+    async_redis = redis.asyncio.from_url(redis_url)
+    monkeypatch.setattr(product_router, "product_catalog_cache", cache)
+    monkeypatch.setattr(
+        product_cache, "get_async_redis_connection", lambda: async_redis
+    )
+    cache.invalidate()
+
+    app = FastAPI()
+    app.include_router(product_router.router)
+    app.dependency_overrides[get_db] = override_get_db
+    app.dependency_overrides[get_async_db] = override_get_async_db
+    for route in product_router.router.routes:
+        for dependency in route.dependencies:
+            app.dependency_overrides[dependency.dependency] = lambda: None
+
+    with TestClient(app) as client:
+        yield client
+    Base.metadata.drop_all(bind=engine)
+
+
+def add_product_behind_the_cache(description):
+    db = TestingSessionLocal()
+    db.add(Product(description=description, category=ProductCategory.BEEF))
+    db.commit()
+    db.close()
+
+
+def test_catalog_is_served_from_cache_until_invalidated(client):
+    response = client.get("/products/")
+    assert response.status_code == 200
+    assert [p["description"] for p in response.json()] == ["Lammkeule", "Rind Filet"]
+    assert response.headers["cache-control"].startswith("public, max-age=")
+
+    add_product_behind_the_cache("Rinderhack")
+    assert len(client.get("/products/").json()) == 2
+
+    product_router.product_catalog_cache.invalidate()
+    assert len(client.get("/products/").json()) == 3
+
+
+def test_catalog_is_cached_per_category(client):
+    response = client.get("/products/", params={"category": "Lamm"})
+    assert [p["description"] for p in response.json()] == ["Lammkeule"]
+    assert response.json()[0]["category"] == "Lamm"
+
+    response = client.get("/products/", params={"category": "Rind"})
+    assert [p["description"] for p in response.json()] == ["Rind Filet"]
+
+
+def test_etag_revalidation_and_admin_update(client):
+    etag = client.get("/products/").headers["etag"]
+
+    response = client.get("/products/", headers={"If-None-Match": etag})
+    assert response.status_code == 304
+    assert response.headers["etag"] == etag
+    response = client.get("/products/", headers={"If-None-Match": f"W/{etag}"})
+    assert response.status_code == 304
+
+    response = client.patch(
+        "/products/1", data={"description": "Rinderfilet", "category": "Rind"}
+    )
+    assert response.status_code == 200
+
+    response = client.get("/products/", headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.headers["etag"] != etag
+    assert "Rinderfilet" in [p["description"] for p in response.json()]
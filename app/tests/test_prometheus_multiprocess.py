@@ -0,0 +1,37 @@
+import os
+import subprocess
+import sys
+
+RECORD_EMAIL = (
+    "from app.middleware.prometheus_middleware import record_email_sent;"
+    "record_email_sent('order_confirmation')"
+)
+PRINT_METRICS = (
+    "from app.config.prometheus_config import generate_metrics;"
+    "print(generate_metrics().decode())"
+)
+
+
+def run_python(code, multiproc_dir):
+    env = {**os.environ, "PROMETHEUS_MULTIPROC_DIR": str(multiproc_dir)}
+    result = subprocess.run(
+        [sys.executable, "-c", code],
+        env=env,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    return result.stdout
+
+
+def test_metrics_of_other_processes_are_merged(tmp_path):
+    # e.g. the email worker recording, the API serving /metrics
+    run_python(RECORD_EMAIL, tmp_path)
+    run_python(RECORD_EMAIL, tmp_path)
+
+    metrics = run_python(PRINT_METRICS, tmp_path)
+
+    assert (
+        'business_emails_sent_total{status="success",type="order_confirmation"} 2.0'
+        in metrics
+    )
@@ -0,0 +1,91 @@
+import os
+import tempfile
+import time
+from unittest.mock import patch
+
+from fastapi import Depends, FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.config import read_replicas
+from app.config.read_replicas import PRIMARY, ReplicaRouter
+
+
+def sqlite_url(name):
+    return f"sqlite:///{os.path.join(tempfile.mkdtemp(), name)}"
+
+
+def replica_names(router, count):
+    return [getattr(router.pick(), "name", PRIMARY) for _ in range(count)]
+
+
+def test_replicas_are_used_round_robin():
+    router = ReplicaRouter([sqlite_url("a.db"), sqlite_url("b.db")])
+    assert router.pick() is None  # nothing checked yet: primary
+
+    router.run_due_checks()
+    assert replica_names(router, 4) == [
+        "replica-1",
+        "replica-0",
+        "replica-1",
+        "replica-0",
+    ]
+
+
+def test_unreachable_and_lagging_replicas_are_skipped():
+    unreachable = "sqlite:////nonexistent/dir/replica.db"
+    router = ReplicaRouter([sqlite_url("a.db"), unreachable, sqlite_url("c.db")])
+    lagging = router.replicas[2]
+
+    with patch.object(lagging, "measure_lag", return_value=60.0):
+        router.run_due_checks()
+    assert set(replica_names(router, 6)) == {"replica-0"}
+
+    router.replicas[0].mark_failed()
+    assert router.pick() is None
+
+
+def test_read_session_falls_back_to_primary():
+    router = ReplicaRouter([sqlite_url("a.db")])
+    with patch.object(read_replicas, "read_replicas", router):
+        with patch.object(router.replicas[0], "measure_lag", side_effect=OSError):
+            sessions = read_replicas.get_read_db()
+            db = next(sessions)
+            assert db.bind is read_replicas.SessionLocal.kw["bind"]
+            sessions.close()
+
+        router.replicas[0].checked_at = float("-inf")
+        sessions = read_replicas.get_read_db()
+        db = next(sessions)
+        assert db.bind is router.replicas[0].engine
+        assert db.execute(text("SELECT 1")).scalar() == 1
+        sessions.close()
+
+
+def test_request_on_a_failed_replica_is_served_by_the_primary():
+    # Healthy at its last check, unreachable now
+    router = ReplicaRouter(["sqlite:////nonexistent/dir/replica.db"])
+    replica = router.replicas[0]
+    app = FastAPI()
+
+    @app.get("/sync")
+    def sync_read(db: Session = Depends(read_replicas.get_read_db)):
+        return {"one": db.execute(text("SELECT 1")).scalar()}
+
+    @app.get("/async")
+    async def async_read(db: AsyncSession = Depends(read_replicas.get_async_read_db)):
+        return {"one": (await db.execute(text("SELECT 1"))).scalar()}
+
+    client = TestClient(app)
+    with patch.object(read_replicas, "read_replicas", router):
+        for path in ["/sync", "/async"]:
+            replica.healthy = True
+            replica.checked_at = time.monotonic()
+
+            response = client.get(path)
+
+            assert response.status_code == 200
+            assert response.json() == {"one": 1}
+            assert not replica.healthy
@@ -0,0 +1,165 @@
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import create_engine, func
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.crud import analytics as analytics_crud
+from app.crud import order as order_crud
+from app.models.analytics import DailyCustomerOrders, DailyProductSales
+from app.models.base import Base
+from app.models.order import Order, OrderItem
+from app.models.product import Product, ProductCategory
+from app.models.user import User
+from app.schemas.order import OrderCreate
+
+EMAILS = ["a@example.com", "b@example.com"]
+
+
+@pytest.fixture
+def db():
+    engine = create_engine(
+        "sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool
+    )
+    Base.metadata.create_all(bind=engine)
+    session = sessionmaker(bind=engine, autoflush=False)()
+
+    products = [
+        Product(description=f"Product {i}", category=ProductCategory.BEEF)
+        for i in range(3)
+    ]
+    users = [
+        User(email=email, company_name=email, hashed_password="x") for email in EMAILS
+    ]
+    session.add_all(products + users)
+    session.commit()
+
+    # Older orders written directly, as the faker and imports do
+    for i in range(6):
+        session.add(
+            Order(
+                user_email=EMAILS[i % 2],
+                order_date=datetime(2024, 1, 1) + timedelta(days=i // 2, hours=i),
+                order_items=[
+                    OrderItem(product_id=products[i % 3].id, quantity=i + 1),
+                    OrderItem(product_id=products[0].id, quantity=2),
+                ],
+            )
+        )
+    session.commit()
+    analytics_crud.rebuild_sales_rollups(session)
+
+    # Newer orders through the API path, including a product listed twice
+    for i in range(4):
+        order_crud.create_order(
+            session,
+            OrderCreate(
+                order_items=[
+                    {"product_id": products[i % 3].id, "quantity": 3},
+                    {"product_id": products[i % 3].id, "quantity": 1},
+                ]
+            ),
+            user_email=EMAILS[i % 2],
+        )
+
+    yield session
+    session.close()
+    engine.dispose()
+
+
+def rollup_rows(db):
+    return {
+        "products": sorted(
+            tuple(row)
+            for row in db.query(
+                DailyProductSales.date,
+                DailyProductSales.product_id,
+                DailyProductSales.user_email,
+                DailyProductSales.quantity,
+                DailyProductSales.order_count,
+            )
+        ),
+        "customers": sorted(
+            tuple(row)
+            for row in db.query(
+                DailyCustomerOrders.date,
+                DailyCustomerOrders.user_email,
+                DailyCustomerOrders.quantity,
+                DailyCustomerOrders.order_count,
+            )
+        ),
+    }
+
+
+def test_incremental_rollups_match_a_rebuild(db):
+    incremental = rollup_rows(db)
+    analytics_crud.rebuild_sales_rollups(db)
+    assert rollup_rows(db) == incremental
+
+
+def test_analytics_match_the_raw_tables(db):
+    per_product = (
+        db.query(OrderItem.product_id, func.sum(OrderItem.quantity))
+        .group_by(OrderItem.product_id)
+        .all()
+    )
+    assert sorted(map(tuple, analytics_crud.get_total_quantity_per_product(db))) == (
+        sorted(map(tuple, per_product))
+    )
+
+    per_day = (
+        db.query(func.date(Order.order_date), func.count(Order.id))
+        .group_by(func.date(Order.order_date))
+        .all()
+    )
+    assert [
+        (day.isoformat(), count)
+        for day, count in analytics_crud.get_order_time_distribution(db)
+    ] == sorted(map(tuple, per_day))
+
+    total_quantity = db.query(func.sum(OrderItem.quantity)).scalar()
+    assert analytics_crud.get_average_quantity_per_order(db) == total_quantity / 10
+    assert analytics_crud.get_total_quantity_by_user(db, EMAILS[0]) == (
+        db.query(func.sum(OrderItem.quantity))
+        .join(Order)
+        .filter(Order.user_email == EMAILS[0])
+        .scalar()
+    )
+    assert dict(analytics_crud.get_customer_order_frequency(db)) == {
+        EMAILS[0]: 5,
+        EMAILS[1]: 5,
+    }
+
+
+def test_email_change_and_deletion_follow_the_user(db):
+    analytics_crud.rename_customer_in_rollups(db, EMAILS[0], "new@example.com")
+    db.commit()
+    frequency = dict(analytics_crud.get_customer_order_frequency(db))
+    assert frequency == {"new@example.com": 5, EMAILS[1]: 5}
+
+    analytics_crud.remove_customer_from_rollups(db, EMAILS[1])
+    db.commit()
+    assert dict(analytics_crud.get_customer_order_frequency(db)) == {
+        "new@example.com": 5
+    }
+
+
+def test_dashboard_matches_the_single_metric_queries(db):
+    dashboard = analytics_crud.get_dashboard(db)
+
+    for metric in [
+        "total_quantity_per_product",
+        "most_ordered_products",
+        "least_ordered_products",
+        "top_customers_by_quantity",
+        "order_time_distribution",
+    ]:
+        rows = getattr(analytics_crud, f"get_{metric}")(db)
+        assert dashboard[metric] == [tuple(row) for row in rows], metric
+    for metric in ["product_order_frequency", "customer_order_frequency"]:
+        rows = getattr(analytics_crud, f"get_{metric}")(db)
+        assert sorted(dashboard[metric]) == sorted(map(tuple, rows)), metric
+    assert dashboard["average_quantity_per_order"] == (
+        analytics_crud.get_average_quantity_per_order(db)
+    )
@@ -0,0 +1,100 @@
+import asyncio
+from datetime import datetime
+from types import SimpleNamespace
+from unittest.mock import patch
+
+import redis.asyncio
+from fastapi import Depends, FastAPI
+from fastapi.testclient import TestClient
+
+from app.auth import core
+from app.auth.core import COOKIE_NAME, get_current_user
+from app.auth.dependencies import require_customer
+from app.auth import user_cache as user_cache_module
+from app.auth.user_cache import UserCache, user_cache
+from app.config.database import get_async_db
+from app.config.redis_config import redis_url
+from app.schemas.user import UserSnapshot
+
+SECRET_KEY = "test-secret"
+COMPANY_NAME = "Cache Test GmbH"
+
+
+class FakeAsyncSession:
+    async def run_sync(self, fn, *args, **kwargs):
+        return fn(None, *args, **kwargs)
+
+
+def create_test_app():
+    app = FastAPI()
+    app.dependency_overrides[get_async_db] = FakeAsyncSession
+
+    @app.get("/me")
+    async def me(
+        current_user=Depends(get_current_user),
+        role_data: dict = Depends(require_customer()),
+    ):
+        return {"email": current_user.email, "roles": current_user.role_names}
+
+    return app
+
+
+def make_user(email):
+    return SimpleNamespace(
+        id="1",
+        email=email,
+        company_name=COMPANY_NAME,
+        is_active=True,
+        created_at=datetime.now(),
+        roles=[SimpleNamespace(name="customer")],
+    )
+
+
+@patch.object(core, "SECRET_KEY", SECRET_KEY)
+@patch.object(core, "get_user_by_company_name")
+def test_current_user_is_cached_until_invalidated(mock_get_user):
+    mock_get_user.return_value = make_user("old@example.com")
+    user_cache.invalidate(COMPANY_NAME)
+
+    client = TestClient(create_test_app())
+    token = core.create_access_token({"sub": COMPANY_NAME, "roles": ["customer"]})
+    client.cookies.set(COOKIE_NAME, token)
+
+    with patch.object(
+        core, "decode_access_token", wraps=core.decode_access_token
+    ) as decode:
+        assert client.get("/me").json() == {
+            "email": "old@example.com",
+            "roles": ["customer"],
+        }
+        # One decode for both dependencies
+        assert decode.call_count == 1
+
+    assert client.get("/me").json()["email"] == "old@example.com"
+    assert mock_get_user.call_count == 1
+
+    mock_get_user.return_value = make_user("new@example.com")
+    user_cache.invalidate(COMPANY_NAME)
+    assert client.get("/me").json()["email"] == "new@example.com"
+    assert mock_get_user.call_count == 2
+
+
+def test_invalidate_async_clears_memory_and_redis():
+    async def check():
+        # A client for this test's event loop
+        async_redis = redis.asyncio.from_url(redis_url)
+        cache = UserCache(use_redis=True)
+        snapshot = UserSnapshot.model_validate(make_user("a@example.com"))
+        with patch.object(
+            user_cache_module, "get_async_redis_connection", lambda: async_redis
+        ):
+            await cache.set(COMPANY_NAME, snapshot)
+            assert await async_redis.exists(cache._get_key(COMPANY_NAME))
+
+            await cache.invalidate_async(COMPANY_NAME)
+
+            assert await cache.get(COMPANY_NAME) is None
+            assert not await async_redis.exists(cache._get_key(COMPANY_NAME))
+        await async_redis.aclose()
+
+    asyncio.run(check())